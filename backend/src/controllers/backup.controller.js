@@ -20,6 +20,7 @@ const Comment = require('../models/Comment');
 const Notification = require('../models/Notification');
 const { mysqlPool } = require('../config/database');
 const { success, errors } = require('../utils/response');
+const { parseIdRange, idRangeFilter } = require('../utils/idRange');
 const logger = require('../utils/logger');
 const { withSystemContext, getCurrentTenantId, shouldBypassFilter } = require('../utils/tenantContext');
 const mysqlBackupService = require('../services/mysql-backup.service');
@@ -404,31 +405,42 @@ async function compareBackup(req, res) {
 // =========================================================================
 async function getMongodbTableData(req, res, next) {
   try {
-    const { table, page = 1, limit = 20 } = req.query;
+    const { table, page = 1, limit = 20, sort } = req.query;
 
     if (!MODELS[table]) {
       return res.status(400).json(errors.badRequest(`无效的表名: ${table}`));
     }
 
+    const range = parseIdRange(req.query);
+    if (range.error) {
+      return res.status(400).json(errors.badRequest(range.error));
+    }
+
     const skip = (parseInt(page, 10) - 1) * parseInt(limit, 10);
     const model = MODELS[table];
     const bypass = shouldBypassFilter();
     const tenantId = getCurrentTenantId();
     const filter = bypass ? {} : { tenantId };
+    const idFilter = idRangeFilter(range);
+    if (idFilter) filter._id = idFilter;
+
+    const fetchPage = () => {
+      let query = model.find(filter);
+      if (sort === 'id') query = query.sort({ _id: 1 });
+      return Promise.all([
+        query.skip(skip).limit(parseInt(limit, 10)).lean(),
+        // 按 ID 范围翻页时不统计总数，避免每页都扫描整个范围
+        range.bounded ? null : model.countDocuments(filter)
+      ]);
+    };
 
     let data, total;
     if (bypass) {
       await withSystemContext(null, async () => {
-        [data, total] = await Promise.all([
-          model.find(filter).skip(skip).limit(parseInt(limit, 10)).lean(),
-          model.countDocuments(filter)
-        ]);
+        [data, total] = await fetchPage();
       });
     } else {
-      [data, total] = await Promise.all([
-        model.find(filter).skip(skip).limit(parseInt(limit, 10)).lean(),
-        model.countDocuments(filter)
-      ]);
+      [data, total] = await fetchPage();
     }
 
     res.json(success({
@@ -438,7 +450,7 @@ async function getMongodbTableData(req, res, next) {
         page: parseInt(page, 10),
         limit: parseInt(limit, 10),
         total,
-        pages: Math.ceil(total / parseInt(limit, 10))
+        pages: total === null ? null : Math.ceil(total / parseInt(limit, 10))
       }
     }, `✅ MongoDB 表 ${table} 数据`));
   } catch (error) {
@@ -452,7 +464,7 @@ async function getMongodbTableData(req, res, next) {
 // =========================================================================
 async function getMysqlTableData(req, res) {
   try {
-    const { table, page = 1, limit = 20 } = req.query;
+    const { table, page = 1, limit = 20, sort } = req.query;
 
     const validTables = [
       'users', 'admins', 'periods', 'sections', 'checkins', 'enrollments',
@@ -464,6 +476,11 @@ async function getMysqlTableData(req, res) {
       return res.status(400).json(errors.badRequest(`无效的表名: ${table}`));
     }
 
+    const range = parseIdRange(req.query);
+    if (range.error) {
+      return res.status(400).json(errors.badRequest(range.error));
+    }
+
     const skip = (parseInt(page, 10) - 1) * parseInt(limit, 10);
     const bypass = shouldBypassFilter();
     const tenantId = getCurrentTenantId();
@@ -474,23 +491,30 @@ async function getMysqlTableData(req, res) {
       let total = 0;
 
       try {
-        let queryData, countResult;
-        if (bypass || !tenantId) {
-          [queryData] = await conn.query(
-            `SELECT * FROM ${table} LIMIT ? OFFSET ?`,
-            [parseInt(limit, 10), skip]
-          );
-          [[countResult]] = await conn.query(`SELECT COUNT(*) as total FROM ${table}`);
-        } else {
-          const tid = tenantId.toString();
-          [queryData] = await conn.query(
-            `SELECT * FROM ${table} WHERE tenant_id = ? LIMIT ? OFFSET ?`,
-            [tid, parseInt(limit, 10), skip]
-          );
-          [[countResult]] = await conn.query(
-            `SELECT COUNT(*) as total FROM ${table} WHERE tenant_id = ?`,
-            [tid]
-          );
+        const conditions = [];
+        const params = [];
+        if (!bypass && tenantId) {
+          conditions.push('tenant_id = ?');
+          params.push(tenantId.toString());
+        }
+        if (range.afterId) {
+          conditions.push('id > ?');
+          params.push(range.afterId);
+        }
+        if (range.beforeId) {
+          conditions.push('id < ?');
+          params.push(range.beforeId);
+        }
+        const where = conditions.length > 0 ? ` WHERE ${conditions.join(' AND ')}` : '';
+        const orderBy = sort === 'id' ? ' ORDER BY id' : '';
+
+        const [queryData] = await conn.query(
+          `SELECT * FROM ${table}${where}${orderBy} LIMIT ? OFFSET ?`,
+          [...params, parseInt(limit, 10), skip]
+        );
+        let countResult = { total: null };
+        if (!range.bounded) {
+          [[countResult]] = await conn.query(`SELECT COUNT(*) as total FROM ${table}${where}`, params);
         }
 
         data = queryData;
@@ -506,7 +530,7 @@ async function getMysqlTableData(req, res) {
           page: parseInt(page, 10),
           limit: parseInt(limit, 10),
           total,
-          pages: total > 0 ? Math.ceil(total / parseInt(limit, 10)) : 0
+          pages: total === null ? null : Math.ceil(total / parseInt(limit, 10))
         }
       }, `✅ MySQL 表 ${table} 数据`));
     } finally {
@@ -3,6 +3,7 @@ const User = require('../models/User');
 const Section = require('../models/Section');
 const Period = require('../models/Period');
 const { success, errors } = require('../utils/response');
+const { parseIdRange, idRangeFilter } = require('../utils/idRange');
 const logger = require('../utils/logger');
 const { publishSyncEvent } = require('../services/sync.service');
 const { dispatchNotificationWithSubscribe } = require('../services/user-notification.service');
@@ -950,9 +951,18 @@ async function deleteCheckin(req, res, next) {
 // 【Admin】获取所有打卡记录（后台管理）
 async function getAdminCheckins(req, res, next) {
   try {
-    const { page = 1, limit = 20, userId, periodId, dateFrom, dateTo, search } = req.query;
+    const { page = 1, limit = 20, userId, periodId, dateFrom, dateTo, search, sort } = req.query;
+
+    const range = parseIdRange(req.query);
+    if (range.error) {
+      return res.status(400).json(errors.badRequest(range.error));
+    }
 
     const query = {};
+    const idFilter = idRangeFilter(range);
+    if (idFilter) {
+      query._id = idFilter;
+    }
 
     // 按用户筛选
     if (userId) {
@@ -1013,20 +1023,36 @@ async function getAdminCheckins(req, res, next) {
       }
     }
 
-    // 获取总数
-    const total = await Checkin.countDocuments(query);
-
-    // 获取打卡列表
+    // 获取打卡列表（sort=id 按 _id 升序，供导出工具按 ID 游标翻页）
     const checkins = await Checkin.find(query)
       .populate('userId', 'nickname avatar avatarUrl openid')
       .populate('sectionId', 'title day')
       .populate('periodId', 'name title')
       .populate('likes.userId', 'nickname avatar avatarUrl')
-      .sort({ checkinDate: -1 })
+      .sort(sort === 'id' ? { _id: 1 } : { checkinDate: -1 })
       .skip((page - 1) * limit)
       .limit(parseInt(limit))
       .select('-__v');
 
+    // 按 ID 范围翻页时不统计总数和汇总数据，避免每页都扫描整个结果集
+    if (range.bounded) {
+      return res.json(
+        success({
+          list: checkins,
+          pagination: {
+            page: parseInt(page),
+            limit: parseInt(limit),
+            total: null,
+            pages: null
+          },
+          stats: null
+        })
+      );
+    }
+
+    // 获取总数
+    const total = await Checkin.countDocuments(query);
+
     // 计算统计信息
     const today = new Date();
     today.setHours(0, 0, 0, 0);
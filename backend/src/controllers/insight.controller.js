@@ -7,6 +7,7 @@ const Enrollment = require('../models/Enrollment');
 const Period = require('../models/Period');
 const Section = require('../models/Section');
 const { success, errors } = require('../utils/response');
+const { parseIdRange, idRangeFilter } = require('../utils/idRange');
 const { createNotification, createNotifications } = require('./notification.controller');
 const logger = require('../utils/logger');
 const { publishSyncEvent } = require('../services/sync.service');
@@ -960,20 +961,29 @@ async function deleteInsight(req, res, next) {
 // 获取小凡看见列表（管理后台）
 async function getInsights(req, res, next) {
   try {
-    const { periodId, type, page = 1, limit = 20 } = req.query;
+    const { periodId, type, page = 1, limit = 20, sort } = req.query;
+
+    const range = parseIdRange(req.query);
+    if (range.error) {
+      return res.status(400).json(errors.badRequest(range.error));
+    }
 
     const query = {};
     if (periodId) query.periodId = periodId;
     if (type) query.type = type;
+    const idFilter = idRangeFilter(range);
+    if (idFilter) query._id = idFilter;
 
-    const total = await Insight.countDocuments(query);
+    // 按 ID 范围翻页时不统计总数，避免每页都扫描整个结果集
+    const total = range.bounded ? null : await Insight.countDocuments(query);
     const skip = (parseInt(page, 10) - 1) * parseInt(limit, 10);
+    // sort=id 按 _id 升序，供导出工具按 ID 游标翻页
     const insights = await Insight.find(query)
       .populate('userId', 'nickname avatar avatarUrl')
       .populate('targetUserId', 'nickname avatar avatarUrl')
       .populate('periodId', 'name title')
       .populate('sectionId', 'title day')
-      .sort({ updatedAt: -1, createdAt: -1 })
+      .sort(sort === 'id' ? { _id: 1 } : { updatedAt: -1, createdAt: -1 })
       .skip(skip)
       .limit(parseInt(limit, 10))
       .select('-__v');
@@ -984,7 +994,7 @@ async function getInsights(req, res, next) {
       page: parseInt(page, 10),
       limit: parseInt(limit, 10),
       total,
-      totalPages: Math.ceil(total / parseInt(limit, 10))
+      totalPages: total === null ? null : Math.ceil(total / parseInt(limit, 10))
     };
     res.json(response);
   } catch (error) {
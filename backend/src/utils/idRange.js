@@ -0,0 +1,44 @@
+/**
+ * 按 ObjectId 范围翻页（keyset 分页）
+ *
+ * afterId / beforeId 为开区间边界，配合按 _id 升序排序使用：
+ * - 客户端可以把 ID 空间切成多段并行拉取
+ * - 每段用上一页最后一条记录的 ID 作为游标，中断后可以从游标继续
+ * - 不依赖 skip，翻到多深都只扫描一页的索引范围
+ */
+
+const OBJECT_ID_PATTERN = /^[0-9a-f]{24}$/i;
+
+/**
+ * 解析 query 中的 afterId / beforeId
+ * @returns {{afterId: string|null, beforeId: string|null, bounded: boolean}|{error: string}}
+ */
+function parseIdRange(query) {
+  const range = { afterId: null, beforeId: null, bounded: false };
+  for (const key of ['afterId', 'beforeId']) {
+    const value = query[key];
+    if (value === undefined || value === '') continue;
+    if (typeof value !== 'string' || !OBJECT_ID_PATTERN.test(value)) {
+      return { error: `${key} 必须是 24 位十六进制 ID` };
+    }
+    range[key] = value.toLowerCase();
+    range.bounded = true;
+  }
+  return range;
+}
+
+/**
+ * 转成 MongoDB 的 _id 条件，未指定范围时返回 null
+ */
+function idRangeFilter(range) {
+  if (!range.bounded) return null;
+  const filter = {};
+  if (range.afterId) filter.$gt = range.afterId;
+  if (range.beforeId) filter.$lt = range.beforeId;
+  return filter;
+}
+
+module.exports = {
+  parseIdRange,
+  idRangeFilter
+};
@@ -4,6 +4,7 @@
  * 测试覆盖：
  * - updateMongodbRecord: 更新 MongoDB 单条记录
  * - deleteMongodbRecord: 删除 MongoDB 单条记录
+ * - getMongodbTableData / getMysqlTableData: 按 ID 范围翻页
  */
 
 const { expect } = require('chai');
@@ -20,6 +21,7 @@ describe('Backup Controller', () => {
   let AdminStub;
   let PeriodStub;
   let publishSyncEventStub;
+  let mysqlPoolStub;
 
   beforeEach(() => {
     sandbox = sinon.createSandbox();
@@ -60,6 +62,11 @@ describe('Backup Controller', () => {
     // Mock sync service
     publishSyncEventStub = sandbox.stub();
 
+    // Mock MySQL 连接池
+    mysqlPoolStub = {
+      getConnection: sandbox.stub()
+    };
+
     // Mock response utils
     const responseUtils = {
       success: (data, message) => ({ code: 200, message, data }),
@@ -94,7 +101,7 @@ describe('Backup Controller', () => {
         '../utils/response': responseUtils,
         '../utils/logger': loggerStub,
         '../services/sync.service': { publishSyncEvent: publishSyncEventStub },
-        '../config/database': { mysqlPool: {} },
+        '../config/database': { mysqlPool: mysqlPoolStub },
         '../services/mysql-backup.service': {}
       }
     );
@@ -433,4 +440,115 @@ describe('Backup Controller', () => {
       expect(res.status.calledWith(500)).to.be.true;
     });
   });
+
+  // =========================================================================
+  // 按 ID 范围翻页测试
+  // =========================================================================
+
+  describe('getMongodbTableData', () => {
+    const afterId = '65a000000000000000000000';
+    const beforeId = '65b000000000000000000000';
+    let query;
+
+    beforeEach(() => {
+      query = {
+        sort: sandbox.stub().returnsThis(),
+        skip: sandbox.stub().returnsThis(),
+        limit: sandbox.stub().returnsThis(),
+        lean: sandbox.stub().resolves([{ _id: afterId }])
+      };
+      UserStub.find = sandbox.stub().returns(query);
+    });
+
+    it('按 ID 范围翻页时应按 _id 升序并跳过总数统计', async () => {
+      req.query = { table: 'users', limit: '500', sort: 'id', afterId, beforeId };
+
+      await backupController.getMongodbTableData(req, res);
+
+      const filter = UserStub.find.getCall(0).args[0];
+      expect(filter._id).to.deep.equal({ $gt: afterId, $lt: beforeId });
+      expect(query.sort.calledWith({ _id: 1 })).to.be.true;
+      expect(query.limit.calledWith(500)).to.be.true;
+      expect(UserStub.countDocuments.called).to.be.false;
+
+      const responseData = res.json.getCall(0).args[0];
+      expect(responseData.data.pagination.total).to.equal(null);
+    });
+
+    it('不带范围参数时应保持原有分页与总数统计', async () => {
+      req.query = { table: 'users', page: '2', limit: '20' };
+      UserStub.countDocuments.resolves(45);
+
+      await backupController.getMongodbTableData(req, res);
+
+      expect(query.sort.called).to.be.false;
+      expect(query.skip.calledWith(20)).to.be.true;
+      const responseData = res.json.getCall(0).args[0];
+      expect(responseData.data.pagination.total).to.equal(45);
+      expect(responseData.data.pagination.pages).to.equal(3);
+    });
+
+    it('应该返回 400 当 afterId 不是合法 ID', async () => {
+      req.query = { table: 'users', afterId: 'not-an-id' };
+
+      await backupController.getMongodbTableData(req, res);
+
+      expect(res.status.calledWith(400)).to.be.true;
+      expect(UserStub.find.called).to.be.false;
+    });
+  });
+
+  describe('getMysqlTableData', () => {
+    const afterId = '65a000000000000000000000';
+    const beforeId = '65b000000000000000000000';
+    let conn;
+
+    beforeEach(() => {
+      conn = {
+        query: sandbox.stub(),
+        release: sandbox.stub()
+      };
+      mysqlPoolStub.getConnection.resolves(conn);
+    });
+
+    it('按 ID 范围翻页时应生成带边界与排序的 SQL 并跳过总数统计', async () => {
+      conn.query.resolves([[{ id: afterId }]]);
+      req.query = { table: 'checkins', limit: '500', sort: 'id', afterId, beforeId };
+
+      await backupController.getMysqlTableData(req, res);
+
+      expect(conn.query.callCount).to.equal(1);
+      const [sql, params] = conn.query.getCall(0).args;
+      expect(sql).to.equal('SELECT * FROM checkins WHERE id > ? AND id < ? ORDER BY id LIMIT ? OFFSET ?');
+      expect(params).to.deep.equal([afterId, beforeId, 500, 0]);
+      expect(conn.release.called).to.be.true;
+
+      const responseData = res.json.getCall(0).args[0];
+      expect(responseData.data.data).to.deep.equal([{ id: afterId }]);
+      expect(responseData.data.pagination.total).to.equal(null);
+    });
+
+    it('不带范围参数时应保持原有分页与总数统计', async () => {
+      conn.query.onFirstCall().resolves([[{ id: afterId }]]);
+      conn.query.onSecondCall().resolves([[{ total: 41 }]]);
+      req.query = { table: 'checkins', page: '3', limit: '20' };
+
+      await backupController.getMysqlTableData(req, res);
+
+      expect(conn.query.getCall(0).args[0]).to.equal('SELECT * FROM checkins LIMIT ? OFFSET ?');
+      expect(conn.query.getCall(0).args[1]).to.deep.equal([20, 40]);
+      const responseData = res.json.getCall(0).args[0];
+      expect(responseData.data.pagination.total).to.equal(41);
+      expect(responseData.data.pagination.pages).to.equal(3);
+    });
+
+    it('应该返回 400 当 beforeId 不是合法 ID', async () => {
+      req.query = { table: 'checkins', beforeId: '1; DROP TABLE checkins' };
+
+      await backupController.getMysqlTableData(req, res);
+
+      expect(res.status.calledWith(400)).to.be.true;
+      expect(mysqlPoolStub.getConnection.called).to.be.false;
+    });
+  });
 });
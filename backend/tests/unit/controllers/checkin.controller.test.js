@@ -959,6 +959,40 @@ describe('Checkin Controller', () => {
       const query = CheckinStub.find.getCall(0).args[0];
       expect(query).to.have.property('checkinDate');
     });
+
+    it('应该支持按 ID 游标翻页且不统计总数', async () => {
+      const afterId = new mongoose.Types.ObjectId().toString();
+      req.query = { page: 1, limit: 500, sort: 'id', afterId };
+
+      const sort = sandbox.stub().returnsThis();
+      CheckinStub.find.returns({
+        populate: sandbox.stub().returnsThis(),
+        sort,
+        skip: sandbox.stub().returnsThis(),
+        limit: sandbox.stub().returnsThis(),
+        select: sandbox.stub().resolves([])
+      });
+
+      await checkinController.getAdminCheckins(req, res, next);
+
+      const query = CheckinStub.find.getCall(0).args[0];
+      expect(query._id).to.deep.equal({ $gt: afterId });
+      expect(sort.getCall(0).args[0]).to.deep.equal({ _id: 1 });
+      expect(CheckinStub.countDocuments.called).to.be.false;
+      expect(CheckinStub.aggregate.called).to.be.false;
+      const responseData = res.json.getCall(0).args[0];
+      expect(responseData.data.pagination.total).to.be.null;
+      expect(responseData.data.stats).to.be.null;
+    });
+
+    it('无效的游标 ID 应该返回 400', async () => {
+      req.query = { afterId: 'not-an-id' };
+
+      await checkinController.getAdminCheckins(req, res, next);
+
+      expect(res.status.calledWith(400)).to.be.true;
+      expect(CheckinStub.find.called).to.be.false;
+    });
   });
 
   describe('getCheckinStats', () => {
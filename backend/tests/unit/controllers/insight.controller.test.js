@@ -2086,6 +2086,29 @@ describe('Insight Controller - 102+ 完整测试', () => {
       expect(query.periodId.toString()).to.equal(fixtures.testPeriods.activeOngoing._id.toString());
     });
 
+    it('TC-ADMIN-009b: 按 ID 游标翻页且不统计总数', async () => {
+      req.user = { userId: fixtures.testUsers.adminUser._id.toString(), role: 'admin' };
+      const afterId = fixtures.bulkInsights[0]._id.toString();
+      req.query = { limit: 500, sort: 'id', afterId };
+
+      const chain = {
+        populate: sandbox.stub().returnsThis(),
+        sort: sandbox.stub().returnsThis(),
+        skip: sandbox.stub().returnsThis(),
+        limit: sandbox.stub().returnsThis(),
+        select: sandbox.stub().resolves([])
+      };
+      InsightStub.find.returns(chain);
+
+      await insightController.getInsights(req, res, next);
+
+      const query = InsightStub.find.firstCall.args[0];
+      expect(query._id).to.deep.equal({ $gt: afterId.toLowerCase() });
+      expect(chain.sort.firstCall.args[0]).to.deep.equal({ _id: 1 });
+      expect(InsightStub.countDocuments.called).to.be.false;
+      expect(res.json.firstCall.args[0].pagination.total).to.be.null;
+    });
+
     it('TC-ADMIN-010: 验证申请响应时间', async () => {
       req.user = { userId: fixtures.testUsers.adminUser._id.toString(), role: 'admin' };
 
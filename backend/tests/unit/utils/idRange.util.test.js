@@ -0,0 +1,48 @@
+/**
+ * ID Range Utils 单元测试
+ */
+
+const { expect } = require('chai');
+const { parseIdRange, idRangeFilter } = require('../../../src/utils/idRange');
+
+describe('ID Range Utils', () => {
+  describe('parseIdRange', () => {
+    it('未指定范围时应该返回 bounded=false', () => {
+      const range = parseIdRange({ page: 1 });
+
+      expect(range).to.deep.equal({ afterId: null, beforeId: null, bounded: false });
+    });
+
+    it('应该解析 afterId / beforeId 并转为小写', () => {
+      const range = parseIdRange({ afterId: '65A000000000000000000000', beforeId: '66a000000000000000000000' });
+
+      expect(range.afterId).to.equal('65a000000000000000000000');
+      expect(range.beforeId).to.equal('66a000000000000000000000');
+      expect(range.bounded).to.be.true;
+    });
+
+    it('应该忽略空字符串', () => {
+      expect(parseIdRange({ afterId: '' }).bounded).to.be.false;
+    });
+
+    it('非 24 位十六进制 ID 应该返回错误', () => {
+      expect(parseIdRange({ afterId: 'abc' })).to.have.property('error');
+      expect(parseIdRange({ beforeId: { $gt: '' } })).to.have.property('error');
+    });
+  });
+
+  describe('idRangeFilter', () => {
+    it('未指定范围时应该返回 null', () => {
+      expect(idRangeFilter(parseIdRange({}))).to.be.null;
+    });
+
+    it('应该转换为开区间的 $gt / $lt 条件', () => {
+      const filter = idRangeFilter(parseIdRange({
+        afterId: '65a000000000000000000000',
+        beforeId: '66a000000000000000000000'
+      }));
+
+      expect(filter).to.deep.equal({ $gt: '65a000000000000000000000', $lt: '66a000000000000000000000' });
+    });
+  });
+});
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+MongoDB 与 MySQL 备份一致性对比（分块哈希，逐层下钻）。
+
+原理：
+  1. 两个库的主键都是 24 位 ObjectId 十六进制字符串，按数值把 ID 空间切成若干块；
+     通过 /backup/{mongodb,mysql}/data 的 sort=id + afterId/beforeId 按范围翻页，两边并行拉取
+  2. 拉取时不保留记录，只把每条记录规范化后的摘要按 ID 顺序累加成子块哈希（Merkle 式）
+  3. 哈希一致的块直接跳过；不一致的子块记录数较多时再细分一层重新计算哈希，
+     足够小时才取回两边记录逐条对比，差异逐行写入 JSONL 报告
+  内存占用只与分页大小、并发数和叶子块大小有关，与表的大小无关。
+
+哈希使用严格的规范化（布尔 → 数字、时间 → 秒、JSON 字符串 → 对象）。逐条对比时沿用后端
+/backup/compare/fields 的宽松规则（±1 秒、历史数据 8 小时时区偏差、DATE 列只比日期），
+所以哈希不同但逐条比较一致的记录只计入 tolerated，不写入报告。
+
+用法：
+  ADMIN_EMAIL=... ADMIN_PASSWORD=... python3 scripts/backup_consistency_diff.py --tables checkins,users
+  python3 scripts/backup_consistency_diff.py --base-url http://localhost:3000 --tables checkins --workers 16
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+BASE_URL = os.getenv("BACKUP_DIFF_BASE_URL", "https://wx.shubai01.com")
+OUTPUT_DIR = "backups/consistency-diff"
+
+# 后端两个数据接口都支持的表
+TABLES = [
+    "users", "admins", "periods", "sections", "checkins", "enrollments",
+    "payments", "insights", "insight_requests", "comments", "notifications",
+]
+
+# 不参与对比的列：id 已用于匹配，updated_at 由 MySQL ON UPDATE 自动更新
+SKIP_COLUMNS = {"id", "_id", "__v", "updated_at"}
+
+ID_SPACE = 1 << 96
+ISO_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}")
+NUMERIC = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+class ApiError(Exception):
+    pass
+
+
+class Client:
+    """带重试的只读 API 客户端，统计请求数与传输字节"""
+
+    def __init__(self, base_url, token=None, timeout=60, retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def call(self, path, method="GET", data=None):
+        url = self.base_url + "/api/v1" + path
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = json.dumps(data).encode() if data is not None else None
+
+        for attempt in range(1, self.retries + 1):
+            req = urllib.request.Request(url, data=body, headers=headers, method=method)
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                    raw = resp.read()
+                break
+            except urllib.error.HTTPError as e:
+                raw = e.read()
+                if e.code < 500 or attempt == self.retries:
+                    raise ApiError(f"{method} {path} → HTTP {e.code}: {raw[:200]!r}") from e
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.retries:
+                    raise ApiError(f"{method} {path} → {e}") from e
+            time.sleep(0.5 * 2 ** (attempt - 1))
+
+        with self.lock:
+            self.requests += 1
+            self.bytes += len(raw)
+        payload = json.loads(raw)
+        if payload.get("code") not in (0, 200):
+            raise ApiError(f"{method} {path} → {payload.get('message') or payload}")
+        return payload.get("data")
+
+
+def login(client):
+    email = os.getenv("ADMIN_EMAIL") or input("  Email: ").strip()
+    password = os.getenv("ADMIN_PASSWORD") or input("  Password: ").strip()
+    data = client.call("/auth/admin/login", method="POST", data={"email": email, "password": password})
+    client.token = data["token"]
+    print(f"✅ 登录成功，角色: {data['admin'].get('role')}")
+
+
+# ---------------------------------------------------------------------------
+# ID 空间与分页
+# ---------------------------------------------------------------------------
+
+def id_hex(value):
+    return f"{value:024x}"
+
+
+def row_key(side, row):
+    return str(row["_id"] if side == "mongodb" else row["id"])
+
+
+def fetch_range(client, side, table, lo, hi, page_size):
+    """按 ID 升序逐页返回 lo <= id < hi 的记录"""
+    after = lo - 1 if lo > 0 else None
+    while True:
+        params = {"table": table, "limit": page_size, "sort": "id"}
+        if after is not None:
+            params["afterId"] = id_hex(after)
+        if hi < ID_SPACE:
+            params["beforeId"] = id_hex(hi)
+        rows = client.call(f"/backup/{side}/data?" + urllib.parse.urlencode(params))["data"]
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = int(row_key(side, rows[-1]), 16)
+
+
+def key_bounds(client, table):
+    """两个库中最小的 ID 与按当前时间估计的上界；上界之后的 ID 由末尾的开放范围覆盖"""
+    first = []
+    for side in ("mongodb", "mysql"):
+        rows = client.call(f"/backup/{side}/data?" + urllib.parse.urlencode(
+            {"table": table, "limit": 1, "sort": "id"}))["data"]
+        if rows:
+            first.append(int(row_key(side, rows[0]), 16))
+    if not first:
+        return None
+    lo = min(first)
+    hi = max(lo + 1, (int(time.time()) + 86400) << 64)
+    return lo, hi
+
+
+def split(lo, hi, parts):
+    bounds = [lo + (hi - lo) * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+# ---------------------------------------------------------------------------
+# 规范化与比较
+# ---------------------------------------------------------------------------
+
+def snake_case(field):
+    return re.sub(r"([A-Z])", r"_\1", field).lower()
+
+
+def normalize_row(side, row):
+    if side == "mongodb":
+        return {snake_case(k): v for k, v in row.items()}
+    return row
+
+
+def parse_datetime(value):
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00").replace(" ", "T", 1))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def canonical(value):
+    """哈希用的严格规范形式"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return repr(float(value))
+    if isinstance(value, (int, float)):
+        return repr(float(value))
+    if isinstance(value, str):
+        if ISO_DATETIME.match(value):
+            parsed = parse_datetime(value)
+            if parsed:
+                return f"@{round(parsed.timestamp())}"
+        if NUMERIC.match(value):
+            return repr(float(value))
+        if value[:1] in "[{":
+            try:
+                return canonical(json.loads(value))
+            except ValueError:
+                return value
+        return value
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def row_digest(key, row, fields):
+    values = [canonical(row.get(field)) for field in fields]
+    return hashlib.sha256(json.dumps([key, values], ensure_ascii=False).encode()).digest()
+
+
+def values_match(mongo_value, mysql_value, tz_offset):
+    """与后端 intelligentCompare 一致的宽松比较（字符串不截断）"""
+    if mongo_value is None and mysql_value is None:
+        return True
+    if canonical(mongo_value) == canonical(mysql_value):
+        return True
+
+    if isinstance(mongo_value, str) and isinstance(mysql_value, str):
+        mongo_date, mysql_date = parse_datetime(mongo_value), parse_datetime(mysql_value)
+        if mongo_date and mysql_date:
+            diff = abs((mongo_date - mysql_date).total_seconds())
+            if diff <= 1 or abs(diff - 8 * 3600) <= 1:
+                return True
+            local = timezone(timedelta(hours=tz_offset))
+            if mongo_date.astimezone(local).date() == mysql_date.astimezone(local).date():
+                return True
+
+    return str(mongo_value if mongo_value is not None else "") == str(mysql_value if mysql_value is not None else "")
+
+
+def choose_fields(client, table, ignore):
+    """两边都有的列；只出现在一边的列（如 MySQL 额外的同步字段）不参与对比"""
+    samples = {}
+    for side in ("mongodb", "mysql"):
+        rows = client.call(f"/backup/{side}/data?" + urllib.parse.urlencode(
+            {"table": table, "limit": 50, "sort": "id"}))["data"]
+        samples[side] = set().union(*(normalize_row(side, row).keys() for row in rows)) if rows else set()
+    common = samples["mongodb"] & samples["mysql"]
+    fields = sorted(common - SKIP_COLUMNS - set(ignore))
+    only = {side: sorted(samples[side] - common - SKIP_COLUMNS) for side in samples}
+    return fields, only
+
+
+# ---------------------------------------------------------------------------
+# 分块哈希与下钻
+# ---------------------------------------------------------------------------
+
+def digest_range(client, side, table, lo, hi, fanout, fields, page_size):
+    """把 [lo, hi) 均分为 fanout 个子块，返回每个子块的 (记录数, 哈希)"""
+    hashes = [hashlib.sha256() for _ in range(fanout)]
+    counts = [0] * fanout
+    width = hi - lo
+    for row in fetch_range(client, side, table, lo, hi, page_size):
+        key = row_key(side, row)
+        index = min(fanout - 1, (int(key, 16) - lo) * fanout // width)
+        hashes[index].update(row_digest(key, normalize_row(side, row), fields))
+        counts[index] += 1
+    return [(counts[i], hashes[i].hexdigest()) for i in range(fanout)]
+
+
+def diff_rows(table, mongo_rows, mysql_rows, fields, tz_offset):
+    """两边都按 ID 升序，归并对比；返回 (差异列表, 宽松规则下一致的记录数)"""
+    diffs = []
+    tolerated = 0
+    mongo_rows = [(row_key("mongodb", r), normalize_row("mongodb", r)) for r in mongo_rows]
+    mysql_rows = [(row_key("mysql", r), r) for r in mysql_rows]
+    i = j = 0
+    while i < len(mongo_rows) or j < len(mysql_rows):
+        mongo_key = mongo_rows[i][0] if i < len(mongo_rows) else None
+        mysql_key = mysql_rows[j][0] if j < len(mysql_rows) else None
+        if mysql_key is None or (mongo_key is not None and mongo_key < mysql_key):
+            diffs.append({"table": table, "id": mongo_key, "kind": "missing_in_mysql"})
+            i += 1
+        elif mongo_key is None or mysql_key < mongo_key:
+            diffs.append({"table": table, "id": mysql_key, "kind": "missing_in_mongodb"})
+            j += 1
+        else:
+            mongo_row, mysql_row = mongo_rows[i][1], mysql_rows[j][1]
+            if [canonical(mongo_row.get(f)) for f in fields] != [canonical(mysql_row.get(f)) for f in fields]:
+                mismatched = {
+                    f: {"mongodb": mongo_row.get(f), "mysql": mysql_row.get(f)}
+                    for f in fields if not values_match(mongo_row.get(f), mysql_row.get(f), tz_offset)
+                }
+                if mismatched:
+                    diffs.append({"table": table, "id": mongo_key, "kind": "field_mismatch", "fields": mismatched})
+                else:
+                    tolerated += 1
+            i += 1
+            j += 1
+    return diffs, tolerated
+
+
+def compare_table(client, pool, table, args, report):
+    started = time.perf_counter()
+    requests_before = client.requests
+    bounds = key_bounds(client, table)
+    stats = {"table": table, "rows": {"mongodb": 0, "mysql": 0}, "levels": [], "leaf_ranges": 0,
+             "missing_in_mysql": 0, "missing_in_mongodb": 0, "field_mismatch": 0, "tolerated": 0}
+    if bounds is None:
+        print(f"  {table}: 两边都没有数据")
+        stats["elapsed_s"] = 0
+        return stats
+
+    fields, only = choose_fields(client, table, args.ignore)
+    print(f"\n▶ {table}: 对比 {len(fields)} 列")
+    for side, columns in only.items():
+        if columns:
+            print(f"    只在 {side} 中出现、不参与对比: {', '.join(columns)}")
+
+    lo, hi = bounds
+    level = split(lo, hi, args.chunks) + [(hi, ID_SPACE)]
+    depth = 0
+    while level:
+        futures = [
+            (rng, pool.submit(digest_range, client, "mongodb", table, *rng, args.fanout, fields, args.page_size),
+             pool.submit(digest_range, client, "mysql", table, *rng, args.fanout, fields, args.page_size))
+            for rng in level
+        ]
+        next_level = []
+        leaves = []
+        differing = 0
+        for (range_lo, range_hi), mongo_future, mysql_future in futures:
+            mongo_children, mysql_children = mongo_future.result(), mysql_future.result()
+            if depth == 0:
+                stats["rows"]["mongodb"] += sum(c for c, _ in mongo_children)
+                stats["rows"]["mysql"] += sum(c for c, _ in mysql_children)
+            children = split(range_lo, range_hi, args.fanout) if range_hi - range_lo >= args.fanout else None
+            for index, (mongo_child, mysql_child) in enumerate(zip(mongo_children, mysql_children)):
+                if mongo_child == mysql_child:
+                    continue
+                differing += 1
+                child = children[index] if children else (range_lo, range_hi)
+                rows = max(mongo_child[0], mysql_child[0])
+                if rows <= args.leaf_rows or not children:
+                    leaves.append(child)
+                else:
+                    next_level.append(child)
+        # 范围窄到不可再分时多个子块会指向同一段，去掉重复
+        leaves = list(dict.fromkeys(leaves))
+
+        stats["levels"].append({"ranges": len(level), "differing_children": differing})
+        print(f"    第 {depth + 1} 层: {len(level)} 个范围，{differing} 个子块哈希不一致"
+              f" → {len(leaves)} 个叶子逐条对比，{len(next_level)} 个继续细分")
+
+        leaf_futures = [
+            (pool.submit(lambda r=rng: list(fetch_range(client, "mongodb", table, *r, args.page_size))),
+             pool.submit(lambda r=rng: list(fetch_range(client, "mysql", table, *r, args.page_size))))
+            for rng in leaves
+        ]
+        for mongo_future, mysql_future in leaf_futures:
+            diffs, tolerated = diff_rows(table, mongo_future.result(), mysql_future.result(), fields, args.tz_offset)
+            stats["tolerated"] += tolerated
+            for diff in diffs:
+                stats[diff["kind"]] += 1
+                report.write(json.dumps(diff, ensure_ascii=False, default=str) + "\n")
+        report.flush()
+        stats["leaf_ranges"] += len(leaves)
+
+        level = next_level
+        depth += 1
+
+    stats["requests"] = client.requests - requests_before
+    stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+    print(f"    MongoDB {stats['rows']['mongodb']} 条 / MySQL {stats['rows']['mysql']} 条 | "
+          f"MySQL 缺失 {stats['missing_in_mysql']} | MongoDB 缺失 {stats['missing_in_mongodb']} | "
+          f"字段不一致 {stats['field_mismatch']} | 宽松一致 {stats['tolerated']} | "
+          f"{stats['requests']} 次请求，{stats['elapsed_s']}s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB 与 MySQL 备份一致性对比（分块哈希）")
+    parser.add_argument("--base-url", default=BASE_URL, help="后端地址（不含 /api/v1）")
+    parser.add_argument("--tables", default="checkins,users", help=f"逗号分隔，可选: {','.join(TABLES)}")
+    parser.add_argument("--chunks", type=int, default=64, help="第一层把 ID 空间切成的块数")
+    parser.add_argument("--fanout", type=int, default=16, help="每个块细分的子块数")
+    parser.add_argument("--leaf-rows", type=int, default=2000, help="子块记录数不超过该值时直接逐条对比")
+    parser.add_argument("--page-size", type=int, default=500, help="每次请求的记录数")
+    parser.add_argument("--workers", type=int, default=8, help="并发请求数")
+    parser.add_argument("--ignore", default="", help="不参与对比的列（snake_case，逗号分隔）")
+    parser.add_argument("--tz-offset", type=float, default=8, help="后端所在时区，用于 DATE 列只比日期")
+    parser.add_argument("--out", help="差异报告 JSONL 路径")
+    args = parser.parse_args()
+    args.ignore = [c for c in args.ignore.split(",") if c]
+
+    tables = [t for t in args.tables.split(",") if t]
+    unknown = [t for t in tables if t not in TABLES]
+    if unknown:
+        parser.error(f"不支持的表: {', '.join(unknown)}")
+
+    out = args.out or os.path.join(OUTPUT_DIR, f"diff_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+
+    client = Client(args.base_url)
+    print("登录管理员...")
+    try:
+        login(client)
+    except (ApiError, KeyError) as e:
+        print(f"登录失败: {e}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    summary = []
+    with open(out, "w", encoding="utf-8") as report, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for table in tables:
+            try:
+                summary.append(compare_table(client, pool, table, args, report))
+            except ApiError as e:
+                print(f"❌ {table} 对比失败: {e}")
+                summary.append({"table": table, "error": str(e)})
+
+    result = {
+        "base_url": args.base_url,
+        "tables": summary,
+        "requests": client.requests,
+        "megabytes": round(client.bytes / 1024 / 1024, 1),
+        "elapsed_s": round(time.perf_counter() - started, 1),
+        "report": out,
+    }
+    with open(out.rsplit(".", 1)[0] + ".summary.json", "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    differences = sum(t.get("missing_in_mysql", 0) + t.get("missing_in_mongodb", 0) + t.get("field_mismatch", 0)
+                      for t in summary)
+    failed = any("error" in t for t in summary)
+    print(f"\n{'✅ 两个库一致' if not differences and not failed else f'⚠️ 共 {differences} 条差异'}"
+          f" | {result['requests']} 次请求，{result['megabytes']} MB，{result['elapsed_s']}s")
+    print(f"差异报告: {out}")
+    sys.exit(0 if not differences and not failed else 1)
+
+
+if __name__ == "__main__":
+    main()
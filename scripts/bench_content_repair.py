@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+课程内容修复脚本（fix_base64_images.py / fix_broken_img_tags.py）的基准测试。
+
+用合成的课程内容（10 KB ~ 20 MB，不同数量的 base64 图片、嵌套 img 标签和残缺 HTML）
+分别测量四个步骤的耗时与峰值内存：
+  extract  提取 base64 图片         extract_base64_images
+  decode   解码全部图片             decode_image
+  rewrite  把图片替换为 URL          replace_images
+  repair   修复嵌套 img 标签         repair_broken_tags
+
+每个步骤先校验输出（图片数、修复数与生成时一致），再计时（取多次运行的中位数），
+最后用 tracemalloc 单独跑一次测峰值内存。结果与 bench_content_repair_baseline.json 比较，
+耗时或内存超出容差时退出码为 1。
+
+用法：
+  python3 scripts/bench_content_repair.py                 # 与基线比较
+  python3 scripts/bench_content_repair.py --max-mb 1      # 只跑 1 MB 以内的用例
+  python3 scripts/bench_content_repair.py --save          # 修改实现并确认无误后更新基线
+"""
+import os
+import sys
+import json
+import time
+import random
+import base64
+import platform
+import argparse
+import statistics
+import tracemalloc
+
+from fix_base64_images import extract_base64_images, decode_image, replace_images
+from fix_broken_img_tags import find_broken_tags, repair_broken_tags
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_content_repair_baseline.json")
+
+# 名称, 目标大小(字符), base64 图片数, 嵌套 img 标签数, 残缺 HTML 片段数
+CASES = [
+    ("tiny_10k", 10 * 1024, 2, 2, 0),
+    ("article_500k", 500 * 1024, 8, 8, 0),
+    ("many_images_2m", 2 * 1024 * 1024, 2000, 200, 0),
+    ("malformed_1m", 1024 * 1024, 4, 4, 6000),
+    ("large_5m", 5 * 1024 * 1024, 40, 40, 100),
+    ("huge_20m", 20 * 1024 * 1024, 100, 100, 1000),
+]
+
+PARAGRAPH = "<p>清晨的阅读让思维更清晰，坚持每天打卡，记录下自己的思考与收获。</p>\n"
+IMAGE_TYPES = ["png", "jpeg", "gif", "webp"]
+# 残缺 HTML 片段都不含 >，连续出现时整段没有一个 >
+MALFORMED = [
+    # 缺少结尾的嵌套标签：旧的 [^>]* 会从每个起点一直扫描到下一个 >
+    '<img src="<img src="https://wx.shubai01.com/uploads/broken.png" style="max-width:100%"',
+    # 未闭合的属性与标签
+    '<p class="note<img src="data:image/png;base64,',
+    '<div<span<img src=<img src="https://',
+    # 很长但不是图片的 base64 串
+    "QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVo=" * 8,
+]
+MALFORMED_RUN = 500
+
+
+def generate_section(size, images, nested, malformed, seed=0):
+    """生成合成课程内容，返回 (内容, 预期信息)"""
+    rng = random.Random(seed)
+    # 图片字节约占一半体积（base64 膨胀 4/3），其余是正文与标签
+    image_bytes = max(16, int(size * 0.5 / max(images, 1) * 3 / 4)) if images else 0
+    blocks = []
+    for i in range(images):
+        kind = IMAGE_TYPES[i % len(IMAGE_TYPES)]
+        payload = base64.b64encode(rng.randbytes(image_bytes)).decode()
+        blocks.append(f'<p><img src="data:image/{kind};base64,{payload}"></p>\n')
+    for i in range(nested):
+        url = f"https://wx.shubai01.com/uploads/section_{seed}_{i}.png"
+        blocks.append(f'<p><img src="<img src="{url}" style="max-width:100%">"></p>\n')
+    for start in range(0, malformed, MALFORMED_RUN):
+        run = range(start, min(malformed, start + MALFORMED_RUN))
+        blocks.append("\n".join(MALFORMED[i % len(MALFORMED)] for i in run) + "\n")
+
+    filler = max(0, size - sum(len(b) for b in blocks))
+    paragraphs = [PARAGRAPH] * (filler // len(PARAGRAPH) + 1)
+    # 图片与标签穿插在正文中
+    step = max(1, len(paragraphs) // (len(blocks) + 1))
+    rng.shuffle(blocks)
+    content = []
+    for index, paragraph in enumerate(paragraphs):
+        content.append(paragraph)
+        if blocks and index % step == 0:
+            content.append(blocks.pop())
+    content.extend(blocks)
+    # 残缺片段中的 data:image/png;base64, 前缀后面紧跟换行，不会被识别为图片
+    return "".join(content), {"images": images, "nested": nested}
+
+
+def check_outputs(content, expected):
+    """校验四个步骤的输出与生成时一致，返回步骤的输入"""
+    matches = extract_base64_images(content)
+    assert len(matches) == expected["images"], f"提取到 {len(matches)} 张图片，预期 {expected['images']}"
+    decoded = [decode_image(m) for m in matches]
+    assert all(data for _, data in decoded), "存在解码为空的图片"
+    urls = [f"https://wx.shubai01.com/uploads/img{i}.png" for i in range(len(matches))]
+    rewritten = replace_images(content, matches, urls)
+    assert not extract_base64_images(rewritten), "替换后仍有 base64 图片"
+    repaired, count = repair_broken_tags(content)
+    assert count == expected["nested"], f"修复 {count} 处嵌套标签，预期 {expected['nested']}"
+    assert not find_broken_tags(repaired), "修复后仍有嵌套标签"
+    return matches, urls
+
+
+def steps(content, matches, urls):
+    return {
+        "extract": lambda: extract_base64_images(content),
+        "decode": lambda: [decode_image(m) for m in matches],
+        "rewrite": lambda: replace_images(content, matches, urls),
+        "repair": lambda: repair_broken_tags(content),
+    }
+
+
+def measure(fn, min_time, max_rounds):
+    """至少运行 3 次且累计 min_time 秒，返回耗时中位数与最小值（ms）"""
+    samples = []
+    total = 0.0
+    while len(samples) < 3 or (total < min_time and len(samples) < max_rounds):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed)
+        total += elapsed
+    return round(statistics.median(samples) * 1000, 3), round(min(samples) * 1000, 3), len(samples)
+
+
+def peak_memory(fn):
+    """单次运行新增的峰值内存（MB），不含输入本身"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return round((peak - base) / 1024 / 1024, 3)
+
+
+def run(args):
+    results = {}
+    for name, size, images, nested, malformed in CASES:
+        if size > args.max_mb * 1024 * 1024 or (args.case and name not in args.case):
+            continue
+        content, expected = generate_section(size, images, nested, malformed)
+        matches, urls = check_outputs(content, expected)
+        print(f"\n▶ {name}: {len(content) / 1024 / 1024:.2f} MB，{images} 张图片，{nested} 处嵌套标签，"
+              f"{malformed} 段残缺 HTML")
+        results[name] = {}
+        for step, fn in steps(content, matches, urls).items():
+            median_ms, min_ms, rounds = measure(fn, args.min_time, args.max_rounds)
+            memory_mb = peak_memory(fn)
+            results[name][step] = {"median_ms": median_ms, "min_ms": min_ms, "peak_mb": memory_mb}
+            throughput = len(content) / 1024 / 1024 / (median_ms / 1000) if median_ms else float("inf")
+            print(f"    {step:<8} 中位数 {median_ms:>10.3f}ms | 最小 {min_ms:>10.3f}ms | "
+                  f"{throughput:>9.1f} MB/s | 峰值内存 {memory_mb:>8.3f}MB | {rounds} 次")
+    return results
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    """返回超出容差的项；很小的绝对差（< 2ms / < 1MB）视为噪声"""
+    regressions = []
+    for name, case in results.items():
+        for step, current in case.items():
+            previous = baseline.get("results", {}).get(name, {}).get(step)
+            if not previous:
+                continue
+            if (current["median_ms"] > previous["median_ms"] * time_tolerance
+                    and current["median_ms"] - previous["median_ms"] > 2):
+                regressions.append(f"{name}.{step} 耗时 {previous['median_ms']}ms → {current['median_ms']}ms")
+            if (current["peak_mb"] > previous["peak_mb"] * memory_tolerance
+                    and current["peak_mb"] - previous["peak_mb"] > 1):
+                regressions.append(f"{name}.{step} 峰值内存 {previous['peak_mb']}MB → {current['peak_mb']}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="课程内容修复脚本的基准测试")
+    parser.add_argument("--case", action="append", help="只运行指定用例，可重复")
+    parser.add_argument("--max-mb", type=float, default=20, help="跳过超过该大小的用例")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每个步骤至少累计运行的秒数")
+    parser.add_argument("--max-rounds", type=int, default=50, help="每个步骤最多运行次数")
+    parser.add_argument("--time-tolerance", type=float, default=1.5, help="耗时超过基线的倍数视为退化")
+    parser.add_argument("--memory-tolerance", type=float, default=1.25, help="峰值内存超过基线的倍数视为退化")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线文件")
+    parser.add_argument("--save", action="store_true", help="把本次结果保存为基线")
+    args = parser.parse_args()
+
+    machine = {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()}
+    results = run(args)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine, "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 基线已保存: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ 没有基线文件 {args.baseline}，可用 --save 生成")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != machine:
+        print(f"\n⚠️ 基线来自不同环境（{baseline.get('machine')}），耗时对比仅供参考")
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\n❌ 与基线相比出现退化:")
+        for item in regressions:
+            print(f"    {item}")
+        return 1
+    print("\n✅ 与基线相比没有退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,7 @@
 # 5. scp 上传到服务器
 # 6. SSH 到服务器：解压、覆盖、npm install、pm2 reload、nginx reload
 # 7. 本地清理临时文件
+# 8. 预热热点接口（设置 WARMUP_TENANT_SLUG 时执行，见 scripts/warm_cache.py）
 ################################################################################
 
 # 注意：不使用 set -e，允许脚本继续执行以显示所有步骤
@@ -532,6 +533,27 @@ verify_deployment() {
   fi
 }
 
+warm_up_caches() {
+  log_section "预热热点接口"
+
+  if ! command -v python3 >/dev/null 2>&1; then
+    log_warning "未找到 python3，跳过预热"
+    return
+  fi
+
+  # 需要租户标识才能按用户视角访问公开接口，未配置时跳过（不影响部署结果）
+  if [ -z "$WARMUP_TENANT_SLUG" ] && [ -z "$WARMUP_WX_APPID" ]; then
+    log_info "未设置 WARMUP_TENANT_SLUG / WARMUP_WX_APPID，跳过预热"
+    return
+  fi
+
+  if python3 "$PROJECT_ROOT/scripts/warm_cache.py"; then
+    log_success "热点接口已预热"
+  else
+    log_warning "预热未达标，请查看上面的耗时与失败请求"
+  fi
+}
+
 ################################################################################
 # 主函数
 ################################################################################
@@ -551,6 +573,7 @@ main() {
   upload_to_server
   deploy_on_server
   verify_deployment
+  warm_up_caches
 
   log_header "部署成功！ 🎉"
 
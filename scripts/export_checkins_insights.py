@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+批量导出打卡与小凡看见数据到 exports/，供离线分析使用。
+
+原理：
+  1. 按 ObjectId 数值把 ID 空间切成若干分片，多个分片并行拉取
+     （GET /admin/checkins、GET /insights 的 sort=id + afterId/beforeId 游标翻页，不做 skip、不统计总数）
+  2. 每个分片写自己的分片文件，每页写完立即落盘，内存只保留当前页
+  3. 每个分片的游标（已落盘的最后一个 ID）记录在 _state.json 中，
+     中断后重新运行同一命令会从游标继续，已写入的数据不会重复
+
+输出格式：
+  - jsonl（默认）：part-NN.jsonl.gz，每页一个 gzip member，zcat / pandas.read_json(lines=True) 可直接读取
+  - parquet：part-NN-SSSS.parquet，需要 pip install pyarrow；每 --rows-per-file 行写一个文件
+  两种格式的列相同：关联的用户、期次、课节展开为 *_id 与名称列，数组列为 JSON
+
+用法：
+  ADMIN_EMAIL=... ADMIN_PASSWORD=... python3 scripts/export_checkins_insights.py --dataset checkins --period-id <期次ID>
+  python3 scripts/export_checkins_insights.py --dataset all --format parquet --workers 16
+  python3 scripts/export_checkins_insights.py --dataset insights --restart     # 丢弃之前的进度重新导出
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+BASE_URL = os.getenv("EXPORT_BASE_URL", "https://wx.shubai01.com")
+OUTPUT_DIR = "exports"
+ID_SPACE = 1 << 96
+
+# 列定义：(列名, 字段路径, 类型)；ref 类型既可能是 ID 字符串，也可能是 populate 后的对象
+DATASETS = {
+    "checkins": {
+        "path": "/admin/checkins",
+        "columns": [
+            ("id", "_id", "string"),
+            ("user_id", "userId", "ref"),
+            ("user_nickname", "userId.nickname", "string"),
+            ("period_id", "periodId", "ref"),
+            ("period_name", "periodId.name", "string"),
+            ("section_id", "sectionId", "ref"),
+            ("section_title", "sectionId.title", "string"),
+            ("day", "day", "int"),
+            ("checkin_date", "checkinDate", "timestamp"),
+            ("reading_time", "readingTime", "int"),
+            ("completion_rate", "completionRate", "double"),
+            ("note", "note", "string"),
+            ("content_html", "contentHtml", "string"),
+            ("images", "images", "json"),
+            ("mood", "mood", "string"),
+            ("points", "points", "int"),
+            ("is_public", "isPublic", "bool"),
+            ("is_featured", "isFeatured", "bool"),
+            ("like_count", "likeCount", "int"),
+            ("created_at", "createdAt", "timestamp"),
+            ("updated_at", "updatedAt", "timestamp"),
+        ],
+    },
+    "insights": {
+        "path": "/insights",
+        "columns": [
+            ("id", "_id", "string"),
+            ("user_id", "userId", "ref"),
+            ("user_nickname", "userId.nickname", "string"),
+            ("target_user_id", "targetUserId", "ref"),
+            ("target_user_nickname", "targetUserId.nickname", "string"),
+            ("checkin_id", "checkinId", "ref"),
+            ("period_id", "periodId", "ref"),
+            ("period_name", "periodName", "string"),
+            ("section_id", "sectionId", "ref"),
+            ("section_title", "sectionId.title", "string"),
+            ("day", "day", "int"),
+            ("type", "type", "string"),
+            ("media_type", "mediaType", "string"),
+            ("title", "title", "string"),
+            ("content", "content", "string"),
+            ("image_url", "imageUrl", "string"),
+            ("summary", "summary", "string"),
+            ("tags", "tags", "json"),
+            ("status", "status", "string"),
+            ("source", "source", "string"),
+            ("is_published", "isPublished", "bool"),
+            ("like_count", "likeCount", "int"),
+            ("share_count", "shareCount", "int"),
+            ("created_at", "createdAt", "timestamp"),
+            ("updated_at", "updatedAt", "timestamp"),
+        ],
+    },
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+class Client:
+    """带重试的 API 客户端"""
+
+    def __init__(self, base_url, token=None, timeout=60, retries=4):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.retries = retries
+
+    def call(self, path, method="GET", data=None):
+        url = self.base_url + "/api/v1" + path
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = json.dumps(data).encode() if data is not None else None
+
+        for attempt in range(1, self.retries + 1):
+            req = urllib.request.Request(url, data=body, headers=headers, method=method)
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                    payload = json.loads(resp.read())
+                break
+            except urllib.error.HTTPError as e:
+                if e.code < 500 or attempt == self.retries:
+                    raise ApiError(f"{method} {path} → HTTP {e.code}: {e.read()[:200]!r}") from e
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == self.retries:
+                    raise ApiError(f"{method} {path} → {e}") from e
+            time.sleep(0.5 * 2 ** (attempt - 1))
+
+        if payload.get("code") not in (0, 200):
+            raise ApiError(f"{method} {path} → {payload.get('message') or payload}")
+        return payload.get("data")
+
+
+def login(client):
+    email = os.getenv("ADMIN_EMAIL") or input("  Email: ").strip()
+    password = os.getenv("ADMIN_PASSWORD") or input("  Password: ").strip()
+    data = client.call("/auth/admin/login", method="POST", data={"email": email, "password": password})
+    client.token = data["token"]
+    print(f"✅ 登录成功，角色: {data['admin'].get('role')}")
+
+
+def page_rows(data):
+    """/admin/checkins 返回 {list}，/insights 直接返回数组"""
+    return data.get("list", []) if isinstance(data, dict) else (data or [])
+
+
+def fetch_page(client, dataset, period_id, page_size, after=None, before=None):
+    params = {"limit": page_size, "sort": "id"}
+    if period_id:
+        params["periodId"] = period_id
+    if after is not None:
+        params["afterId"] = f"{after:024x}"
+    if before is not None and before < ID_SPACE:
+        params["beforeId"] = f"{before:024x}"
+    return page_rows(client.call(DATASETS[dataset]["path"] + "?" + urllib.parse.urlencode(params)))
+
+
+# ---------------------------------------------------------------------------
+# 记录展开
+# ---------------------------------------------------------------------------
+
+def lookup(record, path):
+    value = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def flatten(record, columns):
+    row = {}
+    for name, path, kind in columns:
+        value = lookup(record, path)
+        if kind == "ref" and isinstance(value, dict):
+            value = value.get("_id")
+        elif kind == "json" and value is not None:
+            value = json.dumps(value, ensure_ascii=False)
+        row[name] = value
+    return row
+
+
+# ---------------------------------------------------------------------------
+# 分片文件
+# ---------------------------------------------------------------------------
+
+class JsonlPart:
+    """每页追加一个 gzip member；恢复时截断到上次提交的长度，丢弃写了一半的页"""
+
+    def __init__(self, directory, shard):
+        self.path = os.path.join(directory, f"part-{shard['index']:02d}.jsonl.gz")
+        committed = shard.get("bytes", 0)
+        if os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(committed)
+
+    def write(self, rows):
+        """写入并落盘，返回 True 表示这些行已经可以提交游标"""
+        with open(self.path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                for row in rows:
+                    f.write((json.dumps(row, ensure_ascii=False, default=str) + "\n").encode())
+            raw.flush()
+            os.fsync(raw.fileno())
+        return True
+
+    def close(self):
+        return True
+
+    def state(self):
+        return {"bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+
+class ParquetPart:
+    """缓冲到 rows_per_file 行写一个文件；只有写完的文件才提交游标，恢复时删掉未提交的文件"""
+
+    def __init__(self, directory, shard, columns, rows_per_file):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.directory = directory
+        self.index = shard["index"]
+        self.files = list(shard.get("files", []))
+        self.rows_per_file = rows_per_file
+        self.buffer = []
+        types = {"string": pa.string(), "ref": pa.string(), "json": pa.string(), "int": pa.int64(),
+                 "double": pa.float64(), "bool": pa.bool_(), "timestamp": pa.timestamp("ms", tz="UTC")}
+        self.columns = columns
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+
+        prefix = f"part-{self.index:02d}-"
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".parquet") and name not in self.files:
+                os.remove(os.path.join(directory, name))
+
+    def convert(self, kind, value):
+        if value is None:
+            return None
+        if kind == "timestamp":
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if kind == "int":
+            return int(value)
+        if kind == "double":
+            return float(value)
+        if kind == "bool":
+            return bool(value)
+        return str(value)
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) < self.rows_per_file:
+            return False
+        self.flush()
+        return True
+
+    def flush(self):
+        if not self.buffer:
+            return
+        name = f"part-{self.index:02d}-{len(self.files):04d}.parquet"
+        arrays = {col: [self.convert(kind, row[col]) for row in self.buffer] for col, _, kind in self.columns}
+        table = self.pa.Table.from_pydict(arrays, schema=self.schema)
+        tmp = os.path.join(self.directory, name + ".tmp")
+        self.pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, os.path.join(self.directory, name))
+        self.files.append(name)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        return True
+
+    def state(self):
+        return {"files": list(self.files)}
+
+
+# ---------------------------------------------------------------------------
+# 导出进度
+# ---------------------------------------------------------------------------
+
+class ExportState:
+    """_state.json：分片边界与每个分片已提交的游标，原子写入"""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, "_state.json")
+        self.lock = threading.Lock()
+        self.data = None
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        return self.data
+
+    def save(self):
+        with self.lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def commit(self, shard, **changes):
+        with self.lock:
+            shard.update(changes)
+        self.save()
+
+
+def plan_shards(client, dataset, period_id, shard_count):
+    """从最小 ID 到按当前时间估计的上界均分，上界之后的 ID 由最后一个开放分片覆盖"""
+    first = fetch_page(client, dataset, period_id, 1)
+    if not first:
+        return []
+    lo = int(first[0]["_id"], 16)
+    hi = max(lo + 1, (int(time.time()) + 86400) << 64)
+    bounds = [lo + (hi - lo) * i // shard_count for i in range(shard_count + 1)]
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(shard_count) if bounds[i] < bounds[i + 1]]
+    ranges.append((hi, ID_SPACE))
+    return [
+        {"index": i, "lo": f"{a:024x}", "hi": None if b >= ID_SPACE else f"{b:024x}",
+         "cursor": None, "rows": 0, "done": False}
+        for i, (a, b) in enumerate(ranges)
+    ]
+
+
+def export_shard(client, state, shard, args, dataset, directory, counter):
+    columns = DATASETS[dataset]["columns"]
+    part = (ParquetPart(directory, shard, columns, args.rows_per_file) if args.format == "parquet"
+            else JsonlPart(directory, shard))
+    lo = int(shard["lo"], 16)
+    hi = int(shard["hi"], 16) if shard["hi"] else ID_SPACE
+    # 游标是已落盘的最后一个 ID；还没有游标时从 lo 开始（afterId 为开区间，所以用 lo - 1）
+    after = int(shard["cursor"], 16) if shard["cursor"] else lo - 1
+    committed_rows = shard["rows"]
+    pending = 0
+
+    while True:
+        records = fetch_page(client, dataset, args.period_id, args.page_size, after=after, before=hi)
+        if records:
+            after = int(records[-1]["_id"], 16)
+            pending += len(records)
+            counter.add(len(records))
+            if part.write([flatten(r, columns) for r in records]):
+                committed_rows += pending
+                pending = 0
+                state.commit(shard, cursor=f"{after:024x}", rows=committed_rows, **part.state())
+        if len(records) < args.page_size:
+            break
+
+    part.close()
+    state.commit(shard, cursor=f"{after:024x}" if after >= lo else None, rows=committed_rows + pending,
+                 done=True, **part.state())
+    return shard
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def add(self, n):
+        with self.lock:
+            self.value += n
+
+
+def export_dataset(client, dataset, args):
+    directory = args.out_dir or os.path.join(
+        OUTPUT_DIR, f"{dataset}_{args.period_id}" if args.period_id else dataset)
+    if args.restart and os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+
+    state = ExportState(directory)
+    previous = state.load()
+    if previous and (previous["format"] != args.format or previous.get("period_id") != args.period_id):
+        raise SystemExit(f"❌ {directory} 中已有 {previous['format']} 格式、期次 {previous.get('period_id') or '全部'} "
+                         f"的导出进度，请加 --restart 或换 --out-dir")
+    if previous:
+        done = sum(1 for s in previous["shards"] if s["done"])
+        print(f"\n▶ {dataset}: 从上次进度继续（{done}/{len(previous['shards'])} 个分片已完成，"
+              f"已导出 {sum(s['rows'] for s in previous['shards'])} 行）")
+    else:
+        state.data = {
+            "dataset": dataset,
+            "format": args.format,
+            "period_id": args.period_id,
+            "base_url": args.base_url,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "shards": plan_shards(client, dataset, args.period_id, args.shards),
+        }
+        state.save()
+        print(f"\n▶ {dataset}: {len(state.data['shards'])} 个分片，并发 {args.workers}，每页 {args.page_size} 行")
+
+    started = time.perf_counter()
+    counter = Counter()
+    todo = [s for s in state.data["shards"] if not s["done"]]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(export_shard, client, state, s, args, dataset, directory, counter) for s in todo}
+        while futures:
+            finished, futures = wait(futures, timeout=5, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()
+            elapsed = time.perf_counter() - started
+            remaining = len(futures)
+            print(f"    {counter.value} 行 | {counter.value / elapsed if elapsed else 0:.0f} 行/s | "
+                  f"剩余 {remaining} 个分片")
+
+    total_rows = sum(s["rows"] for s in state.data["shards"])
+    state.data["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    state.data["rows"] = total_rows
+    state.save()
+    size = sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory) if n.startswith("part-"))
+    print(f"✅ {dataset}: 共 {total_rows} 行，{size / 1024 / 1024:.1f} MB，"
+          f"本次 {counter.value} 行，用时 {time.perf_counter() - started:.1f}s → {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导出打卡与小凡看见数据")
+    parser.add_argument("--base-url", default=BASE_URL, help="后端地址（不含 /api/v1）")
+    parser.add_argument("--dataset", choices=["checkins", "insights", "all"], default="all")
+    parser.add_argument("--period-id", default="", help="只导出某个期次")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--shards", type=int, default=32, help="ID 空间切分的分片数")
+    parser.add_argument("--workers", type=int, default=8, help="同时拉取的分片数")
+    parser.add_argument("--page-size", type=int, default=500, help="每次请求的记录数")
+    parser.add_argument("--rows-per-file", type=int, default=50000, help="parquet 每个文件的行数")
+    parser.add_argument("--out-dir", help="输出目录，默认 exports/<dataset>[_<期次ID>]")
+    parser.add_argument("--restart", action="store_true", help="丢弃已有进度重新导出")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("parquet 格式需要 pyarrow：pip install pyarrow")
+    datasets = ["checkins", "insights"] if args.dataset == "all" else [args.dataset]
+    if args.out_dir and len(datasets) > 1:
+        parser.error("--out-dir 只能与单个 --dataset 一起使用")
+
+    client = Client(args.base_url)
+    print("登录管理员...")
+    try:
+        login(client)
+    except (ApiError, KeyError) as e:
+        print(f"登录失败: {e}")
+        sys.exit(1)
+
+    for dataset in datasets:
+        try:
+            export_dataset(client, dataset, args)
+        except ApiError as e:
+            print(f"❌ {dataset} 导出中断: {e}\n   重新运行同一命令即可从中断处继续")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
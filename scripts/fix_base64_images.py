@@ -15,6 +15,32 @@ import urllib.parse
 BASE_URL = "https://wx.shubai01.com"
 SECTION_ID = "69f9bf45cb1c9ac0600ad55c"  # 第二天 思维方式的力量
 
+BASE64_IMAGE_PATTERN = re.compile(r'data:image/([^;]+);base64,([A-Za-z0-9+/=]+)')
+
+
+def extract_base64_images(content):
+    """按出现顺序返回内容中所有 base64 内联图片的匹配"""
+    return list(BASE64_IMAGE_PATTERN.finditer(content))
+
+
+def decode_image(match):
+    """返回 (图片类型, 图片字节)"""
+    return match.group(1), base64.b64decode(match.group(2))
+
+
+def replace_images(content, matches, urls):
+    """按匹配位置一次拼接出新内容；urls 中为 None 的图片保持原样"""
+    parts = []
+    last = 0
+    for match, url in zip(matches, urls):
+        if url is None:
+            continue
+        parts.append(content[last:match.start()])
+        parts.append(f"<img src=\"{url}\" style=\"max-width:100%\">")
+        last = match.end()
+    parts.append(content[last:])
+    return "".join(parts)
+
 
 def api(path, method="GET", data=None, token=None, files=None):
     url = BASE_URL + "/api/v1" + path
@@ -87,19 +113,16 @@ def main():
     print(f"  原始内容长度: {len(content):,} 字符")
 
     # 3. 提取并替换 base64 图片
-    pattern = re.compile(r'data:image/([^;]+);base64,([A-Za-z0-9+/=]+)')
-    matches = list(pattern.finditer(content))
+    matches = extract_base64_images(content)
     print(f"  发现 base64 图片: {len(matches)} 张")
 
     if not matches:
         print("没有 base64 图片，无需修复。")
         sys.exit(0)
 
-    new_content = content
+    urls = []
     for i, match in enumerate(matches):
-        img_type = match.group(1)  # e.g. "png"
-        b64_data = match.group(2)
-        img_bytes = base64.b64decode(b64_data)
+        img_type, img_bytes = decode_image(match)  # e.g. "png"
         size_kb = len(img_bytes) // 1024
         print(f"\n  处理图片 {i+1}/{len(matches)}: type={img_type}, size={size_kb} KB")
 
@@ -114,18 +137,16 @@ def main():
         )
         if not upload_resp or "data" not in upload_resp:
             print(f"    ❌ 上传失败: {upload_resp}")
+            urls.append(None)
             continue
 
         file_url = upload_resp["data"].get("url") or upload_resp["data"].get("fileUrl")
         full_url = BASE_URL + file_url
         print(f"    ✅ 上传成功: {full_url}")
+        urls.append(full_url)
 
-        # 5. 替换 base64 为 URL（只替换这一处匹配）
-        new_content = new_content.replace(
-            match.group(0),
-            f"<img src=\"{full_url}\" style=\"max-width:100%\">",
-            1
-        )
+    # 5. 替换 base64 为 URL（上传失败的图片保持原样）
+    new_content = replace_images(content, matches, urls)
 
     print(f"\n  新内容长度: {len(new_content):,} 字符（减少 {(len(content)-len(new_content))//1024} KB）")
 
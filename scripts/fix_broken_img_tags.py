@@ -29,11 +29,23 @@ ALL_SECTION_IDS = {
     "day21": "69f9bf45cb1c9ac0600ad56f",
 }
 
+# 属性部分用 [^<>]* 而不是 [^>]*：遇到缺少结尾的残缺标签时在下一个 < 处停止，
+# 避免每个起点都扫描到文末（大段残缺 HTML 下会退化成平方复杂度）
 BROKEN_PATTERN = re.compile(
-    r'<img\s+src="<img\s+src="(https://[^"]+)"[^>]*>">'
+    r'<img\s+src="<img\s+src="(https://[^"]+)"[^<>]*>">'
 )
 
 
+def find_broken_tags(content):
+    """返回所有嵌套 img 标签中的图片 URL"""
+    return BROKEN_PATTERN.findall(content)
+
+
+def repair_broken_tags(content):
+    """返回 (修复后的内容, 替换次数)"""
+    return BROKEN_PATTERN.subn(r'<img src="\1" style="max-width:100%">', content)
+
+
 def api(path, method="GET", data=None, token=None):
     url = BASE_URL + "/api/v1" + path
     headers = {"Content-Type": "application/json"}
@@ -64,7 +76,7 @@ def fix_section(section_id, label, token):
         return False
 
     content = resp["data"].get("content", "")
-    matches = BROKEN_PATTERN.findall(content)
+    matches = find_broken_tags(content)
     if not matches:
         print(f"  无嵌套 img 标签，跳过")
         return True
@@ -73,10 +85,10 @@ def fix_section(section_id, label, token):
     for url in matches:
         print(f"    URL: {url}")
 
-    fixed = BROKEN_PATTERN.sub(r'<img src="\1" style="max-width:100%">', content)
+    fixed, _ = repair_broken_tags(content)
 
     # 确认替换正确
-    remaining = BROKEN_PATTERN.findall(fixed)
+    remaining = find_broken_tags(fixed)
     if remaining:
         print(f"  警告：还有 {len(remaining)} 处未修复，跳过更新")
         return False
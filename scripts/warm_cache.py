@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+发布后预热热点读接口，避免早高峰第一批用户承担冷启动（MongoDB 工作集、连接池、V8 JIT、Redis 缓存）的延迟。
+
+预热内容：
+  - GET /periods（默认列表与 status=active）
+  - 每个进行中/即将开始期次的 GET /periods/:id 与 GET /periods/:id/sections
+  - 今天及之后若干天对应课节的 GET /sections/:id
+  - 排行榜与统计：GET /ranking/period/:id、/stats/checkin、/sections/today/task（需要用户 token），
+    GET /stats/dashboard（需要管理员账号）
+
+所有请求并发发出并限速，整套请求跑若干轮：第一轮是冷启动耗时，最后一轮用来确认已经热起来。
+最后一轮 P95 超过阈值或有请求失败时退出码为 1。
+
+用法：
+  WARMUP_TENANT_SLUG=default python3 scripts/warm_cache.py
+  WARMUP_TENANT_SLUG=default WARMUP_USER_TOKEN=... ADMIN_EMAIL=... ADMIN_PASSWORD=... \\
+      python3 scripts/warm_cache.py --base-url http://localhost:3000 --rounds 3 --rate 30
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+BASE_URL = os.getenv("WARMUP_BASE_URL", "https://wx.shubai01.com")
+OUTPUT_DIR = os.getenv("WARMUP_OUTPUT_DIR", "/tmp/morning-reading-warmup")
+
+# 课节按上海时区的自然日推进，与后端 getTodayTask 一致
+SHANGHAI = timezone(timedelta(hours=8))
+
+
+class RateLimiter:
+    """全局限速：相邻两次请求至少间隔 1/rate 秒"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Client:
+    def __init__(self, base_url, tenant_slug="", wx_app_id="", timeout=15, limiter=None):
+        self.base_url = base_url.rstrip("/")
+        self.tenant_slug = tenant_slug
+        self.wx_app_id = wx_app_id
+        self.timeout = timeout
+        self.limiter = limiter
+
+    def request(self, path, token=None, method="GET", data=None):
+        """返回 (HTTP 状态码, 响应 data, 耗时 ms, X-Cache 头)"""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if self.tenant_slug:
+            headers["X-Tenant-Slug"] = self.tenant_slug
+        if self.wx_app_id:
+            headers["X-Wx-AppId"] = self.wx_app_id
+        body = json.dumps(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + "/api/v1" + path, data=body, headers=headers, method=method)
+
+        if self.limiter:
+            self.limiter.wait()
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, raw, cache = resp.status, resp.read(), resp.headers.get("X-Cache")
+        except urllib.error.HTTPError as e:
+            status, raw, cache = e.code, e.read(), e.headers.get("X-Cache")
+        except (urllib.error.URLError, OSError) as e:
+            return None, str(e), round((time.perf_counter() - started) * 1000, 1), None
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return status, None, elapsed, cache
+        if status == 200 and payload.get("code") not in (0, 200):
+            status = payload.get("code")
+        return status, payload.get("data"), elapsed, cache
+
+
+def admin_login(client):
+    email, password = os.getenv("ADMIN_EMAIL"), os.getenv("ADMIN_PASSWORD")
+    if not email or not password:
+        return None
+    status, data, _, _ = client.request("/auth/admin/login", method="POST", data={"email": email, "password": password})
+    if status != 200 or not data:
+        print(f"⚠️ 管理员登录失败 (HTTP {status})，跳过管理端统计")
+        return None
+    return data["token"]
+
+
+def as_list(data):
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("list") or data.get("sections") or data.get("items") or []
+    return []
+
+
+def shanghai_date(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(SHANGHAI).date()
+
+
+def build_targets(client, args, admin_token, user_token):
+    """枚举期次与课节，返回 (分组, 路径, token) 列表"""
+    # 有租户请求头时按用户视角访问公开接口；否则只能用管理员视角
+    read_token = None if (client.tenant_slug or client.wx_app_id) else admin_token
+    status, periods, _, _ = client.request("/periods?limit=50", token=read_token)
+    if status != 200:
+        raise SystemExit(f"❌ 获取期次列表失败 (HTTP {status})，请检查 --tenant-slug / --wx-appid")
+
+    today = datetime.now(SHANGHAI).date()
+    horizon = today + timedelta(days=args.days_ahead)
+    active = []
+    for period in as_list(periods):
+        if not period.get("startDate") or not period.get("endDate"):
+            continue
+        start, end = shanghai_date(period["startDate"]), shanghai_date(period["endDate"])
+        if start <= horizon and end >= today:
+            active.append((period, start))
+    print(f"📚 {len(as_list(periods))} 个期次，其中 {len(active)} 个在今天到 {horizon} 之间进行")
+
+    targets = [
+        ("periods.list", "/periods?limit=50", read_token),
+        ("periods.list", "/periods?status=active", read_token),
+    ]
+    if user_token:
+        targets.append(("sections.today", "/sections/today/task", user_token))
+        targets.append(("stats.checkin", "/stats/checkin", user_token))
+    if admin_token:
+        targets.append(("stats.dashboard", "/stats/dashboard", admin_token))
+
+    for period, start in active:
+        period_id = period["_id"]
+        targets.append(("periods.detail", f"/periods/{period_id}", read_token))
+        targets.append(("periods.sections", f"/periods/{period_id}/sections", read_token))
+        if user_token:
+            for time_range in ("all", "today", "thisWeek"):
+                targets.append(("ranking.period", f"/ranking/period/{period_id}?timeRange={time_range}", user_token))
+
+        status, sections, _, _ = client.request(f"/periods/{period_id}/sections", token=read_token)
+        first_day = (today - start).days
+        days = set(range(first_day, first_day + args.days_ahead + 1))
+        for section in as_list(sections) if status == 200 else []:
+            if section.get("day") in days:
+                targets.append(("sections.detail", f"/sections/{section['_id']}", user_token or read_token))
+
+    return targets
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else None
+
+
+def run_round(client, pool, targets):
+    futures = [(group, path, pool.submit(client.request, path, token)) for group, path, token in targets]
+    results = []
+    for group, path, future in futures:
+        status, _, elapsed, cache = future.result()
+        results.append({"group": group, "path": path, "status": status, "ms": elapsed, "cache": cache})
+    return results
+
+
+def summarize(results):
+    groups = {}
+    for result in results:
+        groups.setdefault(result["group"], []).append(result)
+    summary = {}
+    for group, items in groups.items():
+        latencies = [r["ms"] for r in items]
+        summary[group] = {
+            "requests": len(items),
+            "failed": sum(1 for r in items if r["status"] != 200),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "max_ms": max(latencies),
+            "cache_hits": sum(1 for r in items if r["cache"] == "HIT"),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发布后预热热点读接口")
+    parser.add_argument("--base-url", default=BASE_URL, help="后端地址（不含 /api/v1）")
+    parser.add_argument("--tenant-slug", default=os.getenv("WARMUP_TENANT_SLUG", ""), help="X-Tenant-Slug 请求头")
+    parser.add_argument("--wx-appid", default=os.getenv("WARMUP_WX_APPID", ""), help="X-Wx-AppId 请求头")
+    parser.add_argument("--days-ahead", type=int, default=2, help="除今天外再预热之后几天的课节")
+    parser.add_argument("--rounds", type=int, default=2, help="整套请求重复的轮数")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数")
+    parser.add_argument("--rate", type=float, default=20, help="每秒最多请求数，0 表示不限")
+    parser.add_argument("--hot-ms", type=float, default=300, help="最后一轮 P95 不超过该值视为已预热")
+    parser.add_argument("--out", help="报告 JSON 路径")
+    args = parser.parse_args()
+
+    client = Client(args.base_url, args.tenant_slug, args.wx_appid, limiter=RateLimiter(args.rate))
+    admin_token = admin_login(client)
+    user_token = os.getenv("WARMUP_USER_TOKEN")
+    if not (args.tenant_slug or args.wx_appid or admin_token):
+        parser.error("需要 --tenant-slug / --wx-appid，或通过 ADMIN_EMAIL / ADMIN_PASSWORD 提供管理员账号")
+    if not user_token:
+        print("ℹ️ 未设置 WARMUP_USER_TOKEN，跳过排行榜、今日任务和个人打卡统计")
+
+    started = time.perf_counter()
+    targets = build_targets(client, args, admin_token, user_token)
+    print(f"🔥 {len(targets)} 个请求 × {args.rounds} 轮，并发 {args.concurrency}，限速 {args.rate or '不限'}/s")
+
+    rounds = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for index in range(1, args.rounds + 1):
+            round_started = time.perf_counter()
+            results = run_round(client, pool, targets)
+            summary = summarize(results)
+            rounds.append({
+                "round": index,
+                "elapsed_s": round(time.perf_counter() - round_started, 2),
+                "groups": summary,
+                "failures": [r for r in results if r["status"] != 200],
+            })
+            print(f"\n第 {index} 轮（{rounds[-1]['elapsed_s']}s）")
+            for group, stats in sorted(summary.items()):
+                print(f"  {group:<18} {stats['requests']:>3} 次 | P50 {stats['p50_ms']:>7}ms | "
+                      f"P95 {stats['p95_ms']:>7}ms | 最大 {stats['max_ms']:>7}ms | "
+                      f"失败 {stats['failed']} | 缓存命中 {stats['cache_hits']}")
+
+    last = rounds[-1]
+    slow = {group: stats["p95_ms"] for group, stats in last["groups"].items() if stats["p95_ms"] > args.hot_ms}
+    failures = last["failures"]
+    report = {
+        "base_url": args.base_url,
+        "started_at": datetime.now(SHANGHAI).isoformat(timespec="seconds"),
+        "targets": len(targets),
+        "hot_ms": args.hot_ms,
+        "rounds": rounds,
+        "hot": not slow and not failures,
+        "elapsed_s": round(time.perf_counter() - started, 1),
+    }
+    out = args.out or os.path.join(OUTPUT_DIR, f"warmup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for failure in failures[:10]:
+        print(f"❌ {failure['path']} → {failure['status']}")
+    if slow:
+        print(f"⚠️ 最后一轮 P95 超过 {args.hot_ms:.0f}ms: " + ", ".join(f"{g} {ms}ms" for g, ms in slow.items()))
+    if report["hot"]:
+        print(f"\n✅ 预热完成，最后一轮所有分组 P95 ≤ {args.hot_ms:.0f}ms（{report['elapsed_s']}s）")
+    print(f"报告: {out}")
+    sys.exit(0 if report["hot"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+晨读营管理后台大数据量性能测试
+用本地替身后端按不同数据量（默认 1k / 10k / 100k 条）生成用户、报名、打卡数据，
+测量报名、打卡、用户列表页的首屏加载、翻页、筛选、搜索耗时与表格滚动帧率，输出随数据量变化的曲线
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+from playwright.sync_api import sync_playwright
+
+from support.routing import RequestRouter
+from support.standin import Dataset, StandInBackend
+
+# 配置
+ADMIN_URL = os.getenv("ADMIN_URL", "http://localhost:5173")
+SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/scalability")
+SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+LOAD_BUDGET_MS = float(os.getenv("E2E_SCALE_LOAD_BUDGET", "1500"))
+MIN_FPS = float(os.getenv("E2E_SCALE_MIN_FPS", "50"))
+TIMEOUT_MS = 30000
+
+ROW_SELECTOR = ".el-table__body tr"
+
+# 列表页：路由、列表接口、搜索框、期次筛选框，以及提交搜索的方式
+PAGES = {
+    "enrollments": {
+        "path": "/enrollments",
+        "api": "/api/v1/enrollments",
+        "search": '[placeholder="搜索姓名..."]',
+        "filter": "选择期次",
+        "submit": "enter",
+    },
+    "checkins": {
+        "path": "/checkins",
+        "api": "/api/v1/admin/checkins",
+        "search": '[placeholder="搜索用户昵称或ID"]',
+        "filter": "选择期次",
+        "submit": 'button:has-text("查询")',
+    },
+    "users": {
+        "path": "/users",
+        "api": "/api/v1/users",
+        "search": '[placeholder="搜索昵称或邮箱..."]',
+        "filter": None,
+        "submit": "enter",
+    },
+}
+
+# 以 requestAnimationFrame 驱动表格滚动，统计帧间隔
+SCROLL_SCRIPT = """
+async (durationMs) => {
+  const el = document.querySelector('.el-table__body-wrapper .el-scrollbar__wrap')
+    || document.querySelector('.el-table__body-wrapper')
+    || document.scrollingElement;
+  const frames = [];
+  return await new Promise((resolve) => {
+    const start = performance.now();
+    let last = start;
+    function step(now) {
+      frames.push(now - last);
+      last = now;
+      el.scrollTop += 40;
+      if (el.scrollTop + el.clientHeight >= el.scrollHeight) el.scrollTop = 0;
+      if (now - start < durationMs) {
+        requestAnimationFrame(step);
+      } else {
+        const sorted = frames.slice(1).sort((a, b) => a - b);
+        const elapsed = (now - start) / 1000;
+        resolve({
+          fps: sorted.length / elapsed,
+          p95_frame_ms: sorted[Math.min(sorted.length - 1, Math.ceil(sorted.length * 0.95) - 1)] || 0,
+          dropped_frames: sorted.filter((d) => d > 33.4).length,
+        });
+      }
+    }
+    requestAnimationFrame(step);
+  });
+}
+"""
+
+DOM_SCRIPT = """
+() => ({
+  rows: document.querySelectorAll('.el-table__body tr').length,
+  dom_nodes: document.getElementsByTagName('*').length,
+  js_heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : null,
+})
+"""
+
+NEXT_FRAME_SCRIPT = "() => new Promise((r) => requestAnimationFrame(() => requestAnimationFrame(r)))"
+
+
+class ScalabilityTester:
+    def __init__(self, volumes, pages, unpaged=False, latency_ms=0, headless=True):
+        self.volumes = volumes
+        self.pages = pages
+        self.unpaged = unpaged
+        self.latency_ms = latency_ms
+        self.headless = headless
+        self.results = {}
+
+    def log(self, message: str, level: str = "INFO"):
+        """日志输出"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}")
+
+    def timed(self, page, api: str, action):
+        """执行操作，等待列表接口返回并完成渲染，返回 (界面耗时, 替身后端耗时)"""
+        started = time.perf_counter()
+        with page.expect_response(
+            lambda r: urlsplit(r.url).path == api and r.request.method == "GET", timeout=TIMEOUT_MS
+        ) as info:
+            action()
+        response = info.value
+        response.finished()
+        page.evaluate(NEXT_FRAME_SCRIPT)
+        elapsed = (time.perf_counter() - started) * 1000
+        server = float(response.headers.get("x-standin-ms", 0))
+        return round(elapsed, 1), round(server, 1)
+
+    def submit(self, page, config):
+        if config["submit"] == "enter":
+            page.locator(config["search"]).first.press("Enter")
+        else:
+            page.locator(config["submit"]).first.click()
+
+    def measure_page(self, page, name: str, volume: int):
+        config = PAGES[name]
+        metrics = {}
+
+        def load():
+            page.goto(f"{ADMIN_URL.rstrip('/')}{config['path']}", wait_until="domcontentloaded")
+
+        metrics["load_ms"], metrics["load_server_ms"] = self.timed(page, config["api"], load)
+        page.locator(ROW_SELECTOR).first.wait_for(timeout=TIMEOUT_MS)
+        metrics.update(page.evaluate(DOM_SCRIPT))
+
+        try:
+            scroll = page.evaluate(SCROLL_SCRIPT, 1500)
+            metrics.update({k: round(v, 1) for k, v in scroll.items()})
+        except Exception as e:
+            self.log(f"⚠️ {name} 滚动测量失败: {str(e)}", "WARN")
+
+        next_button = page.locator(".el-pagination .btn-next").first
+        if not self.unpaged and next_button.count() and next_button.is_enabled():
+            metrics["next_page_ms"], metrics["next_page_server_ms"] = self.timed(
+                page, config["api"], next_button.click
+            )
+
+        if config["filter"]:
+            try:
+                def apply_filter():
+                    page.locator(f'.el-select:has-text("{config["filter"]}"), '
+                                 f'.el-select:has([placeholder="{config["filter"]}"])').first.click()
+                    page.locator(".el-select-dropdown__item:visible").first.click()
+                    self.submit(page, config)
+
+                metrics["filter_ms"], metrics["filter_server_ms"] = self.timed(page, config["api"], apply_filter)
+            except Exception as e:
+                self.log(f"⚠️ {name} 筛选测量失败: {str(e)}", "WARN")
+
+        try:
+            # 搜索数据集中间位置的用户，保证各数据量下都有结果
+            term = f"{volume // 2:06d}"
+
+            def search():
+                page.locator(config["search"]).first.fill(term)
+                self.submit(page, config)
+
+            metrics["search_ms"], metrics["search_server_ms"] = self.timed(page, config["api"], search)
+        except Exception as e:
+            self.log(f"⚠️ {name} 搜索测量失败: {str(e)}", "WARN")
+
+        self.log(
+            f"  {name}: 加载 {metrics['load_ms']:.0f}ms | 翻页 {metrics.get('next_page_ms', '-')}ms | "
+            f"筛选 {metrics.get('filter_ms', '-')}ms | 搜索 {metrics.get('search_ms', '-')}ms | "
+            f"{metrics.get('fps', 0):.0f}fps | {metrics['rows']} 行"
+        )
+        return metrics
+
+    def run_volume(self, p, volume: int):
+        self.log(f"📦 数据量 {volume}: 生成数据...")
+        backend = StandInBackend(Dataset(volume), latency_ms=self.latency_ms, unpaged=self.unpaged,
+                                 log=self.log).start()
+        browser = p.chromium.launch(headless=self.headless)
+        results = {}
+        try:
+            context = browser.new_context(viewport={"width": 1440, "height": 900})
+            # 替身后端不校验 token，预置一个即可通过前端路由守卫
+            context.add_init_script("localStorage.setItem('adminToken', 'standin-admin-token')")
+            RequestRouter(ADMIN_URL, api_mode="backend", backend_url=backend.url, log=self.log).install(context)
+            page = context.new_page()
+            for name in self.pages:
+                try:
+                    results[name] = self.measure_page(page, name, volume)
+                except Exception as e:
+                    self.log(f"❌ {name} 测量失败: {str(e)}", "ERROR")
+                    results[name] = {"error": str(e)}
+            context.close()
+        finally:
+            browser.close()
+            backend.stop()
+        return results
+
+    def analyze(self):
+        """按页面给出各指标随数据量的变化，以及需要服务端分页或虚拟滚动的建议"""
+        findings = []
+        largest = max(self.volumes)
+        smallest = min(self.volumes)
+        for name in self.pages:
+            big = self.results.get(largest, {}).get(name, {})
+            small = self.results.get(smallest, {}).get(name, {})
+            if "load_ms" not in big:
+                continue
+            growth = round(big["load_ms"] / small["load_ms"], 2) if small.get("load_ms") else None
+            client_ms = big["load_ms"] - big.get("load_server_ms", 0)
+            if big["load_ms"] > LOAD_BUDGET_MS:
+                findings.append({
+                    "page": name, "volume": largest, "metric": "load_ms", "value": big["load_ms"],
+                    "advice": "前端渲染为主，需要限制每页行数或虚拟滚动" if client_ms > big.get("load_server_ms", 0)
+                    else "接口耗时为主，需要服务端分页/索引优化",
+                    "growth": growth,
+                })
+            if big.get("fps") is not None and big["fps"] < MIN_FPS:
+                findings.append({
+                    "page": name, "volume": largest, "metric": "fps", "value": big["fps"],
+                    "advice": "表格滚动掉帧，需要虚拟滚动", "growth": growth,
+                })
+        return findings
+
+    def run(self):
+        self.log("🚀 开始管理后台大数据量性能测试")
+        self.log(f"数据量: {self.volumes} | 页面: {self.pages} | {'不分页' if self.unpaged else '服务端分页'}")
+        with sync_playwright() as p:
+            for volume in self.volumes:
+                self.results[volume] = self.run_volume(p, volume)
+
+        findings = self.analyze()
+        self.log("=" * 60)
+        self.log("📈 扩展曲线（首屏加载 ms）")
+        for name in self.pages:
+            curve = " → ".join(
+                f"{volume}: {self.results[volume].get(name, {}).get('load_ms', '-')}" for volume in self.volumes
+            )
+            self.log(f"  {name}: {curve}")
+        for finding in findings:
+            self.log(f"⚠️ {finding['page']} @ {finding['volume']}: {finding['metric']}={finding['value']} "
+                     f"— {finding['advice']}", "WARN")
+        if not findings:
+            self.log("✅ 所有页面在最大数据量下均在预算内")
+        self.log("=" * 60)
+
+        return {
+            "admin_url": ADMIN_URL,
+            "volumes": self.volumes,
+            "unpaged": self.unpaged,
+            "latency_ms": self.latency_ms,
+            "budgets": {"load_ms": LOAD_BUDGET_MS, "min_fps": MIN_FPS},
+            "curve": {str(volume): self.results[volume] for volume in self.volumes},
+            "findings": findings,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营管理后台大数据量性能测试")
+    parser.add_argument("--volumes", default="1000,10000,100000", help="逗号分隔的数据量")
+    parser.add_argument("--pages", default=",".join(PAGES), help="逗号分隔的列表页")
+    parser.add_argument("--unpaged", action="store_true", help="替身后端一次返回全部结果，评估前端是否需要虚拟滚动")
+    parser.add_argument("--latency-ms", type=float, default=0, help="替身后端每个请求附加的延迟，模拟数据库耗时")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    pages = [name for name in args.pages.split(",") if name]
+    unknown = [name for name in pages if name not in PAGES]
+    if unknown:
+        parser.error(f"未知页面: {', '.join(unknown)}")
+
+    tester = ScalabilityTester(
+        volumes=sorted(int(v) for v in args.volumes.split(",") if v),
+        pages=pages,
+        unpaged=args.unpaged,
+        latency_ms=args.latency_ms,
+        headless=not args.headed,
+    )
+    report = tester.run()
+
+    report_file = SCREENSHOT_DIR / f"scalability_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 扩展曲线已保存: {report_file}")
+
+    sys.exit(0 if not report["findings"] else 1)
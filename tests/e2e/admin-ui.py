@@ -6,10 +6,23 @@
 
 import os
 import sys
+import time
+import json
+import argparse
 from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright, expect
 
+from support.parallel import run_in_contexts, DEFAULT_WORKERS
+from support.browser_server import open_browser
+from support.auth_state import save_state
+from support.perf import PerfCollector
+from support.network import NetworkRecorder
+from support.base import BaseTester
+from support.scheduler import Scheduler, Step
+from support.routing import RequestRouter, ROUTING_ENABLED
+from support.diagnostics import DiagnosticsCollector
+
 # 配置
 ADMIN_URL = os.getenv("ADMIN_URL", "http://localhost:5173")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
@@ -18,24 +31,59 @@ SCREENSHOT_DIR = Path("/tmp/e2e-screenshots")
 SCREENSHOT_DIR.mkdir(exist_ok=True)
 
 
-class AdminUITester:
-    def __init__(self):
-        self.p = sync_playwright().start()
-        self.browser = self.p.chromium.launch(headless=False)  # 显示浏览器窗口便于调试
-        self.page = self.browser.new_page()
-        self.test_results = []
-
-    def log(self, message: str, level: str = "INFO"):
-        """日志输出"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] [{level}] {message}")
+# 登录后可以互不依赖、并行执行的测试及其标签
+INDEPENDENT_TESTS = {
+    "test_dashboard": ("smoke",),
+    "test_enrollment_management": ("enrollment",),
+    "test_insights_management": ("insights",),
+    "test_users_list": ("users",),
+}
+
+
+class AdminUITester(BaseTester):
+    SUITE = "admin"
+    TITLE = "测试结果报告"
+    SCREENSHOT_DIR = SCREENSHOT_DIR
+
+    def __init__(self, page=None, shots=None):
+        super().__init__(shots)
+        # 并行模式：复用 worker 提供的页面，浏览器生命周期由 worker 管理
+        self.p = None
+        self.browser = None
+        self.page = page
+        self.perf = PerfCollector(log=self.log)
+        self.network = NetworkRecorder(log=self.log)
+        self.diagnostics = DiagnosticsCollector(log=self.log)
+        self.router = RequestRouter(ADMIN_URL, log=self.log)
+
+    def setup(self):
+        """启动浏览器并在上下文上挂好性能、网络、诊断收集与请求路由"""
+        super().setup()
+        # 并行 worker 的上下文可能被上下文池复用，收集器只挂在本任务的页面上，随页面关闭而失效
+        target = self.page
+        if self.page is None:
+            self.p = sync_playwright().start()
+            # 常驻浏览器未运行时本地启动，并显示浏览器窗口便于调试
+            self.browser = open_browser(self.p, headless=False, log=self.log)
+            self.page = self.browser.new_page()
+            target = self.page.context
+        PerfCollector.install(target)
+        self.network.attach(target)
+        self.diagnostics.attach(target)
+        # 静态资源走本地构建/缓存，API 按 E2E_API_MODE 路由，需在首次导航前安装
+        if ROUTING_ENABLED:
+            self.router.install(target)
 
     def screenshot(self, name: str):
-        """保存截图"""
-        path = SCREENSHOT_DIR / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        self.page.screenshot(path=str(path), full_page=True)
-        self.log(f"截图已保存: {path}", "DEBUG")
-        return path
+        """保存当前页面截图"""
+        return self.capture(self.page, name)
+
+    def save_auth_state(self):
+        """保存登录态，供其他测试套件跳过登录界面"""
+        try:
+            save_state(self.page.context)
+        except Exception as e:
+            self.log(f"⚠️ 登录态保存失败: {str(e)}", "WARN")
 
     def test_login(self):
         """测试 1: 管理员登录"""
@@ -48,6 +96,7 @@ class AdminUITester:
             try:
                 self.page.locator('h3:has-text("仪表板")').wait_for(timeout=2000)
                 self.log("✅ 已登录状态，跳过登录步骤")
+                self.save_auth_state()
                 self.test_results.append(("login", "SKIPPED", "Already logged in"))
                 return True
             except:
@@ -74,6 +123,7 @@ class AdminUITester:
             # 验证登录成功
             self.page.locator('h3:has-text("仪表板")').wait_for()
             self.log("✅ 登录成功")
+            self.save_auth_state()
             self.test_results.append(("login", "PASSED", "Successfully logged in"))
             return True
 
@@ -93,6 +143,7 @@ class AdminUITester:
         self.log("=== 测试 2: 数据看板加载 ===")
         try:
             self.page.goto(f"{ADMIN_URL}/", wait_until="networkidle")
+            self.perf.capture(self.page, "dashboard")
             self.screenshot("03-dashboard")
 
             # 验证看板主要组件
@@ -140,6 +191,7 @@ class AdminUITester:
         try:
             # 导航到报名管理页面
             self.page.goto(f"{ADMIN_URL}/enrollments", wait_until="networkidle")
+            self.perf.capture(self.page, "enrollments")
             self.screenshot("04-enrollments-list")
 
             # 检查报名列表是否加载
@@ -181,6 +233,7 @@ class AdminUITester:
         try:
             # 导航到小凡看见管理页面
             self.page.goto(f"{ADMIN_URL}/insights", wait_until="networkidle")
+            self.perf.capture(self.page, "insights")
             self.screenshot("06-insights-list")
 
             # 检查Insights列表
@@ -210,6 +263,7 @@ class AdminUITester:
         self.log("=== 测试 5: 用户列表 ===")
         try:
             self.page.goto(f"{ADMIN_URL}/users", wait_until="networkidle")
+            self.perf.capture(self.page, "users")
             self.screenshot("07-users-list")
 
             # 检查用户列表
@@ -229,65 +283,136 @@ class AdminUITester:
             self.test_results.append(("users_list", "FAILED", str(e)))
             return False
 
-    def generate_report(self):
-        """生成测试报告"""
-        self.log("\n" + "=" * 60)
-        self.log("📊 测试结果报告", "INFO")
-        self.log("=" * 60)
-
-        passed = sum(1 for _, status, _ in self.test_results if status == "PASSED")
-        failed = sum(1 for _, status, _ in self.test_results if status == "FAILED")
-        skipped = sum(1 for _, status, _ in self.test_results if status == "SKIPPED")
-
-        for test_name, status, message in self.test_results:
-            symbol = "✅" if status == "PASSED" else "❌" if status == "FAILED" else "⏭️"
-            self.log(f"{symbol} {test_name}: {status} - {message}")
-
-        self.log("=" * 60)
-        self.log(f"总计: {len(self.test_results)} 个测试")
-        self.log(f"通过: {passed} | 失败: {failed} | 跳过: {skipped}")
-        self.log(f"成功率: {passed / len(self.test_results) * 100:.1f}%")
-        self.log(f"截图保存位置: {SCREENSHOT_DIR}")
-        self.log("=" * 60)
+    def log_details(self):
+        self.network.log_summary()
+        self.network.save_traffic("admin-ui")
+        self.diagnostics.log_summary()
 
+    def report_extras(self):
         return {
-            "total": len(self.test_results),
-            "passed": passed,
-            "failed": failed,
-            "skipped": skipped,
-            "success_rate": passed / len(self.test_results) * 100 if self.test_results else 0
+            "perf": self.perf.summary(),
+            "network": self.network.summary(),
+            "routing": self.router.summary(),
+            "diagnostics": self.diagnostics.summary(),
         }
 
-    def run_all_tests(self):
-        """运行所有测试"""
+    def build_steps(self):
+        """登录是所有其他测试的前置步骤；步骤名与结果名一致"""
+        steps = [Step("login", self.test_login, tags=("smoke", "auth"))]
+        for test_name, tags in INDEPENDENT_TESTS.items():
+            steps.append(Step(test_name.replace("test_", "", 1), getattr(self, test_name),
+                              depends_on=("login",), tags=tags))
+        return steps
+
+    def run_parallel_tests(self, steps, workers: int, scheduler: Scheduler):
+        """在共享登录态的独立浏览器上下文中并行运行登录后的测试，历史耗时长的先启动"""
+        storage_state = self.page.context.storage_state()
+        ordered = [step.fn.__name__ for step in scheduler.order(steps, parallel=True)]
+        self.log(f"⚡ 并行模式: {len(ordered)} 个测试, {workers} 个 worker")
+
+        def make_task(test_name):
+            def task(page):
+                worker_tester = AdminUITester(page=page, shots=self.shots)
+                worker_tester.setup()
+                worker_tester.network.set_step(test_name)
+                worker_tester.diagnostics.set_step(test_name)
+                worker_tester.test_results.begin(test_name)
+                getattr(worker_tester, test_name)()
+                # 页面只能在所属 worker 线程中访问，返回前先取回长任务
+                worker_tester.diagnostics.drain()
+                return (worker_tester.test_results, worker_tester.perf.pages,
+                        worker_tester.network.records, worker_tester.router.stats,
+                        list(worker_tester.diagnostics.records))
+            return task
+
+        outcomes = run_in_contexts(
+            [(name, make_task(name)) for name in ordered],
+            storage_state=storage_state,
+            workers=workers,
+            log=self.log,
+        )
+
+        # 按原有顺序合并各 worker 的结果
+        for test_name, outcome, error in outcomes:
+            if error is not None:
+                self.log(f"❌ {test_name} 执行出错: {str(error)}", "ERROR")
+                self.test_results.append((test_name.replace("test_", "", 1), "FAILED", str(error)))
+            else:
+                results, perf_pages, network_records, routing_stats, diagnostics = outcome
+                self.test_results.extend(results)
+                self.perf.merge(perf_pages)
+                self.network.merge(network_records)
+                self.router.merge(routing_stats)
+                self.diagnostics.merge(diagnostics)
+
+    def check_perf_budgets(self):
+        """把页面性能预算检查作为一个测试结果记录，超标即失败"""
+        summary = self.perf.summary()
+        if not summary["pages"]:
+            return
+        violations = summary["violations"]
+        if violations:
+            details = "; ".join(f"{v['page']}.{v['metric']}={v['value']} > {v['budget']}" for v in violations)
+            self.log(f"❌ 性能预算超标: {details}", "ERROR")
+            self.test_results.append(("perf_budgets", "FAILED", details))
+        else:
+            self.test_results.append(("perf_budgets", "PASSED", f"{len(summary['pages'])} pages within budget"))
+
+    def run_all_tests(self, workers: int = DEFAULT_WORKERS, only=None):
+        """运行所有测试；only 为步骤名集合时只运行这些步骤及其依赖"""
         self.log("🚀 开始运行管理后台 UI 自动化测试")
         self.log(f"目标 URL: {ADMIN_URL}")
+        started = time.monotonic()
+        self.setup()
+
+        steps = self.select_steps(self.build_steps(), only)
+        scheduler = Scheduler(self.SUITE, log=self.log)
+        def on_start(step):
+            self.network.set_step(step.name)
+            self.diagnostics.set_step(step.name)
 
         try:
-            self.test_login()
-            if self.test_results[-1][1] != "FAILED":  # 只有登录成功才继续测试
-                self.test_dashboard()
-                self.test_enrollment_management()
-                self.test_insights_management()
-                self.test_users_list()
+            if workers > 1:
+                statuses = scheduler.run(steps[:1], self.test_results, on_start=on_start)
+                if statuses.get("login") != "FAILED" and len(steps) > 1:  # 只有登录成功才继续测试
+                    self.run_parallel_tests(steps[1:], workers, scheduler)
+            else:
+                # 登录失败时依赖它的测试会被直接跳过
+                scheduler.run(steps, self.test_results, on_start=on_start)
         except Exception as e:
             self.log(f"❌ 测试运行出错: {str(e)}", "ERROR")
 
+        self.check_perf_budgets()
+        self.log(f"⏱️ 总耗时: {time.monotonic() - started:.1f}s")
         report = self.generate_report()
+        report["workers"] = workers
+        self.persist(metadata={"workers": workers})
         self.cleanup()
         return report
 
-    def cleanup(self):
-        """清理资源"""
-        self.page.close()
-        self.browser.close()
-        self.p.stop()
-        self.log("✅ 浏览器已关闭")
+    def release(self):
+        if self.page:
+            self.page.close()
+        if self.browser:
+            self.browser.close()
+        if self.p:
+            self.p.stop()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营管理后台 UI 自动化测试")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="并行 worker 数量，大于 1 时登录后的测试并行执行 (默认读取 E2E_WORKERS)")
+    args = parser.parse_args()
+
     tester = AdminUITester()
-    report = tester.run_all_tests()
+    report = tester.run_all_tests(workers=args.workers)
+
+    # 保存测试报告到文件
+    report_file = SCREENSHOT_DIR / f"admin_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 测试报告已保存: {report_file}")
 
     # 返回退出码
     sys.exit(0 if report["failed"] == 0 else 1)
@@ -0,0 +1,223 @@
+"""
+晨读营 E2E 常驻浏览器
+在后台维持一个开启远程调试端口的 Chromium，测试脚本通过 CDP 连接它而不必每次冷启动浏览器。
+守护进程定期做健康检查：浏览器退出或无响应时立即重启，内存超过上限时在空闲后重启
+
+    python tests/e2e/browser-server.py start    # 后台启动并等待就绪
+    python tests/e2e/browser-server.py status   # 查看端口、内存与运行时长
+    python tests/e2e/browser-server.py stop     # 停止
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import argparse
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from support.browser_server import (
+    STATE_FILE, read_state, write_state, probe, page_targets, process_tree_rss_mb,
+)
+
+BROWSER_PORT = int(os.getenv("E2E_BROWSER_PORT", "9333"))
+MAX_RSS_MB = float(os.getenv("E2E_BROWSER_MAX_RSS_MB", "1500"))
+CHECK_INTERVAL_S = float(os.getenv("E2E_BROWSER_CHECK_S", "10"))
+LOG_FILE = STATE_FILE.with_suffix(".log")
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}", flush=True)
+
+
+def chromium_executable():
+    """Playwright 自带的 Chromium 路径，只在守护进程启动时查询一次"""
+    from playwright.sync_api import sync_playwright
+
+    p = sync_playwright().start()
+    try:
+        return p.chromium.executable_path
+    finally:
+        p.stop()
+
+
+class BrowserServer:
+    def __init__(self, port: int = BROWSER_PORT, headless: bool = True, max_rss_mb: float = MAX_RSS_MB):
+        self.port = port
+        self.headless = headless
+        self.max_rss_mb = max_rss_mb
+        self.executable = chromium_executable()
+        self.process = None
+        self.profile_dir = None
+        self.generation = 0
+        self.started_at = None
+        self.stopping = False
+
+    def launch(self):
+        self.generation += 1
+        self.profile_dir = tempfile.mkdtemp(prefix="e2e-browser-")
+        args = [
+            self.executable,
+            f"--remote-debugging-port={self.port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={self.profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-background-networking",
+            "--disable-component-update",
+        ]
+        if self.headless:
+            args.append("--headless=new")
+        args.append("about:blank")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.started_at = time.time()
+
+        deadline = time.time() + 20
+        while not probe(self.port):
+            if self.process.poll() is not None or time.time() > deadline:
+                raise RuntimeError(f"Chromium 未能在端口 {self.port} 上就绪")
+            time.sleep(0.1)
+
+        write_state({
+            "supervisor_pid": os.getpid(),
+            "browser_pid": self.process.pid,
+            "port": self.port,
+            "generation": self.generation,
+            "started_at": self.started_at,
+            "headless": self.headless,
+        })
+        log(f"♨️ 常驻浏览器已就绪: 端口 {self.port}，第 {self.generation} 代 (pid {self.process.pid})")
+
+    def terminate(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.process = None
+
+    def restart(self, reason: str):
+        log(f"🔄 重启常驻浏览器: {reason}", "WARN")
+        self.terminate()
+        self.launch()
+
+    def check(self):
+        """返回需要重启的原因，健康时返回 None"""
+        if self.process.poll() is not None:
+            return f"进程已退出 (code {self.process.returncode})"
+        if not probe(self.port, timeout=3):
+            return "调试端口无响应"
+        rss = process_tree_rss_mb(self.process.pid)
+        if rss is not None and rss > self.max_rss_mb:
+            # 有测试在用时推迟，避免打断正在运行的用例；超过上限 1.5 倍则不再等待
+            if page_targets(self.port) and rss < self.max_rss_mb * 1.5:
+                log(f"⚠️ 内存 {rss:.0f}MB 超过 {self.max_rss_mb:.0f}MB，等待空闲后重启", "WARN")
+                return None
+            return f"内存 {rss:.0f}MB 超过 {self.max_rss_mb:.0f}MB"
+        return None
+
+    def serve(self):
+        def handle_stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, handle_stop)
+        signal.signal(signal.SIGINT, handle_stop)
+        self.launch()
+        try:
+            next_check = time.time() + CHECK_INTERVAL_S
+            while not self.stopping:
+                time.sleep(0.2)
+                if self.stopping or time.time() < next_check:
+                    continue
+                next_check = time.time() + CHECK_INTERVAL_S
+                reason = self.check()
+                if reason:
+                    self.restart(reason)
+        finally:
+            self.terminate()
+            STATE_FILE.unlink(missing_ok=True)
+            log("✅ 常驻浏览器已停止")
+
+
+def pid_alive(pid: int):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def start(args):
+    state = read_state()
+    if state and pid_alive(state["supervisor_pid"]) and probe(state["port"]):
+        log(f"✅ 常驻浏览器已在运行: 端口 {state['port']}")
+        return 0
+
+    command = [sys.executable, str(Path(__file__).resolve()), "serve", "--port", str(args.port)]
+    if args.headed:
+        command.append("--headed")
+    with open(LOG_FILE, "a", encoding="utf-8") as out:
+        process = subprocess.Popen(command, stdout=out, stderr=subprocess.STDOUT, start_new_session=True)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        state = read_state()
+        if state and state["supervisor_pid"] == process.pid and probe(state["port"]):
+            log(f"♨️ 常驻浏览器已启动: http://127.0.0.1:{state['port']}（日志 {LOG_FILE}）")
+            return 0
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    log(f"❌ 常驻浏览器启动失败，详见 {LOG_FILE}", "ERROR")
+    return 1
+
+
+def stop(args):
+    state = read_state()
+    if not state or not pid_alive(state["supervisor_pid"]):
+        STATE_FILE.unlink(missing_ok=True)
+        log("常驻浏览器未运行")
+        return 0
+    os.kill(state["supervisor_pid"], signal.SIGTERM)
+    deadline = time.time() + 15
+    while pid_alive(state["supervisor_pid"]) and time.time() < deadline:
+        time.sleep(0.2)
+    log("✅ 常驻浏览器已停止")
+    return 0
+
+
+def status(args):
+    state = read_state()
+    if not state or not pid_alive(state["supervisor_pid"]):
+        log("常驻浏览器未运行")
+        return 1
+    version = probe(state["port"])
+    rss = process_tree_rss_mb(state["browser_pid"])
+    uptime = time.time() - state["started_at"]
+    log(f"♨️ 端口 {state['port']} | 第 {state['generation']} 代 | {version.get('Browser') if version else '无响应'} | "
+        f"内存 {rss if rss is not None else '-'}MB / {MAX_RSS_MB:.0f}MB | "
+        f"运行 {uptime / 60:.1f} 分钟 | 打开页面 {page_targets(state['port'])}")
+    return 0 if version else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营 E2E 常驻浏览器")
+    parser.add_argument("command", choices=["start", "stop", "status", "serve"],
+                        help="serve 在前台运行守护进程，start 在后台运行它")
+    parser.add_argument("--port", type=int, default=BROWSER_PORT, help="远程调试端口")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        BrowserServer(port=args.port, headless=not args.headed).serve()
+        sys.exit(0)
+    sys.exit({"start": start, "stop": stop, "status": status}[args.command](args))
@@ -0,0 +1,336 @@
+"""
+晨读营打卡流程 API 并发负载测试
+在共享的浏览器池中为每个虚拟用户创建一个独立的浏览器上下文（独立 Cookie 与连接池），
+按错峰到达的节奏让 N 个用户按小程序的调用顺序发出 登录 → 报名 → 支付 → 打卡页数据 → 提交打卡 的 API 请求，
+逐级提高并发，记录每个步骤的接口耗时分布与错误率
+
+测量范围只有后端 API（含浏览器网络栈的连接复用与 JSON 解析），不包含前端渲染与交互：
+小程序运行时无法在普通浏览器中加载，请求由一个空白页面内的 fetch 发出。
+“打卡页数据”一步并发请求课节详情、报名状态与打卡庆祝配置，与 pages/checkin 加载时的接口调用一致；
+页面渲染开销请用 miniprogram-ui.py --profile 在开发者工具中测量
+
+模拟支付（mock-confirm）只在非生产环境开放；默认指向本地后端
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+from playwright.async_api import async_playwright
+
+from support.metrics import METRICS_ENABLED, MetricsSampler
+from support.network import percentile
+from support.seeding import ApiClient, DataSeeder, SEED_PERIOD_ID, SEED_WX_APPID
+
+# 配置
+LOAD_API_URL = os.getenv("E2E_LOAD_API_URL", "http://localhost:3000/api/v1")
+SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/load")
+SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+MAX_ERROR_RATE = float(os.getenv("E2E_LOAD_MAX_ERROR_RATE", "0.01"))
+# 某一级并发的 p95 超过最低并发 p95 的倍数时视为到达拐点
+P95_GROWTH_LIMIT = float(os.getenv("E2E_LOAD_P95_GROWTH", "3"))
+
+STEPS = ["context", "login", "enroll", "pay", "open_checkin", "submit_checkin"]
+
+# 与 API 同源的空白落地页，页面内的 fetch 不受跨域限制
+LANDING_PATH = "/__e2e_load__"
+LANDING_HTML = "<!doctype html><meta charset='utf-8'><title>checkin-api-load</title>"
+
+# 虚拟用户的打卡 API 调用序列；每一步在浏览器内计时，包含请求排队、连接复用与 JSON 解析
+API_FLOW_SCRIPT = """
+async ({api, code, nickname, wxAppId, periodId, sectionId, day, thinkMs}) => {
+  const steps = [];
+  let token = null;
+
+  const call = async (method, path, body) => {
+    const headers = {'Content-Type': 'application/json'};
+    if (token) headers.Authorization = `Bearer ${token}`;
+    if (wxAppId) headers['X-Wx-AppId'] = wxAppId;
+    const res = await fetch(api + path, {
+      method, headers, body: body === undefined ? undefined : JSON.stringify(body),
+    });
+    const payload = await res.json().catch(() => ({}));
+    if (!res.ok || payload.code !== 0) {
+      throw new Error(`${method} ${path} → HTTP ${res.status} ${payload.message || ''}`.trim());
+    }
+    return payload.data;
+  };
+
+  const step = async (name, fn) => {
+    const started = performance.now();
+    try {
+      const value = await fn();
+      steps.push({name, ms: performance.now() - started, ok: true});
+      return value;
+    } catch (e) {
+      steps.push({name, ms: performance.now() - started, ok: false, error: String(e.message || e)});
+      throw e;
+    }
+  };
+
+  // 步骤之间的思考时间在 0.5～1.5 倍之间随机，避免所有用户步调一致
+  const think = () => new Promise((r) => setTimeout(r, thinkMs * (0.5 + Math.random())));
+
+  try {
+    const login = await step('login', () => call('POST', '/auth/wechat/login', {code, nickname, wxAppId: wxAppId || null}));
+    token = login.accessToken;
+    await think();
+    const enrollment = await step('enroll', () => call('POST', '/enrollments/simple', {periodId}));
+    await think();
+    await step('pay', async () => {
+      const payment = await call('POST', '/payments', {enrollmentId: enrollment._id, paymentMethod: 'mock'});
+      await call('POST', `/payments/${payment.paymentId}/mock-confirm`);
+    });
+    await think();
+    await step('open_checkin', () => Promise.all([
+      call('GET', `/sections/${sectionId}`),
+      call('GET', `/enrollments/check/${periodId}`),
+      call('GET', '/checkin-celebration-config'),
+    ]));
+    await think();
+    await step('submit_checkin', () => call('POST', '/checkins', {
+      periodId, sectionId, day, note: `E2E 负载测试打卡 ${code}`, isPublic: true,
+    }));
+  } catch (e) {
+    // 失败的步骤已记录，后续步骤不再执行
+  }
+  return steps;
+}
+"""
+
+
+class CheckinLoadTester:
+    def __init__(self, levels, ramp_s=30, think_ms=1000, browsers=2, api_url=LOAD_API_URL, headless=True,
+                 metrics=METRICS_ENABLED):
+        self.levels = levels
+        self.ramp_s = ramp_s
+        self.think_ms = think_ms
+        self.browsers = browsers
+        self.api_url = api_url.rstrip("/")
+        parts = urlsplit(self.api_url)
+        self.landing_url = f"{parts.scheme}://{parts.netloc}{LANDING_PATH}"
+        self.headless = headless
+        self.run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.target = None
+        self.results = {}
+        # 压测期间采样被压的同一个后端，每一级并发记为一个负载阶段
+        self.metrics = MetricsSampler(api_url=self.api_url, label="load", log=self.log) if metrics else None
+
+    def log(self, message: str, level: str = "INFO"):
+        """日志输出"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}")
+
+    def resolve_target(self):
+        """确定打卡的期次与课节；所有虚拟用户打同一节课，与真实的早晨高峰一致"""
+        seeder = DataSeeder("load", api=ApiClient(self.api_url), period_id=SEED_PERIOD_ID, log=self.log)
+        period = seeder.find_period()
+        section = seeder.find_section(period["_id"])
+        self.target = {
+            "periodId": period["_id"],
+            "sectionId": section["_id"],
+            "day": section.get("day", 0),
+            "period_title": period.get("title") or period.get("name"),
+        }
+        self.log(f"🎯 打卡目标: {self.target['period_title']} 第 {self.target['day']} 天")
+
+    async def virtual_user(self, browser, level: int, index: int, delay: float):
+        """一个虚拟用户：错峰到达，在独立上下文中发出打卡流程的 API 请求"""
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        code = f"e2e-load-{self.run_id}-{level}-{index}"
+        steps = []
+        context = None
+        try:
+            context = await browser.new_context()
+            await context.route(self.landing_url, lambda route: route.fulfill(
+                status=200, content_type="text/html", body=LANDING_HTML
+            ))
+            page = await context.new_page()
+            await page.goto(self.landing_url)
+            steps.append({"name": "context", "ms": (time.perf_counter() - started) * 1000, "ok": True})
+            steps += await page.evaluate(API_FLOW_SCRIPT, {
+                "api": self.api_url,
+                "code": code,
+                "nickname": f"负载用户{level}-{index}",
+                "wxAppId": SEED_WX_APPID,
+                "periodId": self.target["periodId"],
+                "sectionId": self.target["sectionId"],
+                "day": self.target["day"],
+                "thinkMs": self.think_ms,
+            })
+        except Exception as e:
+            steps.append({"name": "context", "ms": 0, "ok": False, "error": str(e)})
+        finally:
+            if context:
+                await context.close()
+        return {
+            "steps": steps,
+            "completed": any(s["name"] == "submit_checkin" and s["ok"] for s in steps),
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+    async def run_level(self, pool, level: int):
+        """在 ramp_s 秒内错峰启动 level 个虚拟用户，每个到达时刻在均匀间隔上加 ±50% 抖动"""
+        rng = random.Random(level)
+        interval = self.ramp_s / level if level else 0
+        delays = [max(0.0, interval * (i + rng.uniform(-0.5, 0.5))) for i in range(level)]
+        self.log(f"👥 并发 {level}: {self.ramp_s}s 内错峰到达，思考时间约 {self.think_ms}ms")
+
+        started = time.perf_counter()
+        phase_started = time.time()
+        users = await asyncio.gather(*(
+            self.virtual_user(pool[i % len(pool)], level, i, delay) for i, delay in enumerate(delays)
+        ))
+        wall_s = time.perf_counter() - started
+        if self.metrics:
+            self.metrics.mark(f"level_{level}", phase_started, time.time(), kind="load_phase")
+        return self.summarize(level, users, wall_s)
+
+    def summarize(self, level: int, users, wall_s: float):
+        """按步骤汇总耗时分布与错误率"""
+        steps = {}
+        errors = Counter()
+        for name in STEPS:
+            records = [s for u in users for s in u["steps"] if s["name"] == name]
+            durations = [s["ms"] for s in records if s["ok"]]
+            failed = [s for s in records if not s["ok"]]
+            errors.update(f"{name}: {s['error'][:120]}" for s in failed)
+            steps[name] = {
+                "count": len(records),
+                "errors": len(failed),
+                "error_rate": round(len(failed) / len(records), 4) if records else None,
+                **{f"p{p}_ms": round(percentile(durations, p), 1) if durations else None for p in (50, 90, 95, 99)},
+                "max_ms": round(max(durations), 1) if durations else None,
+            }
+
+        completed = sum(1 for u in users if u["completed"])
+        flows = [u["elapsed_ms"] for u in users if u["completed"]]
+        summary = {
+            "users": level,
+            "completed": completed,
+            "error_rate": round(1 - completed / level, 4) if level else 0,
+            "checkins_per_s": round(completed / wall_s, 2) if wall_s else 0,
+            "flow_p50_ms": round(percentile(flows, 50), 1) if flows else None,
+            "flow_p95_ms": round(percentile(flows, 95), 1) if flows else None,
+            "wall_s": round(wall_s, 1),
+            "steps": steps,
+            "top_errors": errors.most_common(5),
+        }
+
+        self.log(f"  完成 {completed}/{level} | 错误率 {summary['error_rate']:.1%} | "
+                 f"{summary['checkins_per_s']} 次打卡/s")
+        for name, stats in steps.items():
+            if stats["count"]:
+                self.log(f"  {name:<15} p50 {stats['p50_ms'] or '-':>8} | p95 {stats['p95_ms'] or '-':>8} | "
+                         f"p99 {stats['p99_ms'] or '-':>8} | 错误 {stats['errors']}/{stats['count']}")
+        for message, count in summary["top_errors"]:
+            self.log(f"  ❌ {count}× {message}", "WARN")
+        return summary
+
+    def analyze(self):
+        """找出错误率超标或 p95 明显上升的第一级并发"""
+        findings = []
+        baseline = self.results[self.levels[0]]["steps"]
+        for level in self.levels:
+            result = self.results[level]
+            if result["error_rate"] > MAX_ERROR_RATE:
+                findings.append({"users": level, "metric": "error_rate", "value": result["error_rate"],
+                                 "limit": MAX_ERROR_RATE})
+            for name, stats in result["steps"].items():
+                base = baseline.get(name, {}).get("p95_ms")
+                if level != self.levels[0] and base and stats["p95_ms"] and stats["p95_ms"] > base * P95_GROWTH_LIMIT:
+                    findings.append({"users": level, "metric": f"{name}.p95_ms", "value": stats["p95_ms"],
+                                     "limit": round(base * P95_GROWTH_LIMIT, 1)})
+        return findings
+
+    async def run(self):
+        self.log("🚀 开始打卡流程 API 并发负载测试（不含前端渲染）")
+        self.log(f"接口: {self.api_url} | 并发梯度: {self.levels} | 浏览器池: {self.browsers}")
+        self.resolve_target()
+
+        if self.metrics:
+            self.metrics.login().start()
+        async with async_playwright() as p:
+            pool = [await p.chromium.launch(headless=self.headless) for _ in range(self.browsers)]
+            try:
+                for level in self.levels:
+                    self.results[level] = await self.run_level(pool, level)
+            finally:
+                for browser in pool:
+                    await browser.close()
+                if self.metrics:
+                    self.metrics.stop()
+
+        backend_metrics = self.metrics.summary() if self.metrics else None
+        findings = self.analyze()
+        self.log("=" * 60)
+        self.log("📈 容量曲线（提交打卡 p95 ms / 错误率）")
+        for level in self.levels:
+            result = self.results[level]
+            self.log(f"  {level:>5} 用户: {result['steps']['submit_checkin']['p95_ms'] or '-'}ms / "
+                     f"{result['error_rate']:.1%} | {result['checkins_per_s']} 次打卡/s")
+        for finding in findings:
+            self.log(f"⚠️ 并发 {finding['users']}: {finding['metric']}={finding['value']} "
+                     f"超过 {finding['limit']}", "WARN")
+        if not findings:
+            self.log("✅ 所有并发级别均在阈值内")
+        if backend_metrics:
+            self.metrics.log_summary(backend_metrics)
+        self.log("=" * 60)
+
+        return {
+            "scope": "api",
+            "api_url": self.api_url,
+            "target": self.target,
+            "levels": self.levels,
+            "ramp_s": self.ramp_s,
+            "think_ms": self.think_ms,
+            "browsers": self.browsers,
+            "thresholds": {"max_error_rate": MAX_ERROR_RATE, "p95_growth": P95_GROWTH_LIMIT},
+            "curve": {str(level): self.results[level] for level in self.levels},
+            "findings": findings,
+            "backend_metrics": backend_metrics,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营打卡流程 API 并发负载测试")
+    parser.add_argument("--levels", default="10,50,100", help="逗号分隔的并发用户数梯度")
+    parser.add_argument("--ramp-s", type=float, default=30, help="每一级用户的错峰到达时间窗（秒）")
+    parser.add_argument("--think-ms", type=float, default=1000, help="步骤之间的平均思考时间")
+    parser.add_argument("--browsers", type=int, default=2, help="浏览器池中的浏览器进程数")
+    parser.add_argument("--api", default=LOAD_API_URL, help="后端 API 地址（需开放模拟支付）")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--metrics", action="store_true", default=METRICS_ENABLED,
+                        help="压测期间采样后端监控指标 (或设置 E2E_METRICS=1)")
+    args = parser.parse_args()
+
+    tester = CheckinLoadTester(
+        levels=sorted(int(v) for v in args.levels.split(",") if v),
+        ramp_s=args.ramp_s,
+        think_ms=args.think_ms,
+        browsers=max(1, args.browsers),
+        api_url=args.api,
+        headless=not args.headed,
+        metrics=args.metrics,
+    )
+    try:
+        report = asyncio.run(tester.run())
+    except Exception as e:
+        print(f"❌ 无法启动负载测试: {str(e)}")
+        sys.exit(1)
+
+    report_file = SCREENSHOT_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 容量曲线已保存: {report_file}")
+
+    sys.exit(0 if not report["findings"] else 1)
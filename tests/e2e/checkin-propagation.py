@@ -0,0 +1,242 @@
+"""
+晨读营打卡传播延迟测量
+用户端提交打卡时记下时间点，随后并发轮询三个读取视图，直到每个视图都能看到这条新记录：
+- 管理后台打卡列表   GET /admin/checkins?userId=&periodId=
+- 小程序期次打卡动态 GET /checkins/period/:periodId
+- 管理后台打卡统计   GET /admin/checkins/stats?periodId=（totalCount 超过提交前的基线）
+
+轮询间隔从很短开始按指数退避，有上限与总超时，测得的延迟精度记为命中前最后一次落空到命中之间的间隔。
+重复多轮后按视图输出 p50/p95 传播延迟，帮助发现缓存、读副本或异步统计带来的可见性滞后
+
+每一轮都会创建新的测试用户、报名与模拟支付（仅非生产环境开放）；默认指向本地后端
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from support.network import percentile
+from support.seeding import ApiClient, DataSeeder, SeedError
+
+# 配置
+PROPAGATION_API_URL = os.getenv("E2E_PROPAGATION_API_URL", "http://localhost:3000/api/v1")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123456")
+SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/propagation")
+SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+# 轮询间隔：从 POLL_MIN_MS 开始每次翻倍，最多 POLL_MAX_MS；超过 TIMEOUT_S 仍不可见记为超时
+POLL_MIN_MS = float(os.getenv("E2E_PROPAGATION_POLL_MIN_MS", "25"))
+POLL_MAX_MS = float(os.getenv("E2E_PROPAGATION_POLL_MAX_MS", "500"))
+TIMEOUT_S = float(os.getenv("E2E_PROPAGATION_TIMEOUT_S", "30"))
+# 视图 p95 传播延迟的预算
+BUDGET_MS = float(os.getenv("E2E_PROPAGATION_BUDGET_MS", "2000"))
+
+VIEWS = {
+    "admin_list": "管理后台打卡列表",
+    "period_feed": "小程序期次打卡动态",
+    "admin_stats": "管理后台打卡统计",
+}
+
+
+class PropagationProbe:
+    def __init__(self, runs: int, api_url: str = PROPAGATION_API_URL, timeout_s: float = TIMEOUT_S):
+        self.runs = runs
+        self.api = ApiClient(api_url)
+        self.timeout_s = timeout_s
+        self.admin_token = None
+        self.period = None
+        self.section = None
+        self.samples = []
+
+    def log(self, message: str, level: str = "INFO"):
+        """日志输出"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}")
+
+    def prepare(self):
+        """管理员登录并确定打卡的期次与课节，所有轮次共用"""
+        data = self.api.request("POST", "/auth/admin/login", {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+        self.admin_token = data["token"]
+        seeder = DataSeeder("propagation-probe@e2e", api=self.api, log=self.log)
+        self.period = seeder.find_period()
+        self.section = seeder.find_section(self.period["_id"])
+        self.log(f"✓ 期次: {self.period.get('title') or self.period.get('name')} | "
+                 f"课节: 第 {self.section.get('day', 0)} 天")
+
+    def stats_total(self):
+        period_id = self.period["_id"]
+        stats = self.api.request("GET", f"/admin/checkins/stats?periodId={period_id}", token=self.admin_token)
+        return stats["totalCount"]
+
+    def view_checks(self, user_id: str, user_token: str, checkin_id: str, baseline: int):
+        """每个视图一个判断函数：返回 True 表示已能看到新打卡"""
+        period_id = self.period["_id"]
+
+        def admin_list():
+            data = self.api.request("GET", f"/admin/checkins?userId={user_id}&periodId={period_id}&limit=5",
+                                    token=self.admin_token)
+            return any(item.get("_id") == checkin_id for item in data.get("list", []))
+
+        def period_feed():
+            # 动态按创建时间倒序，新打卡应出现在第一页
+            data = self.api.request("GET", f"/checkins/period/{period_id}?limit=20", token=user_token)
+            return any(item.get("_id") == checkin_id for item in data or [])
+
+        def admin_stats():
+            return self.stats_total() > baseline
+
+        return {"admin_list": admin_list, "period_feed": period_feed, "admin_stats": admin_stats}
+
+    def poll(self, check, submitted_at: float):
+        """按指数退避轮询直到 check() 为真，返回相对提交时间点的延迟与精度"""
+        interval = POLL_MIN_MS / 1000
+        deadline = submitted_at + self.timeout_s
+        attempts = 0
+        last_miss = submitted_at
+        error = None
+        while True:
+            attempts += 1
+            try:
+                if check():
+                    seen = time.perf_counter()
+                    return {
+                        "latency_ms": round((seen - submitted_at) * 1000, 1),
+                        "resolution_ms": round((seen - last_miss) * 1000, 1),
+                        "attempts": attempts,
+                    }
+                error = None
+            except SeedError as e:
+                error = str(e)
+            last_miss = time.perf_counter()
+            if last_miss + interval > deadline:
+                return {"latency_ms": None, "attempts": attempts, "timeout": True, "error": error}
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_MS / 1000)
+
+    def run_once(self, index: int):
+        """创建新用户并提交一次打卡，测量三个视图的可见延迟"""
+        seeder = DataSeeder(f"propagation-{int(time.time())}-{index}@e2e", api=self.api, log=self.log)
+        user = seeder.login()
+        enrollment = seeder.enroll(self.period["_id"])
+        seeder.pay(enrollment["_id"])
+        baseline = self.stats_total()
+
+        submitted_at = time.perf_counter()
+        checkin = seeder.checkin(self.period["_id"], self.section)
+        ack_ms = round((time.perf_counter() - submitted_at) * 1000, 1)
+
+        checks = self.view_checks(user["_id"], seeder.token, checkin["_id"], baseline)
+        with ThreadPoolExecutor(max_workers=len(checks)) as pool:
+            futures = {name: pool.submit(self.poll, check, submitted_at) for name, check in checks.items()}
+            views = {name: future.result() for name, future in futures.items()}
+
+        parts = [f"{name} {v['latency_ms']}ms" if v["latency_ms"] is not None else f"{name} 超时"
+                 for name, v in views.items()]
+        self.log(f"  第 {index} 轮: 提交 {ack_ms}ms | " + " | ".join(parts))
+        return {"run": index, "checkin_id": checkin["_id"], "ack_ms": ack_ms, "views": views}
+
+    def summarize(self):
+        summary = {}
+        acks = [s["ack_ms"] for s in self.samples]
+        summary["submit_ack"] = {
+            "count": len(acks),
+            "p50_ms": round(percentile(acks, 50), 1) if acks else None,
+            "p95_ms": round(percentile(acks, 95), 1) if acks else None,
+        }
+        for name in VIEWS:
+            observed = [s["views"][name] for s in self.samples]
+            latencies = [v["latency_ms"] for v in observed if v["latency_ms"] is not None]
+            summary[name] = {
+                "count": len(observed),
+                "timeouts": sum(1 for v in observed if v.get("timeout")),
+                "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+                "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+                "max_ms": round(max(latencies), 1) if latencies else None,
+                "mean_resolution_ms": round(sum(v["resolution_ms"] for v in observed if "resolution_ms" in v)
+                                            / len(latencies), 1) if latencies else None,
+            }
+        return summary
+
+    def analyze(self, summary):
+        """超时或 p95 超出预算的视图"""
+        findings = []
+        for name in VIEWS:
+            stats = summary[name]
+            if stats["timeouts"]:
+                findings.append({"view": name, "metric": "timeouts", "value": stats["timeouts"], "limit": 0})
+            if stats["p95_ms"] is not None and stats["p95_ms"] > BUDGET_MS:
+                findings.append({"view": name, "metric": "p95_ms", "value": stats["p95_ms"], "limit": BUDGET_MS})
+        return findings
+
+    def run(self):
+        self.log("🚀 开始测量打卡传播延迟")
+        self.log(f"接口: {self.api.base_url} | 轮数: {self.runs} | 轮询 {POLL_MIN_MS:.0f}～{POLL_MAX_MS:.0f}ms，"
+                 f"超时 {self.timeout_s:.0f}s")
+        self.prepare()
+
+        errors = []
+        for index in range(1, self.runs + 1):
+            try:
+                self.samples.append(self.run_once(index))
+            except (SeedError, KeyError, TypeError) as e:
+                self.log(f"❌ 第 {index} 轮失败: {str(e)}", "ERROR")
+                errors.append({"run": index, "error": str(e)})
+
+        summary = self.summarize()
+        findings = self.analyze(summary)
+        if errors:
+            findings.append({"view": None, "metric": "failed_runs", "value": len(errors), "limit": 0})
+
+        self.log("=" * 60)
+        self.log(f"📡 传播延迟（{len(self.samples)} 轮，自提交打卡起计）")
+        self.log(f"  {'提交确认':<12} p50 {summary['submit_ack']['p50_ms'] or '-':>8} | "
+                 f"p95 {summary['submit_ack']['p95_ms'] or '-':>8}")
+        for name, label in VIEWS.items():
+            stats = summary[name]
+            self.log(f"  {label:<12} p50 {stats['p50_ms'] or '-':>8} | p95 {stats['p95_ms'] or '-':>8} | "
+                     f"max {stats['max_ms'] or '-':>8} | 超时 {stats['timeouts']}/{stats['count']}")
+        for finding in findings:
+            self.log(f"⚠️ {finding['view'] or '全局'}: {finding['metric']}={finding['value']} "
+                     f"超过 {finding['limit']}", "WARN")
+        if not findings:
+            self.log("✅ 所有视图的传播延迟均在预算内")
+        self.log("=" * 60)
+
+        return {
+            "api_url": self.api.base_url,
+            "period_id": self.period["_id"],
+            "runs": self.runs,
+            "polling": {"min_ms": POLL_MIN_MS, "max_ms": POLL_MAX_MS, "timeout_s": self.timeout_s},
+            "budget_ms": BUDGET_MS,
+            "summary": summary,
+            "samples": self.samples,
+            "errors": errors,
+            "findings": findings,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营打卡传播延迟测量")
+    parser.add_argument("--runs", type=int, default=20, help="重复测量的轮数")
+    parser.add_argument("--api", default=PROPAGATION_API_URL, help="后端 API 地址（需开放模拟支付）")
+    parser.add_argument("--timeout-s", type=float, default=TIMEOUT_S, help="单个视图的最长等待时间")
+    args = parser.parse_args()
+
+    probe = PropagationProbe(runs=max(1, args.runs), api_url=args.api, timeout_s=args.timeout_s)
+    try:
+        report = probe.run()
+    except (SeedError, OSError) as e:
+        print(f"❌ 无法开始测量: {str(e)}")
+        sys.exit(1)
+
+    report_file = SCREENSHOT_DIR / f"propagation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 传播延迟报告已保存: {report_file}")
+
+    sys.exit(0 if not report["findings"] else 1)
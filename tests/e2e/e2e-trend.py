@@ -0,0 +1,55 @@
+"""
+晨读营 E2E 耗时趋势检查
+读取 E2E 运行历史（SQLite），找出最近一次耗时明显高于滚动基线的测试步骤
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from support.results import HistoryStore, HISTORY_DB
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="晨读营 E2E 耗时趋势检查")
+    parser.add_argument("--db", type=Path, default=HISTORY_DB, help="历史数据库路径")
+    parser.add_argument("--suite", choices=["admin", "miniprogram", "workflow", "workflow-async"], help="只检查某个测试套件")
+    parser.add_argument("--window", type=int, default=10, help="滚动基线使用的历史运行次数")
+    parser.add_argument("--threshold", type=float, default=1.5, help="超过基线多少倍视为回归")
+    parser.add_argument("--min-delta", type=float, default=200, help="最小绝对增量（毫秒），过滤噪声")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        log(f"⚠️ 历史数据库不存在: {args.db}", "WARN")
+        return 0
+
+    store = HistoryStore(args.db)
+    try:
+        regressions = store.trend(args.suite, args.window, args.threshold, args.min_delta)
+    finally:
+        store.close()
+
+    log("=" * 60)
+    log("📈 E2E 步骤耗时趋势")
+    log("=" * 60)
+    if not regressions:
+        log("✅ 未发现耗时回归")
+        return 0
+
+    for r in regressions:
+        log(f"❌ {r['suite']}.{r['name']}: {r['latest_ms']:.0f}ms vs 基线 {r['baseline_ms']:.0f}ms "
+            f"(×{r['ratio']}, {r['samples']} 次样本)", "WARN")
+    log("=" * 60)
+    log(f"共 {len(regressions)} 个步骤耗时回归")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
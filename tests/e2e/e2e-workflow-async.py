@@ -0,0 +1,308 @@
+"""
+晨读营端到端业务流程 E2E 测试（asyncio 并发版）
+小程序、测试数据准备、管理后台三条线同时推进：
+- 管理后台的打开与登录不再等待小程序流程结束
+- 每个管理后台验证步骤只等待对应的用户侧事件（报名 / 支付 / 打卡完成）
+整体耗时收缩到真实数据依赖构成的关键路径
+
+报名、支付、打卡数据通过 API 准备（同 E2E_SEED_MODE=api）；需要在小程序中逐步点击创建数据时请使用 e2e-workflow.py
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+from support.auth_state import ensure_admin_state_async
+from support.screenshots import ScreenshotPipeline
+from support.results import StepRecorder, StepResult, persist_run
+from support.scheduler import SATISFIED
+from support.seeding import DataSeeder
+
+# 配置
+MINIPROGRAM_DEVTOOLS_URL = os.getenv("MINIPROGRAM_DEVTOOLS_URL", "http://127.0.0.1:9222")
+ADMIN_URL = os.getenv("ADMIN_URL", "http://localhost:5173")
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123456")
+SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/workflow")
+SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+# 测试数据
+TEST_USER_EMAIL = f"test_user_{int(time.time())}@example.com"
+
+# DataSeeder 的回调事件，只用于调度，不计入测试结果
+SEED_EVENTS = ("seed_enrollment", "seed_payment", "seed_checkin")
+
+ROW_SELECTOR = 'tbody tr, [role="row"]'
+
+
+class AsyncWorkflowTester:
+    def __init__(self):
+        self.p = None
+        self.admin_browser = None
+        self.admin_page = None
+        self.miniprogram_page = None
+        self.admin_state_injected = False
+        self.admin_login_error = None
+        self.shots = ScreenshotPipeline(SCREENSHOT_DIR, log=self.log)
+        self.test_results = StepRecorder("workflow-async")
+        # 步骤名 → 完成事件与状态；数据准备的中间事件（seed_enrollment 等）也按步骤处理
+        self.done = defaultdict(asyncio.Event)
+        self.status = {}
+        # 因前置步骤未通过而跳过的步骤：SKIPPED 本身算满足依赖，被阻塞的跳过不能算
+        self.blocked = set()
+        self.test_data = {
+            "user_email": TEST_USER_EMAIL,
+            "nickname": None,
+            "enrollment_id": None,
+            "payment_id": None,
+            "checkin_id": None,
+            "seed": None
+        }
+
+    def log(self, message: str, level: str = "INFO"):
+        """日志输出"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}")
+
+    async def screenshot(self, page, name: str):
+        """保存截图（按截图策略过滤，后台线程编码写盘）"""
+        try:
+            return await self.shots.capture_async(page, name)
+        except Exception as e:
+            self.log(f"⚠️ 截图失败: {str(e)}", "WARN")
+            return None
+
+    def signal(self, name: str, status: str):
+        """标记事件完成并唤醒等待它的步骤"""
+        self.status[name] = status
+        self.done[name].set()
+
+    def finish(self, name: str, status: str, message: str, started: float, attachments=()):
+        """记录步骤结果；并发步骤各自计时，不经过 StepRecorder.begin"""
+        self.test_results.append(StepResult(
+            name=name, status=status, message=message, started_at=started, ended_at=time.time(),
+            attachments=[str(a) for a in attachments if a],
+        ))
+        self.signal(name, status)
+
+    async def run_step(self, name: str, fn, depends_on=()):
+        """等待依赖完成后执行步骤；任一依赖未通过时直接跳过"""
+        for dep in depends_on:
+            await self.done[dep].wait()
+        blocked = [dep for dep in depends_on if dep in self.blocked or self.status.get(dep) not in SATISFIED]
+        if blocked:
+            self.log(f"⏭️ 跳过 {name}: 前置步骤 {', '.join(blocked)} 未通过", "WARN")
+            self.blocked.add(name)
+            self.finish(name, "SKIPPED", f"Blocked by {', '.join(blocked)}", time.time())
+            return
+
+        started = time.time()
+        try:
+            status, message, attachments = await fn()
+        except Exception as e:
+            self.log(f"❌ {name} 失败: {str(e)}", "ERROR")
+            status, message, attachments = "FAILED", str(e), ()
+        self.finish(name, status, message, started, attachments)
+
+    # ========== 小程序 ==========
+
+    async def setup_miniprogram(self):
+        self.log("🔗 连接小程序开发工具...")
+        browser = await self.p.chromium.connect_over_cdp(MINIPROGRAM_DEVTOOLS_URL, timeout=10000)
+        if not browser.contexts or not browser.contexts[0].pages:
+            raise Exception("未找到活跃页面")
+        self.miniprogram_page = browser.contexts[0].pages[0]
+        self.log("✅ 小程序已连接")
+        return "PASSED", "Connected", ()
+
+    async def miniprogram_login(self):
+        self.log("=== 小程序微信登录 ===")
+        page = self.miniprogram_page
+        await page.wait_for_load_state("networkidle", timeout=5000)
+        shots = [await self.screenshot(page, "01-miniprogram-home")]
+        login_button = page.locator('button:has-text("微信登录")')
+        if await login_button.is_visible():
+            await login_button.click()
+            await page.wait_for_load_state("networkidle", timeout=5000)
+            shots.append(await self.screenshot(page, "01-login-dialog"))
+            self.log("✅ 微信登录对话已打开")
+        else:
+            self.log("⚠️ 可能已登录")
+        return "PASSED", "Login initiated", shots
+
+    # ========== 测试数据 ==========
+
+    async def seed_data(self):
+        """在线程中通过 API 准备数据，报名/支付/打卡各自完成时立即通知管理后台验证"""
+        loop = asyncio.get_running_loop()
+
+        def on_event(name, data):
+            loop.call_soon_threadsafe(self.signal, f"seed_{name}", "PASSED")
+
+        self.test_data["nickname"] = TEST_USER_EMAIL.split("@")[0]
+        try:
+            seed = await asyncio.to_thread(DataSeeder(TEST_USER_EMAIL, log=self.log).seed, on_event)
+        finally:
+            # 中途失败时，尚未完成的事件标记为失败，避免下游一直等待
+            for name in SEED_EVENTS:
+                if not self.done[name].is_set():
+                    self.signal(name, "FAILED")
+        self.test_data.update({
+            "enrollment_id": seed["enrollment_id"],
+            "payment_id": seed["payment_id"],
+            "checkin_id": seed["checkin_id"],
+            "seed": seed,
+        })
+        return "PASSED", f"Seeded in {seed['elapsed_ms']:.0f}ms", ()
+
+    # ========== 管理后台 ==========
+
+    async def setup_admin_portal(self):
+        self.log("🔗 打开管理后台...")
+        self.admin_browser = await self.p.chromium.launch()
+        # 登录与登录态缓存由 support/auth_state.py 负责，与 e2e-workflow.py 共用同一份登录态
+        storage_state = None
+        try:
+            storage_state = await ensure_admin_state_async(self.admin_browser, ADMIN_URL, ADMIN_EMAIL,
+                                                           ADMIN_PASSWORD, log=self.log)
+        except Exception as e:
+            self.admin_login_error = str(e)
+            self.log(f"⚠️ 无法获取登录态: {str(e)}", "WARN")
+        context = await self.admin_browser.new_context(storage_state=storage_state)
+        self.admin_page = await context.new_page()
+        self.admin_state_injected = storage_state is not None
+        self.log("✅ 管理后台已打开")
+        return "PASSED", "Opened", ()
+
+    async def admin_login(self):
+        self.log("=== 管理后台登录 ===")
+        if self.admin_state_injected:
+            self.log("⏭️ 已注入保存的登录态，跳过登录界面")
+            return "SKIPPED", "Reused stored auth state", ()
+        self.log(f"❌ 管理后台登录失败: {self.admin_login_error}", "ERROR")
+        return "FAILED", f"Admin login failed: {self.admin_login_error}", ()
+
+    async def find_seeded_row(self, rows):
+        nickname = self.test_data["nickname"]
+        for row in rows:
+            if nickname and nickname in (await row.text_content() or ""):
+                return row
+        return None
+
+    async def verify_list(self, label: str, path: str, shot_name: str, require_text=None):
+        """打开列表页，在表格中查找测试用户的记录"""
+        page = self.admin_page
+        await page.goto(f"{ADMIN_URL}/{path}", wait_until="networkidle")
+        shot = await self.screenshot(page, shot_name)
+        rows = await page.locator(ROW_SELECTOR).all()
+        row = await self.find_seeded_row(rows)
+        if row is None:
+            self.log(f"⚠️ 列表中未找到测试用户的{label}记录", "WARN")
+            return "PARTIAL", f"Seeded {path} not listed", (shot,)
+        if require_text and not any(t in (await row.text_content() or "") for t in require_text):
+            return "PARTIAL", f"Seeded {path} found without expected status", (shot,)
+        self.log(f"✅ {label}记录已验证")
+        return "PASSED", f"{label} verified", (shot,)
+
+    async def admin_verify_enrollment(self):
+        self.log("=== 管理后台验证报名记录 ===")
+        return await self.verify_list("报名", "enrollments", "admin-03-enrollments")
+
+    async def admin_verify_payment(self):
+        self.log("=== 管理后台验证支付记录 ===")
+        return await self.verify_list("支付", "payments", "admin-04-payments", require_text=("已支付", "success"))
+
+    async def admin_verify_checkin(self):
+        self.log("=== 管理后台验证打卡记录 ===")
+        return await self.verify_list("打卡", "checkins", "admin-05-checkins")
+
+    # ========== 三条并发的执行线 ==========
+
+    async def miniprogram_lane(self):
+        await self.run_step("setup_miniprogram", self.setup_miniprogram)
+        await self.run_step("miniprogram_login", self.miniprogram_login, depends_on=("setup_miniprogram",))
+
+    async def seed_lane(self):
+        await self.run_step("seed_data", self.seed_data)
+
+    async def admin_lane(self):
+        # 管理后台只有一个页面，验证按用户侧事件到达的先后依次执行
+        await self.run_step("setup_admin_portal", self.setup_admin_portal)
+        await self.run_step("admin_login", self.admin_login, depends_on=("setup_admin_portal",))
+        await self.run_step("admin_verify_enrollment", self.admin_verify_enrollment,
+                            depends_on=("admin_login", "seed_enrollment"))
+        await self.run_step("admin_verify_payment", self.admin_verify_payment,
+                            depends_on=("admin_login", "seed_payment"))
+        await self.run_step("admin_verify_checkin", self.admin_verify_checkin,
+                            depends_on=("admin_login", "seed_checkin"))
+
+    def generate_report(self, wall_ms: float):
+        """生成最终报告；串行累计耗时与实际耗时之差即并发节省的时间"""
+        steps = self.test_results
+        passed = sum(1 for s in steps if s.status in ("PASSED", "PARTIAL"))
+        failed = sum(1 for s in steps if s.status == "FAILED")
+        skipped = sum(1 for s in steps if s.status == "SKIPPED")
+        serial_ms = sum(s.duration_ms for s in steps)
+
+        self.log("\n" + "=" * 70)
+        self.log("📊 端到端业务流程测试（并发）最终报告", "INFO")
+        self.log("=" * 70)
+        for i, step in enumerate(sorted(steps, key=lambda s: s.started_at), 1):
+            symbol = "✅" if step.status == "PASSED" else "❌" if step.status == "FAILED" else "⏭️"
+            self.log(f"{i}. {symbol} {step.name}: {step.status} ({step.duration_ms:.0f}ms)")
+        self.log(f"通过: {passed} | 失败: {failed} | 跳过: {skipped}")
+        self.log(f"⏱️ 实际耗时 {wall_ms / 1000:.1f}s，各步骤串行累计 {serial_ms / 1000:.1f}s")
+        self.log("=" * 70)
+
+        return {
+            "total": len(steps),
+            "passed": passed,
+            "failed": failed,
+            "skipped": skipped,
+            "wall_ms": round(wall_ms, 1),
+            "serial_ms": round(serial_ms, 1),
+            "test_data": self.test_data,
+            "screenshots": self.shots.summary()
+        }
+
+    async def run_all_tests(self):
+        """三条执行线并发运行"""
+        self.log("🚀 开始运行端到端业务流程自动化测试（并发模式）")
+        started = time.perf_counter()
+        async with async_playwright() as p:
+            self.p = p
+            try:
+                await asyncio.gather(self.miniprogram_lane(), self.seed_lane(), self.admin_lane())
+            except Exception as e:
+                self.log(f"❌ 测试运行出错: {str(e)}", "ERROR")
+            finally:
+                if self.admin_browser:
+                    await self.admin_browser.close()
+
+        report = self.generate_report((time.perf_counter() - started) * 1000)
+        self.test_results.resolve_attachments(self.shots.resolve)
+        persist_run(self.test_results, SCREENSHOT_DIR, metadata={"wall_ms": report["wall_ms"]}, log=self.log)
+        self.shots.close()
+        return report
+
+
+if __name__ == "__main__":
+    try:
+        tester = AsyncWorkflowTester()
+        report = asyncio.run(tester.run_all_tests())
+
+        report_file = SCREENSHOT_DIR / f"report_async_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 测试报告已保存: {report_file}")
+
+        sys.exit(0 if report["failed"] == 0 else 1)
+    except Exception as e:
+        print(f"❌ 无法启动 E2E 测试: {str(e)}")
+        sys.exit(1)
@@ -12,48 +12,63 @@ from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+from support.waits import WaitEngine
+from support.auth_state import ensure_admin_state
+from support.browser_server import open_browser
+from support.perf import PerfCollector
+from support.network import NetworkRecorder
+from support.base import BaseTester
+from support.scheduler import Step
+from support.seeding import DataSeeder
+
 # 配置
 MINIPROGRAM_DEVTOOLS_URL = os.getenv("MINIPROGRAM_DEVTOOLS_URL", "http://127.0.0.1:9222")
-ADMIN_URL = "https://wx.shubai01.com/admin"
+ADMIN_URL = os.getenv("ADMIN_URL", "http://localhost:5173")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123456")
 SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/workflow")
 SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+# api: 报名/支付/打卡数据通过后端 API 直接创建，界面只验证管理后台；ui: 在小程序中逐步点击创建
+SEED_MODE = os.getenv("E2E_SEED_MODE", "api")
 
 # 测试数据
 TEST_USER_EMAIL = f"test_user_{int(time.time())}@example.com"
 TEST_USER_PASSWORD = "TestPass123!"
 
 
-class E2EWorkflowTester:
+class E2EWorkflowTester(BaseTester):
+    SUITE = "workflow"
+    TITLE = "端到端业务流程测试最终报告"
+    SCREENSHOT_DIR = SCREENSHOT_DIR
+
     def __init__(self):
-        self.p = sync_playwright().start()
+        super().__init__()
+        self.p = None
         self.admin_page = None
+        self.admin_browser = None
         self.miniprogram_page = None
-        self.test_results = []
+        self.mp_waits = None
+        self.admin_waits = None
+        self.admin_state_injected = False
+        self.perf = PerfCollector(log=self.log)
+        self.network = NetworkRecorder(log=self.log)
         self.test_data = {
             "user_email": TEST_USER_EMAIL,
             "user_password": TEST_USER_PASSWORD,
             "enrollment_id": None,
             "payment_id": None,
-            "checkin_records": []
+            "checkin_records": [],
+            "seed": None
         }
 
-    def log(self, message: str, level: str = "INFO"):
-        """日志输出"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] [{level}] {message}")
+    def setup(self):
+        """小程序与管理后台的连接都作为步骤执行，这里只启动 Playwright"""
+        super().setup()
+        self.p = sync_playwright().start()
 
     def screenshot(self, page, name: str):
-        """保存截图"""
-        try:
-            path = SCREENSHOT_DIR / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            page.screenshot(path=str(path), full_page=True)
-            self.log(f"📸 {name} 已保存", "DEBUG")
-            return path
-        except Exception as e:
-            self.log(f"⚠️ 截图失败: {str(e)}", "WARN")
-            return None
+        """保存指定页面的截图"""
+        return self.capture(page, name)
 
     # ========== 第一部分：小程序测试 ==========
 
@@ -68,6 +83,8 @@ class E2EWorkflowTester:
             contexts = browser.contexts
             if contexts and contexts[0].pages:
                 self.miniprogram_page = contexts[0].pages[0]
+                self.network.attach(contexts[0])
+                self.mp_waits = WaitEngine(self.miniprogram_page, self.log, on_record=self.test_results.phase)
                 self.log("✅ 小程序已连接")
                 return True
             else:
@@ -87,8 +104,7 @@ class E2EWorkflowTester:
             login_button = self.miniprogram_page.locator('button:has-text("微信登录")')
             if login_button.is_visible():
                 self.log("📍 点击微信登录...")
-                login_button.click()
-                self.miniprogram_page.wait_for_timeout(2000)
+                self.mp_waits.for_settled("miniprogram_login", login_button.click)
                 self.screenshot(self.miniprogram_page, "01-login-dialog")
                 self.log("✅ 微信登录对话已打开")
             else:
@@ -112,10 +128,9 @@ class E2EWorkflowTester:
             for button in nav_buttons:
                 if "报名" in button.text_content():
                     self.log("📍 点击报名导航...")
-                    button.click()
+                    self.mp_waits.for_settled("enrollment_nav", button.click)
                     break
 
-            self.miniprogram_page.wait_for_timeout(2000)
             self.screenshot(self.miniprogram_page, "02-enrollment-page")
 
             # 查找可报名的期次
@@ -123,23 +138,27 @@ class E2EWorkflowTester:
             if enrollment_buttons:
                 self.log(f"📍 找到 {len(enrollment_buttons)} 个报名按钮，点击第一个...")
                 enrollment_buttons[0].click()
-                self.miniprogram_page.wait_for_timeout(2000)
+                self.mp_waits.for_selector(
+                    "enrollment_form",
+                    'input, button:has-text("确认"), button:has-text("提交")',
+                    budget_ms=3000,
+                )
                 self.screenshot(self.miniprogram_page, "02-enrollment-form")
 
                 # 模拟填写表单（如果有）
                 inputs = self.miniprogram_page.locator('input').all()
                 if inputs:
                     self.log(f"📝 找到 {len(inputs)} 个输入框")
-                    # 填写第一个输入框（通常是期次选择）
+                    # 填写第一个输入框（通常是期次选择），click 自带可操作性等待
                     inputs[0].click()
-                    self.miniprogram_page.wait_for_timeout(500)
 
                 # 查找确认按钮
                 confirm_button = self.miniprogram_page.locator('button:has-text("确认"), button:has-text("提交")').first
                 if confirm_button.is_visible():
                     self.log("📍 点击确认按钮...")
-                    confirm_button.click()
-                    self.miniprogram_page.wait_for_load_state("networkidle", timeout=5000)
+                    self.mp_waits.for_response(
+                        "enrollment_submit", confirm_button.click, "/enrollments", method="POST"
+                    )
                     self.screenshot(self.miniprogram_page, "02-enrollment-success")
 
             self.log("✅ 报名流程完成")
@@ -161,8 +180,9 @@ class E2EWorkflowTester:
 
             if payment_buttons:
                 self.log(f"📍 找到支付按钮，点击第一个...")
-                payment_buttons[0].click()
-                self.miniprogram_page.wait_for_timeout(2000)
+                self.mp_waits.for_response(
+                    "payment_create", payment_buttons[0].click, "/payments", method="POST"
+                )
                 self.screenshot(self.miniprogram_page, "03-payment-dialog")
                 self.log("✅ 支付对话已打开（实际支付需要真实支付环境）")
             else:
@@ -186,18 +206,18 @@ class E2EWorkflowTester:
             for button in nav_buttons:
                 if "打卡" in button.text_content():
                     self.log("📍 点击打卡导航...")
-                    button.click()
+                    self.mp_waits.for_settled("checkin_nav", button.click)
                     break
 
-            self.miniprogram_page.wait_for_timeout(2000)
             self.screenshot(self.miniprogram_page, "04-checkin-page")
 
             # 查找打卡按钮
             checkin_button = self.miniprogram_page.locator('button:has-text("打卡"), button:has-text("今日打卡")').first
             if checkin_button.is_visible():
                 self.log("📍 点击打卡按钮...")
-                checkin_button.click()
-                self.miniprogram_page.wait_for_load_state("networkidle", timeout=3000)
+                self.mp_waits.for_response(
+                    "checkin_submit", checkin_button.click, "/checkins", method="POST"
+                )
                 self.screenshot(self.miniprogram_page, "04-checkin-success")
                 self.log("✅ 打卡成功")
                 self.test_data["checkin_records"].append({
@@ -216,16 +236,61 @@ class E2EWorkflowTester:
             self.test_results.append(("miniprogram_checkin", "FAILED", str(e)))
             return False
 
+    def seed_data(self):
+        """通过 API 准备报名、支付、打卡数据，替代小程序中的逐步点击"""
+        self.log("=== 准备测试数据（API） ===")
+        try:
+            seed = DataSeeder(self.test_data["user_email"], log=self.log).seed()
+            self.test_data.update({
+                "enrollment_id": seed["enrollment_id"],
+                "payment_id": seed["payment_id"],
+                "seed": seed,
+            })
+            self.test_data["checkin_records"].append({
+                "timestamp": datetime.now().isoformat(),
+                "status": "seeded",
+                "checkin_id": seed["checkin_id"]
+            })
+            self.test_results.append(("seed_data", "PASSED", f"Seeded in {seed['elapsed_ms']:.0f}ms"))
+            return True
+        except Exception as e:
+            self.log(f"❌ 测试数据准备失败: {str(e)}", "ERROR")
+            self.test_results.append(("seed_data", "FAILED", str(e)))
+            return False
+
+    def find_seeded_row(self, rows):
+        """在表格行中查找 API 准备的测试用户，未使用 API 准备数据时返回 None"""
+        seed = self.test_data["seed"]
+        if not seed or not seed.get("nickname"):
+            return None
+        for row in rows:
+            if seed["nickname"] in row.text_content():
+                return row
+        return False
+
     # ========== 第二部分：管理后台验证 ==========
 
     def setup_admin_portal(self):
         """打开管理后台"""
         self.log("🔗 打开管理后台...")
         try:
-            browser = self.p.chromium.launch()
-            self.admin_page = browser.new_page()
-            self.admin_page.goto(ADMIN_URL, wait_until="networkidle")
-            self.screenshot(self.admin_page, "admin-01-login")
+            browser = self.admin_browser = open_browser(self.p, log=self.log)
+            # 复用 admin-ui.py 保存的登录态，登录测试只在 admin-ui.py 中进行
+            storage_state = None
+            try:
+                storage_state = ensure_admin_state(browser, ADMIN_URL, ADMIN_EMAIL, ADMIN_PASSWORD, log=self.log)
+            except Exception as e:
+                self.log(f"⚠️ 无法获取登录态，改为界面登录: {str(e)}", "WARN")
+
+            context = browser.new_context(storage_state=storage_state)
+            PerfCollector.install(context)
+            self.network.attach(context)
+            self.admin_page = context.new_page()
+            self.admin_waits = WaitEngine(self.admin_page, self.log, on_record=self.test_results.phase)
+            self.admin_state_injected = storage_state is not None
+            if not self.admin_state_injected:
+                self.admin_page.goto(ADMIN_URL, wait_until="networkidle")
+                self.screenshot(self.admin_page, "admin-01-login")
             self.log("✅ 管理后台已打开")
             return True
         except Exception as e:
@@ -235,6 +300,11 @@ class E2EWorkflowTester:
     def test_admin_login(self):
         """步骤 5: 管理后台登录"""
         self.log("=== 步骤 5: 管理后台登录 ===")
+        if self.admin_state_injected:
+            self.log("⏭️ 已注入保存的登录态，跳过登录界面")
+            self.test_results.append(("admin_login", "SKIPPED", "Reused stored auth state"))
+            return True
+
         try:
             # 检查是否已登录
             try:
@@ -248,8 +318,13 @@ class E2EWorkflowTester:
             # 执行登录
             self.admin_page.locator('input[type="email"]').fill(ADMIN_EMAIL)
             self.admin_page.locator('input[type="password"]').fill(ADMIN_PASSWORD)
-            self.admin_page.locator('button:has-text("登录")').click()
-            self.admin_page.wait_for_load_state("networkidle")
+            self.admin_waits.for_response(
+                "admin_login",
+                self.admin_page.locator('button:has-text("登录")').click,
+                "/auth/admin/login",
+                method="POST",
+            )
+            self.admin_waits.for_settled("admin_dashboard", url_part="/api/v1")
             self.screenshot(self.admin_page, "admin-02-dashboard")
             self.log("✅ 管理后台登录成功")
             self.test_results.append(("admin_login", "PASSED", "Admin login successful"))
@@ -267,19 +342,24 @@ class E2EWorkflowTester:
         try:
             # 导航到报名管理页面
             self.admin_page.goto(f"{ADMIN_URL}/enrollments", wait_until="networkidle")
+            self.perf.capture(self.admin_page, "enrollments")
             self.screenshot(self.admin_page, "admin-03-enrollments")
 
             # 检查是否有新的报名记录
             rows = self.admin_page.locator('tbody tr, [role="row"]').all()
+            seeded_row = self.find_seeded_row(rows)
+            if seeded_row is False:
+                self.log("⚠️ 列表中未找到 API 创建的报名记录", "WARN")
+                self.test_results.append(("admin_verify_enrollment", "PARTIAL", "Seeded enrollment not listed"))
+                return True
             if rows:
                 self.log(f"✓ 找到 {len(rows)} 条报名记录")
-                # 检查最新的记录（通常在顶部）
-                first_row = rows[0]
-                first_row.click()
+                # 检查测试用户的记录，没有准备数据时检查最新的记录（通常在顶部）
+                (seeded_row or rows[0]).click()
                 self.admin_page.wait_for_load_state("networkidle")
                 self.screenshot(self.admin_page, "admin-03-enrollment-detail")
                 self.log("✅ 报名记录已验证")
-                self.test_data["enrollment_id"] = "verified"
+                self.test_data["enrollment_id"] = self.test_data["enrollment_id"] or "verified"
             else:
                 self.log("⚠️ 未找到报名记录")
 
@@ -298,18 +378,24 @@ class E2EWorkflowTester:
         try:
             # 导航到支付管理页面
             self.admin_page.goto(f"{ADMIN_URL}/payments", wait_until="networkidle")
+            self.perf.capture(self.admin_page, "payments")
             self.screenshot(self.admin_page, "admin-04-payments")
 
             # 检查支付记录
             rows = self.admin_page.locator('tbody tr, [role="row"]').all()
+            seeded_row = self.find_seeded_row(rows)
+            if seeded_row is False:
+                self.log("⚠️ 列表中未找到 API 创建的支付记录", "WARN")
+                self.test_results.append(("admin_verify_payment", "PARTIAL", "Seeded payment not listed"))
+                return True
             if rows:
                 self.log(f"✓ 找到 {len(rows)} 条支付记录")
-                # 检查最新的支付记录
-                for row in rows[:3]:  # 检查前3条
+                # 检查测试用户的支付记录，没有准备数据时检查最新的前3条
+                for row in [seeded_row] if seeded_row else rows[:3]:
                     text = row.text_content()
                     if "已支付" in text or "success" in text.lower():
                         self.log("✓ 发现成功支付的记录")
-                        self.test_data["payment_id"] = "verified"
+                        self.test_data["payment_id"] = self.test_data["payment_id"] or "verified"
                         break
             else:
                 self.log("⚠️ 未找到支付记录")
@@ -329,10 +415,15 @@ class E2EWorkflowTester:
         try:
             # 导航到打卡管理页面
             self.admin_page.goto(f"{ADMIN_URL}/checkins", wait_until="networkidle")
+            self.perf.capture(self.admin_page, "checkins")
             self.screenshot(self.admin_page, "admin-05-checkins")
 
             # 检查打卡记录
             rows = self.admin_page.locator('tbody tr, [role="row"]').all()
+            if self.find_seeded_row(rows) is False:
+                self.log("⚠️ 列表中未找到 API 创建的打卡记录", "WARN")
+                self.test_results.append(("admin_verify_checkin", "PARTIAL", "Seeded checkin not listed"))
+                return True
             if rows:
                 self.log(f"✓ 找到 {len(rows)} 条打卡记录")
                 self.log("✅ 打卡记录已验证")
@@ -348,88 +439,107 @@ class E2EWorkflowTester:
             self.test_results.append(("admin_verify_checkin", "FAILED", str(e)))
             return False
 
-    def generate_report(self):
-        """生成最终报告"""
-        self.log("\n" + "=" * 70)
-        self.log("📊 端到端业务流程测试最终报告", "INFO")
-        self.log("=" * 70)
-
-        passed = sum(1 for _, status, _ in self.test_results if status == "PASSED")
-        failed = sum(1 for _, status, _ in self.test_results if status == "FAILED")
-        skipped = sum(1 for _, status, _ in self.test_results if status == "SKIPPED")
-
-        self.log("\n📋 测试步骤结果:")
-        for i, (test_name, status, message) in enumerate(self.test_results, 1):
-            symbol = "✅" if status == "PASSED" else "❌" if status == "FAILED" else "⏭️"
-            self.log(f"{i}. {symbol} {test_name}: {status}")
-
-        self.log("\n📊 统计信息:")
-        self.log(f"总计: {len(self.test_results)} 个测试步骤")
-        self.log(f"通过: {passed} | 失败: {failed} | 跳过: {skipped}")
-        total_valid = len(self.test_results) - skipped
-        success_rate = (passed / total_valid * 100) if total_valid > 0 else 0
-        self.log(f"成功率: {success_rate:.1f}%")
-
+    def check_perf_budgets(self):
+        """把管理后台页面性能预算检查作为一个测试步骤记录，超标即失败"""
+        summary = self.perf.summary()
+        if not summary["pages"]:
+            return
+        violations = summary["violations"]
+        if violations:
+            details = "; ".join(f"{v['page']}.{v['metric']}={v['value']} > {v['budget']}" for v in violations)
+            self.log(f"❌ 性能预算超标: {details}", "ERROR")
+            self.test_results.append(("perf_budgets", "FAILED", details))
+        else:
+            self.test_results.append(("perf_budgets", "PASSED", f"{len(summary['pages'])} pages within budget"))
+
+    def log_details(self):
         self.log("\n📦 测试数据记录:")
         self.log(f"用户邮箱: {self.test_data['user_email']}")
         self.log(f"报名状态: {self.test_data['enrollment_id']}")
         self.log(f"支付状态: {self.test_data['payment_id']}")
         self.log(f"打卡记录: {len(self.test_data['checkin_records'])} 条")
 
-        self.log(f"\n📸 截图位置: {SCREENSHOT_DIR}")
-        self.log("=" * 70)
-
+        for engine in (self.mp_waits, self.admin_waits):
+            if engine:
+                engine.log_summary()
+        self.network.log_summary()
+        self.network.save_traffic("e2e-workflow")
+
+    def report_extras(self):
+        waits = {}
+        for label, engine in (("miniprogram", self.mp_waits), ("admin", self.admin_waits)):
+            if engine:
+                waits[label] = engine.summary()
         return {
-            "total": len(self.test_results),
-            "passed": passed,
-            "failed": failed,
-            "skipped": skipped,
-            "success_rate": success_rate,
-            "test_data": self.test_data
+            "test_data": self.test_data,
+            "waits": waits,
+            "perf": self.perf.summary(),
+            "network": self.network.summary(),
         }
 
-    def run_all_tests(self):
-        """运行完整的端到端测试"""
+    def build_steps(self):
+        """小程序流程与管理后台验证的步骤及依赖关系；前置步骤失败时依赖步骤直接跳过"""
+        if SEED_MODE == "api":
+            # 数据由 API 准备，小程序只保留登录这段用户旅程
+            enrollment = payment = checkin = "seed_data"
+            data_steps = [Step("seed_data", self.seed_data, tags=("seed",))]
+        else:
+            enrollment, payment, checkin = "miniprogram_enrollment", "miniprogram_payment", "miniprogram_checkin"
+            data_steps = [
+                Step("miniprogram_enrollment", self.test_miniprogram_enrollment, depends_on=("miniprogram_login",),
+                     tags=("enrollment",)),
+                Step("miniprogram_payment", self.test_miniprogram_payment, depends_on=("miniprogram_enrollment",),
+                     tags=("payment",)),
+                Step("miniprogram_checkin", self.test_miniprogram_checkin, depends_on=("miniprogram_enrollment",),
+                     tags=("checkin",)),
+            ]
+        return [
+            # 第一部分：小程序流程
+            Step("setup_miniprogram", self.setup_miniprogram),
+            Step("miniprogram_login", self.test_miniprogram_login, depends_on=("setup_miniprogram",),
+                 tags=("auth",)),
+            *data_steps,
+            # 第二部分：管理后台验证
+            Step("setup_admin_portal", self.setup_admin_portal),
+            Step("admin_login", self.test_admin_login, depends_on=("setup_admin_portal",), tags=("auth",)),
+            Step("admin_verify_enrollment", self.test_admin_verify_enrollment,
+                 depends_on=("admin_login", enrollment), tags=("enrollment",)),
+            Step("admin_verify_payment", self.test_admin_verify_payment,
+                 depends_on=("admin_login", payment), tags=("payment",)),
+            Step("admin_verify_checkin", self.test_admin_verify_checkin,
+                 depends_on=("admin_login", checkin), tags=("checkin",)),
+        ]
+
+    def run_all_tests(self, only=None):
+        """运行完整的端到端测试；only 为步骤名集合时只运行这些步骤及其依赖"""
         self.log("🚀 开始运行端到端业务流程自动化测试")
         self.log("=" * 70)
+        self.setup()
 
         try:
-            # 第一部分：小程序流程
-            if self.setup_miniprogram():
-                self.test_miniprogram_login()
-                self.test_miniprogram_enrollment()
-                self.test_miniprogram_payment()
-                self.test_miniprogram_checkin()
-            else:
-                self.log("❌ 无法继续，小程序连接失败")
-
-            # 第二部分：管理后台验证
-            if self.setup_admin_portal():
-                self.test_admin_login()
-                self.test_admin_verify_enrollment()
-                self.test_admin_verify_payment()
-                self.test_admin_verify_checkin()
-            else:
-                self.log("❌ 无法继续，管理后台连接失败")
-
+            self.run_steps(
+                self.select_steps(self.build_steps(), only),
+                on_start=lambda step: self.network.set_step(step.name),
+            )
         except Exception as e:
             self.log(f"❌ 测试运行出错: {str(e)}", "ERROR")
 
+        self.check_perf_budgets()
         report = self.generate_report()
+        self.persist()
         self.cleanup()
         return report
 
-    def cleanup(self):
-        """清理资源"""
-        try:
-            if self.miniprogram_page:
-                self.miniprogram_page.close()
-            if self.admin_page:
-                self.admin_page.close()
+    def release(self):
+        if self.miniprogram_page:
+            self.miniprogram_page.close()
+        if self.admin_page:
+            self.admin_page.close()
+        if self.admin_browser:
+            # 连接常驻浏览器时只断开连接，并关闭本次创建的上下文
+            self.admin_browser.close()
+        if self.p:
             self.p.stop()
-            self.log("\n✅ 资源已清理")
-        except:
-            pass
 
 
 if __name__ == "__main__":
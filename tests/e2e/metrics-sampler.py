@@ -0,0 +1,102 @@
+"""
+晨读营后端监控采样
+在任意测试、压测或基准运行期间独立采样后端监控接口，并把外部记录的阶段标记与采样对齐
+
+    python tests/e2e/metrics-sampler.py record --duration 600          # 前台采样，Ctrl+C 结束
+    python tests/e2e/metrics-sampler.py mark DIR warmup --start 1700000000 --end 1700000060
+    python tests/e2e/metrics-sampler.py report DIR                     # 输出各标记区间的后端状态
+
+测试套件设置 E2E_METRICS=1 时会自动采样，并把每个步骤记为标记，无需单独运行本脚本
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from support.metrics import (
+    MetricsSampler, read_series, correlate, METRICS_API_URL, METRICS_INTERVAL_S, METRICS_DIR,
+)
+from support.base import STATUS_SYMBOLS
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}")
+
+
+def record(args):
+    sampler = MetricsSampler(api_url=args.api, interval_s=args.interval, out_dir=Path(args.out), label=args.label,
+                             log=log)
+    sampler.login().start()
+    print(f"📈 采样中: {sampler.directory}（Ctrl+C 结束）")
+    deadline = time.time() + args.duration if args.duration else None
+    try:
+        while deadline is None or time.time() < deadline:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    sampler.stop()
+    summary = sampler.summary()
+    sampler.log_summary(summary)
+    print(f"\n💾 采样已保存: {sampler.directory}")
+    return 0
+
+
+def mark(args):
+    directory = Path(args.directory)
+    if not (directory / "schema.json").exists():
+        print(f"❌ {directory} 不是采样目录")
+        return 1
+    end = args.end or time.time()
+    event = {"label": args.label, "kind": args.kind, "status": None, "start": args.start or end, "end": end}
+    with open(directory / "markers.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    return 0
+
+
+def report(args):
+    directory = Path(args.directory)
+    schema = json.loads((directory / "schema.json").read_text(encoding="utf-8"))
+    series, markers, alerts = read_series(directory)
+    results = correlate(series, markers, alerts, schema.get("interval_s", METRICS_INTERVAL_S))
+    print(f"📈 {directory}: {len(series['t'])} 个采样，{len(markers)} 个标记，{len(alerts)} 条告警")
+    for result in results:
+        symbol = STATUS_SYMBOLS.get(result["status"], "•")
+        print(f"{symbol} {result['label']:<28} {result['duration_ms']:>9.0f}ms | "
+              f"/live 最大 {result['live_ms_max'] or '-':>7} | RSS {result['rss_mb_max'] or '-':>7}MB | "
+              f"堆 {result['heap_used_mb_max'] or '-':>7}MB | 错误率 {result['minute_error_rate_max'] or '-'} | "
+              f"未就绪 {result['not_ready_samples']} | 告警 {len(result['alerts'])}")
+    report_file = directory / "report.json"
+    report_file.write_text(json.dumps({"markers": results, "alerts": alerts}, indent=2, ensure_ascii=False),
+                           encoding="utf-8")
+    print(f"\n💾 对齐结果已保存: {report_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营后端监控采样")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="前台采样")
+    record_parser.add_argument("--api", default=METRICS_API_URL, help="后端 API 地址")
+    record_parser.add_argument("--interval", type=float, default=METRICS_INTERVAL_S, help="采样间隔（秒）")
+    record_parser.add_argument("--duration", type=float, default=0, help="采样时长（秒），0 表示直到 Ctrl+C")
+    record_parser.add_argument("--label", default="manual", help="采样目录名中的标签")
+    record_parser.add_argument("--out", default=str(METRICS_DIR), help="输出目录")
+
+    mark_parser = commands.add_parser("mark", help="追加一个时间区间标记")
+    mark_parser.add_argument("directory", help="采样目录")
+    mark_parser.add_argument("label", help="标记名")
+    mark_parser.add_argument("--start", type=float, help="开始时间（epoch 秒），默认与结束时间相同")
+    mark_parser.add_argument("--end", type=float, help="结束时间（epoch 秒），默认当前时间")
+    mark_parser.add_argument("--kind", default="phase", help="标记类型")
+
+    report_parser = commands.add_parser("report", help="按标记区间输出后端状态")
+    report_parser.add_argument("directory", help="采样目录")
+
+    args = parser.parse_args()
+    sys.exit({"record": record, "mark": mark, "report": report}[args.command](args))
@@ -8,23 +8,50 @@ import os
 import sys
 import time
 import json
-from datetime import datetime
+import argparse
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+from support.waits import WaitEngine
+from support.base import BaseTester
+from support.scheduler import Step
+from support.diagnostics import DiagnosticsCollector
+from support.tracing import PageProfiler, PROFILE_ENABLED
+
 # 配置
 MINIPROGRAM_DEVTOOLS_URL = os.getenv("MINIPROGRAM_DEVTOOLS_URL", "http://127.0.0.1:9222")
 SCREENSHOT_DIR = Path("/tmp/e2e-screenshots/miniprogram")
 SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-class MiniProgramUITester:
-    def __init__(self):
-        self.p = sync_playwright().start()
+# 剖析模式下逐页采集 trace 的页面测试
+PROFILED_STEPS = ("home_page", "enrollment_page", "checkin_page", "insights_page")
+
+
+class MiniProgramUITester(BaseTester):
+    SUITE = "miniprogram"
+    TITLE = "小程序 E2E 测试结果报告"
+    SCREENSHOT_DIR = SCREENSHOT_DIR
+
+    def __init__(self, profile: bool = PROFILE_ENABLED):
+        super().__init__()
+        self.p = None
         self.browser = None
         self.page = None
-        self.test_results = []
+        self.waits = None
+        self.profile = profile
+        self.profiler = None
+        self.diagnostics = DiagnosticsCollector(log=self.log)
+
+    def setup(self):
+        """连接微信开发工具，并在连接后立即开始收集诊断信息，覆盖整个测试会话"""
+        super().setup()
+        self.p = sync_playwright().start()
         self.setup_browser()
+        self.waits = WaitEngine(self.page, self.log, on_record=self.test_results.phase)
+        self.diagnostics.attach(self.page.context)
+        if self.profile:
+            self.profiler = PageProfiler(self.browser, self.page, SCREENSHOT_DIR / "traces", log=self.log)
 
     def setup_browser(self):
         """连接到微信开发工具的调试端口"""
@@ -53,21 +80,9 @@ class MiniProgramUITester:
             self.log("  3. 调试模式已启用", "INFO")
             raise
 
-    def log(self, message: str, level: str = "INFO"):
-        """日志输出"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] [{level}] {message}")
-
     def screenshot(self, name: str):
-        """保存截图"""
-        try:
-            path = SCREENSHOT_DIR / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            self.page.screenshot(path=str(path), full_page=True)
-            self.log(f"📸 截图已保存: {path}", "DEBUG")
-            return path
-        except Exception as e:
-            self.log(f"⚠️ 截图失败: {str(e)}", "WARN")
-            return None
+        """保存当前页面截图"""
+        return self.capture(self.page, name)
 
     def wait_for_element(self, selector: str, timeout: int = 5000, name: str = ""):
         """等待元素出现"""
@@ -139,8 +154,7 @@ class MiniProgramUITester:
 
             # 点击登录按钮
             self.log("📍 点击微信登录按钮...")
-            login_button.click()
-            self.page.wait_for_timeout(2000)  # 等待登录弹窗出现
+            self.waits.for_settled("weixin_login", login_button.click)  # 等待登录弹窗相关请求结束
             self.screenshot("03-weixin-login-popup")
 
             # 注意：实际的微信授权流程需要用户交互，这里只能验证按钮可点击
@@ -165,14 +179,13 @@ class MiniProgramUITester:
             for button in nav_buttons:
                 if "报名" in button.text_content():
                     self.log("📍 点击报名导航...")
-                    button.click()
+                    self.waits.for_settled("enrollment_nav", button.click)
                     enrollment_found = True
                     break
 
             if not enrollment_found:
                 self.log("⚠️ 未找到报名导航，尝试直接检查页面", "WARN")
 
-            self.page.wait_for_timeout(2000)
             self.screenshot("04-enrollment-page")
 
             # 检查报名表单元素
@@ -202,11 +215,10 @@ class MiniProgramUITester:
             for button in nav_buttons:
                 if "打卡" in button.text_content():
                     self.log("📍 点击打卡导航...")
-                    button.click()
+                    self.waits.for_settled("checkin_nav", button.click)
                     checkin_found = True
                     break
 
-            self.page.wait_for_timeout(2000)
             self.screenshot("05-checkin-page")
 
             if self.wait_for_element('button:has-text("打卡"), text=打卡记录', timeout=3000, name="打卡按钮"):
@@ -236,11 +248,10 @@ class MiniProgramUITester:
                 button_text = button.text_content()
                 if "小凡看见" in button_text or "Insights" in button_text:
                     self.log("📍 点击小凡看见导航...")
-                    button.click()
+                    self.waits.for_settled("insights_nav", button.click)
                     insights_found = True
                     break
 
-            self.page.wait_for_timeout(2000)
             self.screenshot("06-insights-page")
 
             if self.wait_for_element('[role="article"], .card, text=小凡看见', timeout=3000, name="内容列表"):
@@ -262,28 +273,26 @@ class MiniProgramUITester:
         """测试 7: 检查控制台错误"""
         self.log("=== 测试 7: 检查控制台日志 ===")
         try:
-            # 收集所有console消息
-            messages = []
-            def handle_console_message(msg):
-                messages.append({"type": msg.type, "text": msg.text})
-
-            self.page.on("console", handle_console_message)
-            self.page.wait_for_timeout(1000)  # 收集1秒内的日志
-
-            # 统计错误和警告
-            errors = [m for m in messages if m["type"] == "error"]
-            warnings = [m for m in messages if m["type"] == "warning"]
+            # 整个会话的控制台消息与页面异常已由诊断收集器记录，这里只做汇总
+            self.diagnostics.drain()
+            errors = self.diagnostics.entries(("error", "pageerror"))
+            warnings = self.diagnostics.entries(("warning",))
+            long_tasks = self.diagnostics.entries(("longtask",))
 
             self.log(f"📊 控制台信息统计:")
             self.log(f"  - 错误: {len(errors)}")
             self.log(f"  - 警告: {len(warnings)}")
+            self.log(f"  - 长任务: {len(long_tasks)}")
 
             if errors:
                 self.log("❌ 发现控制台错误:", "WARN")
                 for i, error in enumerate(errors[:5]):  # 只显示前5个
-                    self.log(f"  {i+1}. {error['text']}", "WARN")
+                    self.log(f"  {i+1}. [{error['step']}] {error['text']}", "WARN")
 
-            self.test_results.append(("console_logs", "PASSED", f"Errors: {len(errors)}, Warnings: {len(warnings)}"))
+            self.test_results.append((
+                "console_logs", "PASSED",
+                f"Errors: {len(errors)}, Warnings: {len(warnings)}, Long tasks: {len(long_tasks)}"
+            ))
             return True
 
         except Exception as e:
@@ -291,82 +300,73 @@ class MiniProgramUITester:
             self.test_results.append(("console_logs", "PARTIAL", str(e)))
             return True
 
-    def generate_report(self):
-        """生成测试报告"""
-        self.log("\n" + "=" * 60)
-        self.log("📊 小程序 E2E 测试结果报告", "INFO")
-        self.log("=" * 60)
-
-        passed = sum(1 for _, status, _ in self.test_results if status == "PASSED")
-        failed = sum(1 for _, status, _ in self.test_results if status == "FAILED")
-        skipped = sum(1 for _, status, _ in self.test_results if status == "SKIPPED")
-        partial = sum(1 for _, status, _ in self.test_results if status == "PARTIAL")
-
-        for test_name, status, message in self.test_results:
-            if status == "PASSED":
-                symbol = "✅"
-            elif status == "FAILED":
-                symbol = "❌"
-            elif status == "SKIPPED":
-                symbol = "⏭️"
-            else:
-                symbol = "⚠️"
-            self.log(f"{symbol} {test_name}: {status} - {message}")
-
-        self.log("=" * 60)
-        self.log(f"总计: {len(self.test_results)} 个测试")
-        self.log(f"通过: {passed} | 失败: {failed} | 跳过: {skipped} | 部分: {partial}")
-        total_valid = len(self.test_results) - skipped
-        success_rate = (passed / total_valid * 100) if total_valid > 0 else 0
-        self.log(f"成功率: {success_rate:.1f}%")
-        self.log(f"截图保存位置: {SCREENSHOT_DIR}")
-        self.log("=" * 60)
+    def log_details(self):
+        if self.waits:
+            self.waits.log_summary()
+        self.diagnostics.log_summary()
 
+    def report_extras(self):
         return {
-            "total": len(self.test_results),
-            "passed": passed,
-            "failed": failed,
-            "skipped": skipped,
-            "partial": partial,
-            "success_rate": success_rate
+            "waits": self.waits.summary() if self.waits else {},
+            "diagnostics": self.diagnostics.summary(),
+            "profile": self.profiler.profiles if self.profiler else {}
         }
 
-    def run_all_tests(self):
-        """运行所有测试"""
+    def build_steps(self):
+        """页面测试都只依赖小程序启动；控制台检查汇总整个会话，不作为可筛选的步骤"""
+        return [
+            Step("app_launch", self.test_app_launch, tags=("smoke",)),
+            Step("home_page", self.test_home_page, depends_on=("app_launch",), tags=("smoke",)),
+            Step("weixin_login", self.test_weixin_login, depends_on=("home_page",), tags=("auth",)),
+            Step("enrollment_page", self.test_enrollment_page, depends_on=("app_launch",), tags=("enrollment",)),
+            Step("checkin_page", self.test_checkin_page, depends_on=("app_launch",), tags=("checkin",)),
+            Step("insights_page", self.test_insights_page, depends_on=("app_launch",), tags=("insights",)),
+        ]
+
+    def run_all_tests(self, only=None):
+        """运行所有测试；only 为步骤名集合时只运行这些步骤及其依赖"""
         self.log("🚀 开始运行小程序 E2E 自动化测试")
         self.log(f"调试工具 URL: {MINIPROGRAM_DEVTOOLS_URL}")
+        self.setup()
+
+        steps = self.select_steps(self.build_steps(), only)
+        if self.profiler:
+            self.log(f"🔬 性能剖析已开启，trace 保存到 {self.profiler.directory}")
+            for step in steps:
+                if step.name in PROFILED_STEPS:
+                    step.fn = self.profiler.wrap(step.name, step.fn)
 
         try:
-            self.test_app_launch()
-            self.test_home_page()
-            self.test_weixin_login()
-            self.test_enrollment_page()
-            self.test_checkin_page()
-            self.test_insights_page()
+            self.run_steps(steps, on_start=lambda step: self.diagnostics.set_step(step.name))
+            # 控制台检查汇总整个会话，始终最后执行
+            self.diagnostics.set_step("console_logs")
+            self.test_results.begin("console_logs")
             self.test_console_logs()
         except Exception as e:
             self.log(f"❌ 测试运行出错: {str(e)}", "ERROR")
 
         report = self.generate_report()
+        self.persist(metadata={"profile": report["profile"]})
         self.cleanup()
         return report
 
-    def cleanup(self):
-        """清理资源"""
-        try:
-            if self.page:
-                self.page.close()
-            if self.browser:
-                self.browser.close()
+    def release(self):
+        if self.page:
+            self.page.close()
+        if self.browser:
+            self.browser.close()
+        if self.p:
             self.p.stop()
-            self.log("✅ 浏览器连接已关闭")
-        except:
-            pass
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营小程序 E2E 自动化测试")
+    parser.add_argument("--profile", action="store_true", default=PROFILE_ENABLED,
+                        help="对首页、报名、打卡、小凡看见页面采集 CDP trace 并汇总渲染耗时 (或设置 E2E_PROFILE=1)")
+    args = parser.parse_args()
+
     try:
-        tester = MiniProgramUITester()
+        tester = MiniProgramUITester(profile=args.profile)
         report = tester.run_all_tests()
         sys.exit(0 if report["failed"] == 0 else 1)
     except Exception as e:
@@ -0,0 +1,270 @@
+"""
+晨读营 E2E 统一运行器
+从 admin-ui.py、miniprogram-ui.py、e2e-workflow.py 收集测试步骤，按名称或标签筛选，
+通过 --shard i/n 按历史耗时把步骤确定性地分到多台机器上执行，再用 --merge 把各分片结果合并成一份报告
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+from support.results import RunResult, StepResult, write_junit
+from support.sharding import (
+    step_id, matches, load_durations, plan_shards, plan_digest, merge_shards, DEFAULT_STEP_MS,
+)
+
+TESTS_DIR = Path(__file__).resolve().parent
+SHARD_DIR = Path(os.getenv("E2E_SHARD_DIR", "/tmp/e2e-screenshots/shards"))
+
+# 套件名 → (脚本, 测试类)；按此顺序执行，管理后台先运行以便保存登录态供业务流程复用
+SUITES = {
+    "admin": ("admin-ui.py", "AdminUITester"),
+    "miniprogram": ("miniprogram-ui.py", "MiniProgramUITester"),
+    "workflow": ("e2e-workflow.py", "E2EWorkflowTester"),
+}
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}")
+
+
+def load_tester(suite: str):
+    """按文件路径加载测试脚本（脚本名带连字符，不能直接 import）"""
+    script, class_name = SUITES[suite]
+    spec = importlib.util.spec_from_file_location(script[:-3].replace("-", "_"), TESTS_DIR / script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+def parse_shard(value: str):
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("格式应为 i/n，例如 2/4")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"分片序号需在 1～{total} 之间")
+    return index, total
+
+
+class UnifiedRunner:
+    def __init__(self, suites, keywords=(), tags=(), shard=(1, 1), durations_path=None, workers=1,
+                 out_dir: Path = SHARD_DIR):
+        self.testers = {suite: load_tester(suite) for suite in suites}
+        self.keywords = keywords
+        self.tags = tags
+        self.shard, self.total = shard
+        self.workers = workers
+        self.out_dir = Path(out_dir)
+        self.catalog = self.build_catalog()
+        self.durations = self.resolve_durations(durations_path)
+
+    def resolve_durations(self, durations_path):
+        """多机分片必须使用同一份耗时表：没有 --durations 时各步骤按相同耗时、按 ID 确定性分片，
+        不读取各机器各不相同的本地历史"""
+        if durations_path:
+            return load_durations(durations_path)
+        if self.total > 1:
+            log(f"⚠️ 未指定 --durations，分片按步骤 ID 均分（每个步骤按 {DEFAULT_STEP_MS / 1000:.0f}s 估算）", "WARN")
+            return {}
+        return load_durations()
+
+    def build_catalog(self):
+        """实例化测试类（不启动浏览器）收集步骤清单；依赖同样换成全局 ID"""
+        catalog = {}
+        for suite, tester_class in self.testers.items():
+            for step in tester_class().build_steps():
+                sid = step_id(suite, step.name)
+                catalog[sid] = {
+                    "id": sid,
+                    "suite": suite,
+                    "name": step.name,
+                    "tags": list(step.tags),
+                    "depends_on": [step_id(suite, dep) for dep in step.depends_on],
+                }
+        return catalog
+
+    def selected(self):
+        return [sid for sid, entry in self.catalog.items() if matches(entry, self.keywords, self.tags)]
+
+    def plan(self):
+        return plan_shards(self.catalog, self.selected(), self.total, self.durations)
+
+    def list_steps(self):
+        plan = self.plan()
+        for index, shard in enumerate(plan, 1):
+            if self.total > 1:
+                log(f"📦 分片 {index}/{self.total}: {len(shard['owned'])} 个步骤，预计 {shard['estimated_ms'] / 1000:.1f}s")
+            for sid in shard["runs"]:
+                entry = self.catalog[sid]
+                role = "" if sid in shard["owned"] else "（前置）"
+                estimate = self.durations.get(sid, DEFAULT_STEP_MS)
+                log(f"  {sid}{role} [{', '.join(entry['tags']) or '-'}] ~{estimate / 1000:.1f}s")
+
+    def run(self):
+        """执行本分片的步骤：每个套件只运行一次，传入需要执行的步骤名"""
+        plan = self.plan()
+        mine = plan[self.shard - 1]
+        log(f"🚀 分片 {self.shard}/{self.total}: 负责 {len(mine['owned'])} 个步骤，"
+            f"共执行 {len(mine['runs'])} 个，预计 {mine['estimated_ms'] / 1000:.1f}s")
+
+        started = time.time()
+        steps = []
+        suites = {}
+        for suite, tester_class in self.testers.items():
+            names = {self.catalog[sid]["name"] for sid in mine["runs"] if self.catalog[sid]["suite"] == suite}
+            if not names:
+                continue
+            tester = tester_class()
+            try:
+                kwargs = {"workers": self.workers} if suite == "admin" else {}
+                report = tester.run_all_tests(only=names, **kwargs)
+                suites[suite] = {k: report[k] for k in ("total", "passed", "failed", "skipped", "partial")}
+            except Exception as e:
+                log(f"❌ 套件 {suite} 无法运行: {str(e)}", "ERROR")
+                tester.cleanup()
+                suites[suite] = {"error": str(e)}
+            for result in tester.test_results:
+                sid = step_id(suite, result.name)
+                steps.append({"id": sid, "suite": suite, **result.to_dict(), "catalog": sid in self.catalog})
+
+        ended = time.time()
+        return {
+            "shard": self.shard,
+            "total": self.total,
+            "plan": plan_digest(plan),
+            "order": list(self.catalog),
+            "started_at": started,
+            "ended_at": ended,
+            "duration_ms": round((ended - started) * 1000, 1),
+            "estimated_ms": mine["estimated_ms"],
+            "owned": mine["owned"],
+            "runs": mine["runs"],
+            "suites": suites,
+            "steps": steps,
+        }
+
+
+def merge(directory: Path):
+    """合并目录下所有 shard-*-of-*.json，输出合并报告与各套件的 JUnit XML"""
+    documents = [json.loads(path.read_text(encoding="utf-8")) for path in sorted(directory.glob("shard-*-of-*.json"))]
+    if not documents:
+        raise FileNotFoundError(f"{directory} 下没有分片结果")
+    total = documents[0]["total"]
+    found = sorted(doc["shard"] for doc in documents)
+    if found != list(range(1, total + 1)):
+        log(f"⚠️ 分片不完整: 期望 1～{total}，实际 {found}", "WARN")
+    if len({doc["plan"] for doc in documents}) > 1:
+        log("⚠️ 各分片的分片方案不一致，请确认所有机器使用同一份耗时表（--durations）", "WARN")
+
+    steps = merge_shards(documents, documents[0]["order"])
+    counts = {status: sum(1 for s in steps if s["status"] == status)
+              for status in ("PASSED", "FAILED", "SKIPPED", "PARTIAL")}
+    shards = [{"shard": doc["shard"], "duration_ms": doc["duration_ms"], "estimated_ms": doc["estimated_ms"],
+               "owned": len(doc["owned"])} for doc in sorted(documents, key=lambda d: d["shard"])]
+    wall_ms = max(s["duration_ms"] for s in shards)
+    busy_ms = sum(s["duration_ms"] for s in shards)
+
+    report = {
+        "total": len(steps),
+        "passed": counts["PASSED"],
+        "failed": counts["FAILED"],
+        "skipped": counts["SKIPPED"],
+        "partial": counts["PARTIAL"],
+        "shards": shards,
+        "wall_ms": wall_ms,
+        # 各分片耗时之和 /（最慢分片耗时 × 分片数），越接近 1 说明切分越均衡
+        "parallel_efficiency": round(busy_ms / wall_ms / len(shards), 3) if wall_ms else None,
+        "steps": steps,
+    }
+
+    started = min(doc["started_at"] for doc in documents)
+    ended = max(doc["ended_at"] for doc in documents)
+    for suite in dict.fromkeys(s["suite"] for s in steps):
+        run = RunResult(
+            suite=suite,
+            run_id=f"merged-{documents[0]['plan']}",
+            started_at=started,
+            ended_at=ended,
+            steps=[
+                StepResult(name=s["name"], status=s["status"], message=s.get("message", ""),
+                           started_at=s.get("started_at", 0.0), ended_at=s.get("ended_at", 0.0),
+                           attachments=s.get("attachments", []))
+                for s in steps if s["suite"] == suite
+            ],
+        )
+        write_junit(run, directory / f"junit_merged_{suite}.xml")
+
+    log("=" * 60)
+    log(f"📊 合并 {len(documents)} 个分片的结果")
+    for step in steps:
+        symbol = "✅" if step["status"] == "PASSED" else "❌" if step["status"] == "FAILED" else "⏭️"
+        log(f"{symbol} {step['id']}: {step['status']} (分片 {step['shard']}, {step.get('duration_ms', 0):.0f}ms)")
+    for shard in shards:
+        log(f"  分片 {shard['shard']}: 实际 {shard['duration_ms'] / 1000:.1f}s / 预计 {shard['estimated_ms'] / 1000:.1f}s")
+    log(f"通过: {report['passed']} | 失败: {report['failed']} | 跳过: {report['skipped']} | 部分: {report['partial']}")
+    log(f"⏱️ 最慢分片 {wall_ms / 1000:.1f}s，并行效率 {report['parallel_efficiency']}")
+    log("=" * 60)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营 E2E 统一运行器")
+    parser.add_argument("-k", "--keyword", action="append", default=[],
+                        help="按步骤 ID（套件::步骤名）筛选，支持通配符与子串，可重复")
+    parser.add_argument("-t", "--tag", action="append", default=[], help="按标签或套件名筛选，可重复")
+    parser.add_argument("--suites", default=",".join(SUITES), help="参与收集的套件，逗号分隔")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), help="只运行第 i 个分片（共 n 个），如 2/4")
+    parser.add_argument("--durations", help="步骤耗时表 JSON（由 --export-durations 导出），分片时未指定则按步骤 ID 均分")
+    parser.add_argument("--export-durations", metavar="FILE", help="把本地历史中的步骤耗时导出为 JSON 后退出")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("E2E_WORKERS", "1")),
+                        help="管理后台登录后测试的并行 worker 数")
+    parser.add_argument("--out", default=str(SHARD_DIR), help="分片结果输出目录")
+    parser.add_argument("--list", action="store_true", help="只列出选中的步骤与分片方案")
+    parser.add_argument("--merge", metavar="DIR", help="合并目录下各分片的结果")
+    args = parser.parse_args()
+
+    if args.export_durations:
+        durations = load_durations()
+        Path(args.export_durations).write_text(json.dumps(durations, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 已导出 {len(durations)} 个步骤的耗时: {args.export_durations}")
+        sys.exit(0)
+
+    if args.merge:
+        report = merge(Path(args.merge))
+        report_file = Path(args.merge) / "merged_report.json"
+        report_file.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 合并报告已保存: {report_file}")
+        sys.exit(0 if report["failed"] == 0 else 1)
+
+    suites = [suite for suite in args.suites.split(",") if suite]
+    unknown = [suite for suite in suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"未知套件: {', '.join(unknown)}")
+
+    runner = UnifiedRunner(suites, keywords=args.keyword, tags=args.tag, shard=args.shard,
+                           durations_path=args.durations, workers=args.workers, out_dir=Path(args.out))
+    if not runner.selected():
+        parser.error("没有匹配的测试步骤")
+    if args.list:
+        runner.list_steps()
+        sys.exit(0)
+
+    result = runner.run()
+    runner.out_dir.mkdir(parents=True, exist_ok=True)
+    shard, total = args.shard
+    result_file = runner.out_dir / f"shard-{shard}-of-{total}.json"
+    result_file.write_text(json.dumps(result, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    print(f"\n💾 分片结果已保存: {result_file}")
+
+    # 归属本分片却没有结果（套件无法启动）的步骤同样视为失败
+    statuses = {s["id"]: s["status"] for s in result["steps"]}
+    failed = [sid for sid in result["owned"] if statuses.get(sid, "FAILED") == "FAILED"]
+    sys.exit(0 if not failed else 1)
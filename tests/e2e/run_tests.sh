@@ -6,6 +6,9 @@
 #   ./run_tests.sh miniprogram    # 运行小程序测试
 #   ./run_tests.sh workflow       # 运行完整业务流程测试
 #   ./run_tests.sh all            # 运行所有测试
+#   ./run_tests.sh visual         # 对最近一次截图做视觉回归检查
+#   ./run_tests.sh run -t smoke   # 通过统一运行器按名称/标签筛选，或 --shard i/n 分片运行
+#   ./run_tests.sh browser start  # 启动常驻浏览器，之后的测试直接连接而不再冷启动
 
 set -e
 
@@ -135,6 +138,38 @@ run_workflow_test() {
     fi
 }
 
+run_visual_check() {
+    print_step "运行视觉回归检查..."
+    if ! python3 -c "import numpy, PIL" 2>/dev/null; then
+        print_warning "numpy / Pillow 未安装，尝试安装..."
+        pip install numpy pillow
+    fi
+
+    if python3 "$TESTS_DIR/visual-regression.py" "$@"; then
+        print_success "视觉回归检查通过"
+        return 0
+    else
+        print_error "视觉回归检查失败"
+        return 1
+    fi
+}
+
+run_unified() {
+    print_step "运行统一 E2E 运行器..."
+    if python3 "$TESTS_DIR/run-e2e.py" "$@"; then
+        print_success "统一运行器执行完成"
+        return 0
+    else
+        print_error "统一运行器执行失败"
+        return 1
+    fi
+}
+
+run_browser_server() {
+    print_step "常驻浏览器: ${1:-status}"
+    python3 "$TESTS_DIR/browser-server.py" "${1:-status}" "${@:2}"
+}
+
 run_all_tests() {
     local failed=0
 
@@ -163,12 +198,17 @@ show_usage() {
     echo "  $0 miniprogram  - 运行小程序 UI 测试"
     echo "  $0 workflow     - 运行完整业务流程测试"
     echo "  $0 all          - 运行所有测试"
+    echo "  $0 visual       - 视觉回归检查（追加 --update 接受当前截图为基线）"
+    echo "  $0 run [参数]   - 统一运行器（-k 名称 / -t 标签 / --shard i/n / --merge 目录）"
+    echo "  $0 browser start|stop|status - 管理常驻浏览器"
     echo "  $0 help         - 显示此帮助信息"
     echo ""
     echo "环境变量："
     echo "  ADMIN_EMAIL              - 管理员邮箱 (默认: $ADMIN_EMAIL)"
     echo "  ADMIN_PASSWORD           - 管理员密码"
     echo "  MINIPROGRAM_DEVTOOLS_URL - 小程序调试工具地址 (默认: $MINIPROGRAM_DEVTOOLS_URL)"
+    echo "  E2E_WORKERS              - 管理后台测试并行 worker 数 (默认: 1)"
+    echo "  E2E_BROWSER_SERVER       - auto 有常驻浏览器就连接 / off / required (默认: auto)"
     echo ""
     echo "示例："
     echo "  ADMIN_EMAIL=user@example.com ADMIN_PASSWORD=pass123 $0 admin"
@@ -195,6 +235,18 @@ main() {
         all)
             run_all_tests
             ;;
+        visual)
+            shift
+            run_visual_check "$@"
+            ;;
+        run)
+            shift
+            run_unified "$@"
+            ;;
+        browser)
+            shift
+            run_browser_server "$@"
+            ;;
         help|"")
             show_usage
             ;;
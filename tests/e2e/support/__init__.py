@@ -0,0 +1,4 @@
+"""
+晨读营 E2E 测试公共支撑模块
+供 admin-ui.py / miniprogram-ui.py / e2e-workflow.py 等测试脚本共享使用
+"""
@@ -0,0 +1,139 @@
+"""
+管理后台登录态复用
+只登录一次并把 Playwright storage state（localStorage 中的 adminToken、cookies）保存到磁盘，
+后续测试直接把登录态注入新的浏览器上下文，跳过登录界面；token 过期时才重新登录
+同步与 async Playwright 各有一组入口（ensure_admin_state / ensure_admin_state_async），共用同一份登录态文件
+"""
+
+import base64
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+AUTH_STATE_PATH = Path(os.getenv("E2E_AUTH_STATE", "/tmp/e2e-screenshots/.auth/admin-state.json"))
+# token 剩余有效期低于该值（秒）时视为过期，避免测试中途失效
+MIN_TOKEN_TTL = int(os.getenv("E2E_AUTH_MIN_TTL", "600"))
+DASHBOARD_SELECTOR = 'h3:has-text("仪表板"), [data-testid="dashboard-title"]'
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _jwt_exp(token: str):
+    """读取 JWT 的 exp 字段（不校验签名），无法解析时返回 None"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except Exception:
+        return None
+
+
+def admin_token_from_state(state: dict, admin_url: str):
+    """从 storage state 中取出管理后台 origin 下的 adminToken"""
+    origin = _origin(admin_url)
+    for entry in state.get("origins", []):
+        if entry.get("origin") != origin:
+            continue
+        for item in entry.get("localStorage", []):
+            if item.get("name") == "adminToken":
+                return item.get("value")
+    return None
+
+
+def load_valid_state(admin_url: str, path: Path = AUTH_STATE_PATH, min_ttl: int = MIN_TOKEN_TTL):
+    """读取磁盘上的登录态，token 缺失或即将过期时返回 None"""
+    if not path.exists():
+        return None
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    token = admin_token_from_state(state, admin_url)
+    if not token:
+        return None
+    exp = _jwt_exp(token)
+    if exp is None or exp - time.time() < min_ttl:
+        return None
+    return state
+
+
+def _write_state(state: dict, path: Path):
+    """写入登录态，文件仅当前用户可读"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    os.chmod(path, 0o600)
+    return state
+
+
+def save_state(context, path: Path = AUTH_STATE_PATH):
+    """保存上下文的登录态"""
+    return _write_state(context.storage_state(), path)
+
+
+async def save_state_async(context, path: Path = AUTH_STATE_PATH):
+    """save_state 的 async Playwright 版本"""
+    return _write_state(await context.storage_state(), path)
+
+
+def login_and_save(browser, admin_url: str, email: str, password: str,
+                   path: Path = AUTH_STATE_PATH, log=print):
+    """在临时上下文中走一遍登录界面并保存登录态"""
+    context = browser.new_context()
+    try:
+        page = context.new_page()
+        page.goto(admin_url, wait_until="domcontentloaded")
+        page.locator('input[type="email"]').fill(email)
+        page.locator('input[type="password"]').fill(password)
+        page.locator('button:has-text("登录")').click()
+        page.locator(DASHBOARD_SELECTOR).first.wait_for(timeout=15000)
+        state = save_state(context, path)
+        log(f"🔐 登录态已保存: {path}")
+        return state
+    finally:
+        context.close()
+
+
+def ensure_admin_state(browser, admin_url: str, email: str, password: str,
+                       path: Path = AUTH_STATE_PATH, log=print):
+    """返回可用的登录态：优先复用磁盘缓存，过期时重新登录生成"""
+    state = load_valid_state(admin_url, path)
+    if state is not None:
+        log("🔐 复用已保存的管理后台登录态")
+        return state
+    log("🔐 登录态不存在或已过期，重新登录...")
+    return login_and_save(browser, admin_url, email, password, path, log)
+
+
+async def login_and_save_async(browser, admin_url: str, email: str, password: str,
+                               path: Path = AUTH_STATE_PATH, log=print):
+    """login_and_save 的 async Playwright 版本"""
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto(admin_url, wait_until="domcontentloaded")
+        await page.locator('input[type="email"]').fill(email)
+        await page.locator('input[type="password"]').fill(password)
+        await page.locator('button:has-text("登录")').click()
+        await page.locator(DASHBOARD_SELECTOR).first.wait_for(timeout=15000)
+        state = await save_state_async(context, path)
+        log(f"🔐 登录态已保存: {path}")
+        return state
+    finally:
+        await context.close()
+
+
+async def ensure_admin_state_async(browser, admin_url: str, email: str, password: str,
+                                   path: Path = AUTH_STATE_PATH, log=print):
+    """ensure_admin_state 的 async Playwright 版本"""
+    state = load_valid_state(admin_url, path)
+    if state is not None:
+        log("🔐 复用已保存的管理后台登录态")
+        return state
+    log("🔐 登录态不存在或已过期，重新登录...")
+    return await login_and_save_async(browser, admin_url, email, password, path, log)
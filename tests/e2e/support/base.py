@@ -0,0 +1,160 @@
+"""
+E2E 测试套件公共基类
+管理后台、小程序、端到端业务流程三个测试类共用的日志、截图、步骤筛选、结果汇总与资源清理
+
+约定：构造函数不做任何浏览器操作，连接与启动放在 setup() 中，
+这样统一运行器（run-e2e.py）可以只实例化测试类来收集步骤清单，用于筛选与分片
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+from .metrics import METRICS_ENABLED, MetricsSampler
+from .results import StepRecorder, persist_run
+from .scheduler import Scheduler
+from .screenshots import ScreenshotPipeline
+
+STATUS_SYMBOLS = {"PASSED": "✅", "FAILED": "❌", "SKIPPED": "⏭️", "PARTIAL": "⚠️"}
+
+
+class BaseTester:
+    SUITE = ""
+    TITLE = "测试结果报告"
+    SCREENSHOT_DIR = Path("/tmp/e2e-screenshots")
+
+    def __init__(self, shots=None):
+        self.test_results = StepRecorder(self.SUITE)
+        # 并行 worker 共享调用方的截图流水线，只有自己创建的才在 cleanup 时关闭
+        self.shots = shots
+        self.owns_shots = shots is None
+        self.metrics = None
+
+    def log(self, message: str, level: str = "INFO"):
+        """日志输出"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [{level}] {message}")
+
+    def setup(self):
+        """启动或连接浏览器；子类在此之前调用 super().setup()"""
+        if self.shots is None:
+            self.shots = ScreenshotPipeline(self.SCREENSHOT_DIR, log=self.log)
+        # 后端监控采样只由顶层测试实例负责，并行 worker 不重复采样
+        if METRICS_ENABLED and self.owns_shots and self.metrics is None:
+            self.metrics = MetricsSampler(label=self.SUITE, log=self.log).login().start()
+
+    def capture(self, page, name: str):
+        """保存截图（按截图策略过滤，后台线程编码写盘）"""
+        try:
+            path = self.shots.capture(page, name, step=self.test_results.current_step)
+            if path:
+                self.test_results.attach(path)
+                self.log(f"📸 截图已加入保存队列: {path}", "DEBUG")
+            return path
+        except Exception as e:
+            self.log(f"⚠️ 截图失败: {str(e)}", "WARN")
+            return None
+
+    def build_steps(self):
+        """返回本套件的 Step 列表（含依赖与标签）"""
+        raise NotImplementedError
+
+    def select_steps(self, steps, only=None):
+        """只保留 only 中的步骤及其传递依赖；only 为 None 时保留全部"""
+        if only is None:
+            return steps
+        by_name = {step.name: step for step in steps}
+        keep = set()
+        pending = [name for name in only if name in by_name]
+        while pending:
+            name = pending.pop()
+            if name not in keep:
+                keep.add(name)
+                pending.extend(dep for dep in by_name[name].depends_on if dep in by_name)
+        return [step for step in steps if step.name in keep]
+
+    def run_steps(self, steps, on_start=None):
+        """按历史调度执行步骤，返回 {步骤名: 状态}"""
+        scheduler = Scheduler(self.SUITE, log=self.log)
+        return scheduler.run(steps, self.test_results, on_start=on_start)
+
+    def count_results(self):
+        counts = {status: 0 for status in STATUS_SYMBOLS}
+        for _, status, _ in self.test_results:
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def log_details(self):
+        """报告末尾的套件专属汇总（接口耗时、等待、诊断等）"""
+
+    def report_extras(self):
+        """写入 JSON 报告的套件专属字段"""
+        return {}
+
+    def collect_metrics(self):
+        """停止监控采样，按步骤区间对齐后返回汇总"""
+        if self.metrics is None or self.metrics.thread is None:
+            return None
+        self.metrics.mark_steps(self.test_results)
+        self.metrics.stop()
+        summary = self.metrics.summary()
+        self.metrics.log_summary(summary)
+        return summary
+
+    def generate_report(self):
+        """生成测试报告"""
+        self.log("\n" + "=" * 60)
+        self.log(f"📊 {self.TITLE}", "INFO")
+        self.log("=" * 60)
+
+        for test_name, status, message in self.test_results:
+            self.log(f"{STATUS_SYMBOLS.get(status, '⚠️')} {test_name}: {status} - {message}")
+
+        counts = self.count_results()
+        total = len(self.test_results)
+        total_valid = total - counts["SKIPPED"]
+        success_rate = (counts["PASSED"] + counts["PARTIAL"]) / total_valid * 100 if total_valid > 0 else 0
+
+        self.log("=" * 60)
+        self.log(f"总计: {total} 个测试")
+        self.log(f"通过: {counts['PASSED']} | 失败: {counts['FAILED']} | 跳过: {counts['SKIPPED']} | "
+                 f"部分: {counts['PARTIAL']}")
+        self.log(f"成功率: {success_rate:.1f}%")
+        self.log_details()
+        backend_metrics = self.collect_metrics()
+        self.log(f"截图保存位置: {self.SCREENSHOT_DIR}")
+        self.log("=" * 60)
+
+        report = {
+            "total": total,
+            "passed": counts["PASSED"],
+            "failed": counts["FAILED"],
+            "skipped": counts["SKIPPED"],
+            "partial": counts["PARTIAL"],
+            "success_rate": success_rate,
+            "screenshots": self.shots.summary() if self.shots else {},
+            **self.report_extras(),
+        }
+        if backend_metrics:
+            report["backend_metrics"] = backend_metrics
+        return report
+
+    def persist(self, metadata: dict = None):
+        """写入运行历史并导出 JUnit / JSON"""
+        if self.shots:
+            self.test_results.resolve_attachments(self.shots.resolve)
+        return persist_run(self.test_results, self.SCREENSHOT_DIR, metadata=metadata, log=self.log)
+
+    def release(self):
+        """关闭本套件打开的页面与浏览器"""
+
+    def cleanup(self):
+        """清理资源"""
+        try:
+            self.release()
+        except Exception as e:
+            self.log(f"⚠️ 资源清理失败: {str(e)}", "WARN")
+        if self.owns_shots and self.shots:
+            self.shots.close()
+        if self.metrics:
+            self.metrics.stop()
+        self.log("✅ 资源已清理")
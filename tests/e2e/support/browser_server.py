@@ -0,0 +1,164 @@
+"""
+常驻浏览器与上下文池
+- browser-server.py 在后台维持一个开启远程调试端口的 Chromium，并把端口写入状态文件
+- 测试通过 open_browser() 优先用 CDP 连接这个常驻浏览器（几十毫秒），不可用时回退为本地启动
+- ContextPool 在一个浏览器连接上预先创建上下文，用完归还；同一上下文最多使用 max_uses 次，
+  之后关闭并补充新的。复用时只关闭页面、保留 Cookie 与存储，适合共享同一登录态的任务
+
+Python 版 Playwright 没有 launch_server()，常驻浏览器因此以 CDP 端口对外提供服务；
+连接断开时 Playwright 会关闭本次连接创建的上下文，常驻浏览器本身不受影响
+"""
+
+import json
+import os
+import subprocess
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+STATE_FILE = Path(os.getenv("E2E_BROWSER_STATE", "/tmp/e2e-browser-server.json"))
+# auto: 常驻浏览器在运行就连接，否则本地启动；off: 总是本地启动；required: 必须连接常驻浏览器
+BROWSER_SERVER_MODE = os.getenv("E2E_BROWSER_SERVER", "auto")
+CONTEXT_POOL_SIZE = int(os.getenv("E2E_CONTEXT_POOL_SIZE", "1"))
+CONTEXT_MAX_USES = int(os.getenv("E2E_CONTEXT_MAX_USES", "1"))
+
+
+def read_state():
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(state: dict):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(STATE_FILE)
+
+
+def probe(port: int, timeout: float = 1.0):
+    """读取 CDP 的 /json/version，浏览器无响应时返回 None"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except (OSError, ValueError, urllib.error.URLError):
+        return None
+
+
+def page_targets(port: int, timeout: float = 1.0):
+    """当前打开的页面数（不含空白页），用于判断是否有测试正在使用"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/list", timeout=timeout) as resp:
+            targets = json.loads(resp.read())
+    except (OSError, ValueError, urllib.error.URLError):
+        return 0
+    return sum(1 for t in targets if t.get("type") == "page" and t.get("url") != "about:blank")
+
+
+def process_tree_rss_mb(pid: int):
+    """进程及其全部子进程的常驻内存（MB）；使用 ps，Linux 与 macOS 通用"""
+    try:
+        output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True,
+                                check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    children = {}
+    rss = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) != 3:
+            continue
+        child, parent, kb = (int(v) for v in parts)
+        children.setdefault(parent, []).append(child)
+        rss[child] = kb
+    if pid not in rss:
+        return None
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += rss.get(current, 0)
+        pending.extend(children.get(current, []))
+    return round(total / 1024, 1)
+
+
+def server_endpoint():
+    """常驻浏览器健康时返回其 CDP 地址，否则返回 None"""
+    state = read_state()
+    if not state or not probe(state["port"]):
+        return None
+    return f"http://127.0.0.1:{state['port']}"
+
+
+def open_browser(p, headless: bool = True, log=print):
+    """优先连接常驻浏览器，否则本地启动；两种情况都以 browser.close() 释放"""
+    if BROWSER_SERVER_MODE != "off":
+        endpoint = server_endpoint()
+        if endpoint:
+            try:
+                browser = p.chromium.connect_over_cdp(endpoint, timeout=5000)
+                log(f"♨️ 已连接常驻浏览器: {endpoint}")
+                return browser
+            except Exception as e:
+                if BROWSER_SERVER_MODE == "required":
+                    raise
+                log(f"⚠️ 常驻浏览器连接失败，改为本地启动: {str(e)}")
+        elif BROWSER_SERVER_MODE == "required":
+            raise RuntimeError(f"常驻浏览器未运行（状态文件 {STATE_FILE}），请先执行 browser-server.py start")
+    return p.chromium.launch(headless=headless)
+
+
+class ContextPool:
+    def __init__(self, browser, size: int = CONTEXT_POOL_SIZE, max_uses: int = CONTEXT_MAX_USES,
+                 context_options=None):
+        self.browser = browser
+        self.max_uses = max(1, max_uses)
+        self.options = dict(context_options or {})
+        self.leased = {}
+        self.created = 0
+        self.recycled = 0
+        self.reused = 0
+        # 提前创建，首个任务拿到的就是已就绪的上下文
+        self.idle = [self._create() for _ in range(max(0, size))]
+
+    def _create(self):
+        self.created += 1
+        return {"context": self.browser.new_context(**self.options), "uses": 0}
+
+    def acquire(self):
+        entry = self.idle.pop(0) if self.idle else self._create()
+        if entry["uses"]:
+            self.reused += 1
+        entry["uses"] += 1
+        self.leased[id(entry["context"])] = entry
+        return entry["context"]
+
+    def release(self, context):
+        """归还上下文：达到使用次数上限或出错时关闭并补充一个新的，否则关闭页面后放回池中"""
+        entry = self.leased.pop(id(context))
+        if entry["uses"] < self.max_uses:
+            try:
+                for page in list(context.pages):
+                    page.close()
+                self.idle.append(entry)
+                return
+            except Exception:
+                pass
+        try:
+            context.close()
+        except Exception:
+            pass
+        self.recycled += 1
+        self.idle.append(self._create())
+
+    def close(self):
+        for entry in self.idle + list(self.leased.values()):
+            try:
+                entry["context"].close()
+            except Exception:
+                pass
+        self.idle = []
+        self.leased = {}
+
+    def stats(self):
+        return {"created": self.created, "reused": self.reused, "recycled": self.recycled}
@@ -0,0 +1,157 @@
+"""
+整个测试会话的页面诊断信息收集
+浏览器建立后立即挂载，持续记录控制台消息、页面异常、失败请求与超过阈值的长任务，
+每条记录标注当时正在执行的测试步骤，存放在有界环形缓冲区中，长时间运行也不会无限增长
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+
+DIAG_CAPACITY = int(os.getenv("E2E_DIAG_CAPACITY", "2000"))
+LONG_TASK_MS = float(os.getenv("E2E_LONG_TASK_MS", "50"))
+
+# 页面内的长任务也放在有界数组里，由 drain() 在步骤切换时取回
+LONG_TASK_SCRIPT = """
+(() => {
+  if (window.__e2eLongTasks) return;
+  window.__e2eLongTasks = [];
+  try {
+    new PerformanceObserver((list) => {
+      for (const entry of list.getEntries()) {
+        if (entry.duration <= %(threshold)s) continue;
+        window.__e2eLongTasks.push({ start: entry.startTime, duration: entry.duration });
+        if (window.__e2eLongTasks.length > 500) window.__e2eLongTasks.shift();
+      }
+    }).observe({ type: 'longtask', buffered: true });
+  } catch (e) {}
+})();
+"""
+
+DRAIN_SCRIPT = "() => (window.__e2eLongTasks || []).splice(0)"
+
+
+class DiagnosticsCollector:
+    def __init__(self, capacity: int = DIAG_CAPACITY, long_task_ms: float = LONG_TASK_MS, log=print):
+        self.records = deque(maxlen=capacity)
+        self.long_task_ms = long_task_ms
+        self.log = log
+        self.step = "setup"
+        # 被环形缓冲区挤掉的记录仍计入总数
+        self.totals = Counter()
+        self._pages = []
+        self._lock = threading.Lock()
+
+    def _add(self, kind: str, page, text: str, **extra):
+        record = {"kind": kind, "step": self.step, "page": _page_url(page), "text": text, "ts": time.time(), **extra}
+        with self._lock:
+            self.records.append(record)
+            self.totals[kind] += 1
+
+    def attach(self, target):
+        """挂载到 BrowserContext（含之后新开的页面）或单个 Page"""
+        script = LONG_TASK_SCRIPT % {"threshold": self.long_task_ms}
+        if hasattr(target, "pages"):
+            target.add_init_script(script)
+            target.on("page", self._attach_page)
+            for page in target.pages:
+                self._attach_page(page, script)
+        else:
+            target.add_init_script(script)
+            self._attach_page(target, script)
+        return self
+
+    def _attach_page(self, page, script: str = None):
+        page.on("console", lambda msg: self._on_console(page, msg))
+        page.on("pageerror", lambda error: self._add("pageerror", page, str(error)))
+        page.on("requestfailed", lambda request: self._add(
+            "requestfailed", page, f"{request.method} {request.url}", error=request.failure))
+        page.on("response", lambda response: self._on_response(page, response))
+        self._pages.append(page)
+        if script:
+            # 已经加载完成的页面（如通过 CDP 连接的开发工具）不会再执行 init script，直接注入一次
+            try:
+                page.evaluate(script)
+            except Exception:
+                pass
+
+    def _on_console(self, page, msg):
+        if msg.type in ("error", "warning"):
+            self._add(msg.type, page, msg.text)
+        else:
+            with self._lock:
+                self.totals[msg.type] += 1
+
+    def _on_response(self, page, response):
+        if response.status >= 400:
+            self._add("http_error", page, f"{response.request.method} {response.url}", status=response.status)
+
+    def drain(self):
+        """取回各页面累积的长任务，归入当前步骤"""
+        for page in list(self._pages):
+            if page.is_closed():
+                self._pages.remove(page)
+                continue
+            try:
+                tasks = page.evaluate(DRAIN_SCRIPT)
+            except Exception:
+                continue
+            for task in tasks:
+                self._add("longtask", page, f"{task['duration']:.0f}ms",
+                          duration_ms=round(task["duration"], 1), start_ms=round(task["start"], 1))
+
+    def set_step(self, name: str):
+        """步骤切换：先把上一步的长任务归档，再切换标签"""
+        self.drain()
+        self.step = name
+
+    def entries(self, kinds=None, step: str = None):
+        with self._lock:
+            return [
+                r for r in self.records
+                if (kinds is None or r["kind"] in kinds) and (step is None or r["step"] == step)
+            ]
+
+    def merge(self, records, totals=None):
+        """合并并行 worker 中的记录"""
+        with self._lock:
+            self.records.extend(records)
+            if totals:
+                self.totals.update(totals)
+            else:
+                self.totals.update(r["kind"] for r in records)
+
+    def summary(self):
+        self.drain()
+        by_step = {}
+        for record in self.entries():
+            counts = by_step.setdefault(record["step"], Counter())
+            counts[record["kind"]] += 1
+        long_tasks = self.entries(("longtask",))
+        return {
+            "totals": dict(self.totals),
+            "buffered": len(self.records),
+            "by_step": {step: dict(counts) for step, counts in by_step.items()},
+            "long_task_ms": round(sum(r["duration_ms"] for r in long_tasks), 1),
+            "errors": [
+                {k: r[k] for k in ("kind", "step", "page", "text")}
+                for r in self.entries(("error", "pageerror", "requestfailed"))[-20:]
+            ],
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary["by_step"]:
+            return
+        self.log("🩺 页面诊断（按步骤）:")
+        for step, counts in summary["by_step"].items():
+            details = ", ".join(f"{kind} {count}" for kind, count in sorted(counts.items()))
+            self.log(f"  - {step}: {details}")
+
+
+def _page_url(page):
+    try:
+        return page.url
+    except Exception:
+        return ""
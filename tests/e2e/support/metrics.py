@@ -0,0 +1,331 @@
+"""
+后端监控指标采样
+测试或压测运行期间，在后台线程中按固定间隔轮询后端的监控与健康检查接口：
+- GET /live                 活跃性；其响应耗时作为事件循环延迟的近似（处理函数本身几乎不耗时）
+- GET /ready                就绪状态（MongoDB 连接）
+- GET /health               进程内存与运行时长
+- GET /monitoring/metrics   分钟/小时级请求数、错误率、Redis 状态与告警统计（需管理员 token）
+- GET /monitoring/alerts    最近的告警日志，新出现的告警逐条记录
+
+采样以追加写入的列式目录保存，每列一个 float64 小端文件，缺失值为 NaN：
+    metrics_<时间>/schema.json     列名、接口地址与采样间隔
+    metrics_<时间>/<列名>.f64      每个采样点 8 字节
+    metrics_<时间>/markers.jsonl   测试步骤、负载阶段等时间区间
+    metrics_<时间>/alerts.jsonl    采样期间新出现的告警
+运行中断也不会损坏已写入的数据；correlate() 把采样与标记对齐，给出每个区间内的后端状态
+"""
+
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+METRICS_ENABLED = os.getenv("E2E_METRICS", "0") == "1"
+METRICS_API_URL = os.getenv("E2E_METRICS_API_URL", os.getenv("E2E_API_URL", "http://localhost:3000/api/v1"))
+METRICS_INTERVAL_S = float(os.getenv("E2E_METRICS_INTERVAL_S", "1"))
+METRICS_DIR = Path(os.getenv("E2E_METRICS_DIR", "/tmp/e2e-screenshots/metrics"))
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123456")
+
+COLUMNS = [
+    "t",
+    "live_ms",
+    "ready",
+    "rss_mb",
+    "heap_used_mb",
+    "heap_total_mb",
+    "external_mb",
+    "uptime_s",
+    "mongodb_ok",
+    "minute_requests",
+    "minute_errors",
+    "minute_error_rate",
+    "hour_requests",
+    "hour_errors",
+    "redis_connected",
+    "alerts_total",
+    "alerts_critical",
+    "alerts_high",
+    "new_alerts",
+]
+
+NAN = float("nan")
+MB = 1024 * 1024
+
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+class ColumnWriter:
+    """按列追加写入采样点"""
+
+    def __init__(self, directory: Path, columns, metadata: dict):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = list(columns)
+        (self.directory / "schema.json").write_text(
+            json.dumps({"columns": self.columns, "format": "<f8", **metadata}, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        self.files = {name: open(self.directory / f"{name}.f64", "ab") for name in self.columns}
+        self.rows = 0
+
+    def append(self, row: dict):
+        for name in self.columns:
+            self.files[name].write(struct.pack("<d", row.get(name, NAN)))
+        for f in self.files.values():
+            f.flush()
+        self.rows += 1
+
+    def append_event(self, filename: str, event: dict):
+        with open(self.directory / filename, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def read_series(directory: Path):
+    """读取列式目录，返回 ({列名: array('d')}, 标记列表, 告警列表)"""
+    directory = Path(directory)
+    schema = json.loads((directory / "schema.json").read_text(encoding="utf-8"))
+    series = {}
+    rows = None
+    for name in schema["columns"]:
+        values = array("d")
+        values.frombytes((directory / f"{name}.f64").read_bytes())
+        if sys.byteorder == "big":
+            values.byteswap()
+        series[name] = values
+        rows = len(values) if rows is None else min(rows, len(values))
+    # 写到一半被中断时各列长度可能差一个点，按最短的列对齐
+    series = {name: values[:rows] for name, values in series.items()}
+
+    def events(filename):
+        path = directory / filename
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    return series, events("markers.jsonl"), events("alerts.jsonl")
+
+
+def correlate(series: dict, markers, alerts, interval_s: float = METRICS_INTERVAL_S):
+    """按标记区间汇总后端状态；区间两端各放宽一个采样间隔，保证短步骤也能对上采样点"""
+    times = series.get("t", [])
+    results = []
+    for marker in markers:
+        start = marker["start"] - interval_s
+        end = marker["end"] + interval_s
+        index = [i for i, t in enumerate(times) if start <= t <= end]
+
+        def values(name):
+            return [series[name][i] for i in index if not math.isnan(series[name][i])]
+
+        def peak(name):
+            found = values(name)
+            return round(max(found), 2) if found else None
+
+        ready = values("ready")
+        results.append({
+            "label": marker["label"],
+            "kind": marker.get("kind", "step"),
+            "status": marker.get("status"),
+            "duration_ms": round((marker["end"] - marker["start"]) * 1000, 1),
+            "samples": len(index),
+            "live_ms_max": peak("live_ms"),
+            "rss_mb_max": peak("rss_mb"),
+            "heap_used_mb_max": peak("heap_used_mb"),
+            "minute_error_rate_max": peak("minute_error_rate"),
+            "not_ready_samples": sum(1 for v in ready if v < 1),
+            "alerts": [a["line"] for a in alerts if start <= a["t"] <= end],
+        })
+    return results
+
+
+class MetricsSampler:
+    def __init__(self, api_url: str = METRICS_API_URL, interval_s: float = METRICS_INTERVAL_S,
+                 out_dir: Path = METRICS_DIR, admin_token: str = None, label: str = "run", log=print):
+        self.api_url = api_url.rstrip("/")
+        self.interval_s = interval_s
+        self.admin_token = admin_token
+        self.log = log
+        self.directory = Path(out_dir) / f"metrics_{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.writer = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.seen_alerts = None
+        self.errors = 0
+
+    def _get(self, path: str, auth: bool = False, timeout: float = 5.0):
+        """返回 (HTTP 状态码, JSON, 耗时 ms)；连接失败时状态码为 0"""
+        headers = {"Authorization": f"Bearer {self.admin_token}"} if auth and self.admin_token else {}
+        req = urllib.request.Request(self.api_url + path, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                status, body = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (OSError, urllib.error.URLError):
+            return 0, None, (time.perf_counter() - started) * 1000
+        elapsed = (time.perf_counter() - started) * 1000
+        try:
+            return status, json.loads(body), elapsed
+        except ValueError:
+            return status, None, elapsed
+
+    def login(self, email: str = ADMIN_EMAIL, password: str = ADMIN_PASSWORD):
+        """用管理员账号换取 token，失败时只采样无需鉴权的接口"""
+        body = json.dumps({"email": email, "password": password}).encode()
+        req = urllib.request.Request(self.api_url + "/auth/admin/login", data=body,
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                self.admin_token = json.loads(resp.read())["data"]["token"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.log(f"⚠️ 监控采样无法登录管理员，跳过 /monitoring 接口: {str(e)}", "WARN")
+        return self
+
+    def sample(self):
+        row = {"t": time.time()}
+
+        status, _, elapsed = self._get("/live")
+        row["live_ms"] = round(elapsed, 2) if status == 200 else NAN
+
+        status, _, _ = self._get("/ready")
+        row["ready"] = 1.0 if status == 200 else 0.0
+
+        status, health, _ = self._get("/health")
+        if status == 200 and health:
+            memory = (health.get("checks") or {}).get("memory") or {}
+            row["rss_mb"] = _num(memory.get("rss")) / MB
+            row["heap_used_mb"] = _num(memory.get("heapUsed")) / MB
+            row["heap_total_mb"] = _num(memory.get("heapTotal")) / MB
+            row["external_mb"] = _num(memory.get("external")) / MB
+            row["uptime_s"] = _num(health.get("uptime"))
+            row["mongodb_ok"] = 1.0 if (health.get("checks") or {}).get("mongodb") == "healthy" else 0.0
+
+        if self.admin_token:
+            status, payload, _ = self._get("/monitoring/metrics", auth=True)
+            data = (payload or {}).get("data") or {}
+            if status == 200 and data:
+                minute = (data.get("metrics") or {}).get("minute") or {}
+                hour = (data.get("metrics") or {}).get("hour") or {}
+                alerts = data.get("alerts") or {}
+                row.update({
+                    "minute_requests": _num(minute.get("totalRequests")),
+                    "minute_errors": _num(minute.get("totalErrors")),
+                    "minute_error_rate": _num(minute.get("errorRate")),
+                    "hour_requests": _num(hour.get("totalRequests")),
+                    "hour_errors": _num(hour.get("totalErrors")),
+                    "redis_connected": 1.0 if (data.get("redis") or {}).get("isConnected") else 0.0,
+                    "alerts_total": _num(alerts.get("total")),
+                    "alerts_critical": _num(alerts.get("critical")),
+                    "alerts_high": _num(alerts.get("high")),
+                })
+            row["new_alerts"] = float(self.poll_alerts(row["t"]))
+        return row
+
+    def poll_alerts(self, now: float):
+        """记录上次采样之后新出现的告警行；首次调用只建立基线"""
+        status, payload, _ = self._get("/monitoring/alerts?limit=50", auth=True)
+        lines = (((payload or {}).get("data") or {}).get("alerts") or []) if status == 200 else []
+        if self.seen_alerts is None:
+            self.seen_alerts = set(lines)
+            return 0
+        fresh = [line for line in lines if line not in self.seen_alerts]
+        for line in fresh:
+            self.writer.append_event("alerts.jsonl", {"t": now, "line": line})
+        self.seen_alerts.update(fresh)
+        return len(fresh)
+
+    def _loop(self):
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            try:
+                self.writer.append(self.sample())
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    self.log(f"⚠️ 监控采样失败: {str(e)}", "WARN")
+            self.stopping.wait(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def start(self):
+        self.writer = ColumnWriter(self.directory, COLUMNS, {
+            "api_url": self.api_url,
+            "interval_s": self.interval_s,
+            "started_at": time.time(),
+        })
+        self.thread = threading.Thread(target=self._loop, name="metrics-sampler", daemon=True)
+        self.thread.start()
+        self.log(f"📈 后端监控采样已启动: 每 {self.interval_s}s → {self.directory}", "DEBUG")
+        return self
+
+    def mark(self, label: str, start: float, end: float, kind: str = "step", status: str = None):
+        """记录一个时间区间（epoch 秒），报告中与采样对齐"""
+        self.writer.append_event("markers.jsonl", {
+            "label": label, "kind": kind, "status": status, "start": start, "end": end,
+        })
+
+    def mark_steps(self, results):
+        """把 StepRecorder 中每个步骤的起止时间记为标记"""
+        for result in results:
+            self.mark(result.name, result.started_at, result.ended_at, status=result.status)
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout=self.interval_s + 10)
+        self.thread = None
+        self.writer.close()
+
+    def summary(self):
+        """停止后读取完整采样，返回整体峰值与各标记区间的对齐结果"""
+        series, markers, alerts = read_series(self.directory)
+        rows = len(series["t"])
+
+        def peak(name):
+            found = [v for v in series[name] if not math.isnan(v)]
+            return round(max(found), 2) if found else None
+
+        return {
+            "directory": str(self.directory),
+            "samples": rows,
+            "interval_s": self.interval_s,
+            "errors": self.errors,
+            "peaks": {name: peak(name) for name in ("live_ms", "rss_mb", "heap_used_mb", "minute_error_rate")},
+            "alerts": alerts,
+            "markers": correlate(series, markers, alerts, self.interval_s),
+        }
+
+    def log_summary(self, summary: dict, live_ms_warn: float = 200):
+        """打印整体峰值，以及事件循环延迟偏高、未就绪或有告警的区间"""
+        peaks = summary["peaks"]
+        self.log(f"📈 后端监控: {summary['samples']} 个采样 | /live 最大 {peaks['live_ms'] or '-'}ms | "
+                 f"RSS 最大 {peaks['rss_mb'] or '-'}MB | 堆 最大 {peaks['heap_used_mb'] or '-'}MB | "
+                 f"告警 {len(summary['alerts'])} 条")
+        for marker in summary["markers"]:
+            flags = []
+            if (marker["live_ms_max"] or 0) > live_ms_warn:
+                flags.append(f"/live {marker['live_ms_max']}ms")
+            if marker["not_ready_samples"]:
+                flags.append(f"未就绪 {marker['not_ready_samples']} 次")
+            if marker["alerts"]:
+                flags.append(f"告警 {len(marker['alerts'])} 条")
+            if flags:
+                self.log(f"  ⚠️ {marker['label']}: {' | '.join(flags)}", "WARN")
@@ -0,0 +1,153 @@
+"""
+E2E 网络请求记录与接口耗时统计
+监听浏览器上下文中的 XHR / fetch 请求，按规范化路由（如 GET /api/v1/admin/checkins）汇总
+请求数、传输字节、TTFB 与 p50/p95 耗时，让每次 UI 测试同时产出一份真实调用模式下的后端耗时画像
+"""
+
+import math
+import re
+from urllib.parse import urlparse
+
+API_RESOURCE_TYPES = ("xhr", "fetch")
+
+# 路径中的动态片段统一替换为 :id，便于按路由聚合
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F]{24}|\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+
+
+def normalize_route(url: str) -> str:
+    """去掉 query，并把 ObjectId / 数字 / UUID 路径片段替换为 :id"""
+    path = urlparse(url).path
+    segments = [":id" if _ID_SEGMENT.match(seg) else seg for seg in path.split("/")]
+    return "/".join(segments) or "/"
+
+
+def percentile(values, pct: float):
+    """最近秩法百分位数，空列表返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class NetworkRecorder:
+    def __init__(self, log=print):
+        # traffic 依赖本模块的 normalize_route，这里延迟导入
+        from .traffic import TRAFFIC_ENABLED
+
+        self.log = log
+        self.records = []
+        self.current_step = None
+        self.capture_traffic = TRAFFIC_ENABLED
+
+    def attach(self, context):
+        """开始记录上下文内所有页面的 API 请求"""
+        context.on("requestfinished", self._on_finished)
+        context.on("requestfailed", self._on_failed)
+
+    def set_step(self, name: str):
+        """标记当前测试步骤，之后的请求都归属该步骤"""
+        self.current_step = name
+
+    def _record(self, request, status, failed: bool):
+        timing = request.timing or {}
+        request_start = timing.get("requestStart", -1)
+        response_start = timing.get("responseStart", -1)
+        response_end = timing.get("responseEnd", -1)
+
+        ttfb = response_start - request_start if request_start >= 0 and response_start >= 0 else None
+        duration = response_end if response_end >= 0 else None
+
+        size = 0
+        if not failed:
+            try:
+                sizes = request.sizes()
+                size = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+            except Exception:
+                pass
+
+        record = {
+            "method": request.method,
+            "route": normalize_route(request.url),
+            "status": status,
+            "failed": failed,
+            "ttfb_ms": ttfb,
+            "duration_ms": duration,
+            "bytes": size,
+            "step": self.current_step,
+        }
+        if self.capture_traffic:
+            # 脱敏后的请求事件随记录一起保存，并行 worker 的记录合并后同样可以导出
+            from .traffic import capture_event
+
+            record["traffic"] = capture_event(request, status, duration)
+        self.records.append(record)
+
+    def _on_finished(self, request):
+        if request.resource_type not in API_RESOURCE_TYPES:
+            return
+        try:
+            response = request.response()
+            self._record(request, response.status if response else None, failed=False)
+        except Exception:
+            pass
+
+    def _on_failed(self, request):
+        if request.resource_type not in API_RESOURCE_TYPES:
+            return
+        self._record(request, None, failed=True)
+
+    def merge(self, records):
+        """合并其他记录器（例如并行 worker）的原始记录"""
+        self.records.extend(records)
+
+    def save_traffic(self, label: str):
+        """把本次运行的请求序列写成流量录制文件（E2E_TRAFFIC=1 时），返回文件路径"""
+        from .traffic import TRAFFIC_DIR, write_recording
+
+        events = [record["traffic"] for record in self.records if "traffic" in record]
+        if not events:
+            return None
+        path = TRAFFIC_DIR / f"{label}.jsonl"
+        count = write_recording(events, path, source=f"e2e:{label}")
+        self.log(f"🎞️ 已录制 {count} 个请求: {path}")
+        return path
+
+    def summary(self):
+        """按 "METHOD 路由" 汇总"""
+        grouped = {}
+        for record in self.records:
+            grouped.setdefault(f"{record['method']} {record['route']}", []).append(record)
+
+        routes = {}
+        for key, items in grouped.items():
+            durations = [r["duration_ms"] for r in items if r["duration_ms"] is not None]
+            ttfbs = [r["ttfb_ms"] for r in items if r["ttfb_ms"] is not None]
+            routes[key] = {
+                "count": len(items),
+                "errors": sum(1 for r in items if r["failed"] or (r["status"] or 0) >= 400),
+                "bytes": sum(r["bytes"] for r in items),
+                "ttfb_p50_ms": percentile(ttfbs, 50),
+                "ttfb_p95_ms": percentile(ttfbs, 95),
+                "duration_p50_ms": percentile(durations, 50),
+                "duration_p95_ms": percentile(durations, 95),
+            }
+        return {"total_requests": len(self.records), "routes": routes}
+
+    def log_summary(self, top: int = 10):
+        """打印 p95 耗时最高的接口"""
+        routes = self.summary()["routes"]
+        if not routes:
+            return
+        self.log(f"\n🌐 接口耗时 Top {top}（按 p95）:")
+        ranked = sorted(routes.items(), key=lambda kv: kv[1]["duration_p95_ms"] or 0, reverse=True)
+        for key, stats in ranked[:top]:
+            p50 = stats["duration_p50_ms"] or 0
+            p95 = stats["duration_p95_ms"] or 0
+            ttfb = stats["ttfb_p50_ms"] or 0
+            self.log(
+                f"  {key}: {stats['count']} 次 | p50 {p50:.0f}ms | p95 {p95:.0f}ms | "
+                f"TTFB {ttfb:.0f}ms | {stats['bytes'] / 1024:.1f} KB | 错误 {stats['errors']}"
+            )
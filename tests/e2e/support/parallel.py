@@ -0,0 +1,86 @@
+"""
+E2E 并行执行工具
+在多个相互隔离的浏览器上下文中并发运行彼此独立的测试任务，所有上下文共享同一份登录态 (storage state)
+
+注意：Playwright sync API 的对象不能跨线程使用，
+因此每个 worker 线程各自启动 Playwright 并连接浏览器（常驻浏览器在运行时直接连接），
+任务之间依靠浏览器上下文隔离，上下文由每个 worker 的上下文池提前创建
+"""
+
+import os
+import queue
+import threading
+
+from playwright.sync_api import sync_playwright
+
+from .browser_server import ContextPool, open_browser
+
+DEFAULT_WORKERS = int(os.getenv("E2E_WORKERS", "1"))
+
+
+def run_in_contexts(tasks, storage_state=None, workers=DEFAULT_WORKERS, headless=True,
+                    context_options=None, log=print):
+    """在并行的浏览器上下文中运行任务
+
+    tasks: [(name, fn)]，fn(page) 在独立上下文的新页面上执行并返回结果
+    返回与 tasks 顺序一致的 [(name, result, error)]，error 为 None 表示任务正常结束
+    """
+    context_options = dict(context_options or {})
+    if storage_state is not None:
+        context_options["storage_state"] = storage_state
+
+    pending = queue.Queue()
+    for index, task in enumerate(tasks):
+        pending.put((index, task))
+    outcomes = [None] * len(tasks)
+
+    def worker(worker_id: int):
+        try:
+            p = sync_playwright().start()
+        except Exception as e:
+            log(f"⚠️ worker-{worker_id} 启动 Playwright 失败: {str(e)}")
+            return
+        try:
+            browser = open_browser(p, headless=headless, log=log)
+        except Exception as e:
+            log(f"⚠️ worker-{worker_id} 启动浏览器失败: {str(e)}")
+            p.stop()
+            return
+
+        pool = None
+        try:
+            pool = ContextPool(browser, context_options=context_options)
+            while True:
+                try:
+                    index, (name, fn) = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                context = pool.acquire()
+                try:
+                    page = context.new_page()
+                    outcomes[index] = (name, fn(page), None)
+                except Exception as e:
+                    outcomes[index] = (name, None, e)
+                finally:
+                    pool.release(context)
+        finally:
+            if pool:
+                pool.close()
+            browser.close()
+            p.stop()
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), name=f"e2e-worker-{i}", daemon=True)
+        for i in range(max(1, min(workers, len(tasks))))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 所有 worker 都启动失败时，剩余任务标记为未执行
+    for index, (name, _) in enumerate(tasks):
+        if outcomes[index] is None:
+            outcomes[index] = (name, None, RuntimeError("没有可用的 worker 执行该任务"))
+    return outcomes
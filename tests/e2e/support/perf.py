@@ -0,0 +1,139 @@
+"""
+前端性能指标采集
+通过 PerformanceObserver 记录 LCP / CLS / Long Task，结合 Navigation Timing 与 CDP Performance 域的 JS 堆大小，
+为每个访问过的页面生成指标，并按页面预算判定是否超标
+"""
+
+import json
+import os
+from pathlib import Path
+
+# 在页面脚本执行前注入，持续收集 LCP、CLS 和长任务
+PERF_INIT_SCRIPT = """
+(() => {
+  if (window.__e2ePerf) return;
+  const perf = { lcp: 0, cls: 0, longTasks: [] };
+  window.__e2ePerf = perf;
+  const observe = (type, handler) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(handler))
+        .observe({ type, buffered: true });
+    } catch (e) {}
+  };
+  observe('largest-contentful-paint', (entry) => { perf.lcp = entry.startTime; });
+  observe('layout-shift', (entry) => { if (!entry.hadRecentInput) perf.cls += entry.value; });
+  observe('longtask', (entry) => {
+    perf.longTasks.push({ start: entry.startTime, duration: entry.duration });
+  });
+})();
+"""
+
+COLLECT_SCRIPT = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const perf = window.__e2ePerf || { lcp: 0, cls: 0, longTasks: [] };
+  const longTaskTotal = perf.longTasks.reduce((sum, t) => sum + t.duration, 0);
+  return {
+    ttfb_ms: nav ? nav.responseStart : null,
+    dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd : null,
+    load_ms: nav ? nav.loadEventEnd : null,
+    transfer_kb: nav ? nav.transferSize / 1024 : null,
+    lcp_ms: perf.lcp,
+    cls: perf.cls,
+    long_task_count: perf.longTasks.length,
+    long_task_total_ms: longTaskTotal,
+    js_heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : null,
+  };
+}
+"""
+
+# 默认页面预算，可通过 E2E_PERF_BUDGETS 指向的 JSON 文件覆盖（同结构，按页面合并）
+DEFAULT_BUDGETS = {
+    "*": {"lcp_ms": 2500, "cls": 0.1, "long_task_total_ms": 500, "load_ms": 5000, "js_heap_mb": 150},
+    "dashboard": {"lcp_ms": 3000},
+    "enrollments": {"lcp_ms": 3000, "long_task_total_ms": 800},
+    "insights": {},
+    "users": {},
+}
+
+
+def load_budgets():
+    budgets = {page: dict(values) for page, values in DEFAULT_BUDGETS.items()}
+    override_path = os.getenv("E2E_PERF_BUDGETS")
+    if override_path and Path(override_path).exists():
+        for page, values in json.loads(Path(override_path).read_text(encoding="utf-8")).items():
+            budgets.setdefault(page, {}).update(values)
+    return budgets
+
+
+class PerfCollector:
+    def __init__(self, budgets=None, log=print):
+        self.budgets = budgets or load_budgets()
+        self.log = log
+        self.pages = {}
+
+    @staticmethod
+    def install(context):
+        """在上下文上注册 PerformanceObserver，需在页面导航前调用"""
+        context.add_init_script(PERF_INIT_SCRIPT)
+
+    def _cdp_heap_mb(self, page):
+        """通过 CDP Performance 域读取 JS 堆大小，非 Chromium 环境返回 None"""
+        try:
+            session = page.context.new_cdp_session(page)
+            try:
+                session.send("Performance.enable")
+                metrics = session.send("Performance.getMetrics")["metrics"]
+            finally:
+                session.detach()
+            for metric in metrics:
+                if metric["name"] == "JSHeapUsedSize":
+                    return metric["value"] / 1048576
+        except Exception:
+            pass
+        return None
+
+    def capture(self, page, name: str):
+        """采集当前页面的性能指标，并与预算比较"""
+        try:
+            metrics = page.evaluate(COLLECT_SCRIPT)
+        except Exception as e:
+            self.log(f"⚠️ 性能指标采集失败 [{name}]: {str(e)}", "WARN")
+            return None
+
+        heap_mb = self._cdp_heap_mb(page)
+        if heap_mb is not None:
+            metrics["js_heap_mb"] = heap_mb
+        metrics = {k: round(v, 3) if isinstance(v, float) else v for k, v in metrics.items()}
+        metrics["violations"] = self.check(name, metrics)
+        self.pages[name] = metrics
+
+        self.log(
+            f"📈 {name}: LCP {metrics['lcp_ms']:.0f}ms | CLS {metrics['cls']:.3f} | "
+            f"长任务 {metrics['long_task_count']} 个/{metrics['long_task_total_ms']:.0f}ms",
+            "DEBUG",
+        )
+        return metrics
+
+    def check(self, name: str, metrics: dict):
+        """返回超出预算的指标列表"""
+        budget = dict(self.budgets.get("*", {}))
+        budget.update(self.budgets.get(name, {}))
+        violations = []
+        for key, limit in budget.items():
+            value = metrics.get(key)
+            if value is not None and value > limit:
+                violations.append({"metric": key, "value": value, "budget": limit})
+        return violations
+
+    def merge(self, pages: dict):
+        """合并其他采集器（例如并行 worker）的结果"""
+        self.pages.update(pages)
+
+    def summary(self):
+        violations = [
+            {"page": name, **v}
+            for name, metrics in self.pages.items()
+            for v in metrics["violations"]
+        ]
+        return {"pages": self.pages, "violations": violations}
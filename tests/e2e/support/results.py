@@ -0,0 +1,295 @@
+"""
+E2E 测试结果模型与历史趋势存储
+- StepResult / RunResult：带起止时间、分阶段耗时与附件的紧凑结果模型（slots dataclass）
+- StepRecorder：兼容原有 test_results.append((name, status, message)) 写法的结果列表，自动补全计时信息
+- HistoryStore：把每次运行写入本地 SQLite，支持按步骤查询历史耗时与状态、检测耗时回归
+- write_junit / write_json：导出 JUnit XML 与 JSON，prune_run_files 只保留最近 N 次运行的导出文件
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+HISTORY_DB = Path(os.getenv("E2E_HISTORY_DB", "/tmp/e2e-screenshots/history.sqlite3"))
+# 截图目录中最多保留的 junit_*.xml / run_*.json 运行数，完整历史保存在 SQLite 中
+RUN_FILES_KEEP = int(os.getenv("E2E_RUN_FILES_KEEP", "50"))
+
+
+@dataclass(slots=True)
+class StepResult:
+    name: str
+    status: str
+    message: str = ""
+    started_at: float = 0.0
+    ended_at: float = 0.0
+    phases: dict = field(default_factory=dict)
+    attachments: list = field(default_factory=list)
+    # 截图流水线去重或清理掉的截图，供视觉回归识别"本次运行缺少截图"的步骤
+    dropped_attachments: list = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(max(0.0, self.ended_at - self.started_at) * 1000, 1)
+
+    # 兼容旧的 (name, status, message) 元组用法：解包与下标访问
+    def __iter__(self):
+        return iter((self.name, self.status, self.message))
+
+    def __getitem__(self, index):
+        return (self.name, self.status, self.message)[index]
+
+    def to_dict(self):
+        data = asdict(self)
+        data["duration_ms"] = self.duration_ms
+        return data
+
+
+@dataclass(slots=True)
+class RunResult:
+    suite: str
+    run_id: str
+    started_at: float
+    ended_at: float
+    steps: list
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return round((self.ended_at - self.started_at) * 1000, 1)
+
+    def count(self, status: str) -> int:
+        return sum(1 for step in self.steps if step.status == status)
+
+    def to_dict(self):
+        return {
+            "suite": self.suite,
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "duration_ms": self.duration_ms,
+            "steps": [step.to_dict() for step in self.steps],
+            "metadata": self.metadata,
+        }
+
+
+class StepRecorder(list):
+    """test_results 列表：append 元组时自动转换为带计时的 StepResult"""
+
+    def __init__(self, suite: str):
+        super().__init__()
+        self.suite = suite
+        self.run_started = time.time()
+        self._step_started = None
+        self._phases = {}
+        self._attachments = []
+        self.current_step = None
+
+    def begin(self, name: str = None):
+        """标记一个步骤开始；name 供截图按步骤去重"""
+        self.current_step = name
+        self._step_started = time.time()
+        self._phases = {}
+        self._attachments = []
+
+    def phase(self, timing: dict):
+        """记录步骤内的阶段耗时（WaitEngine 的每次等待）"""
+        self._phases[timing["name"]] = self._phases.get(timing["name"], 0) + timing["elapsed_ms"]
+
+    def attach(self, path):
+        if path:
+            self._attachments.append(str(path))
+
+    def append(self, item):
+        now = time.time()
+        if not isinstance(item, StepResult):
+            name, status, message = item
+            item = StepResult(
+                name=name,
+                status=status,
+                message=message,
+                started_at=self._step_started or now,
+                ended_at=now,
+                phases=self._phases,
+                attachments=self._attachments,
+            )
+        super().append(item)
+        # 没有显式 begin 时，下一个步骤从当前步骤结束时开始计时
+        self._step_started = now
+        self._phases = {}
+        self._attachments = []
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def resolve_attachments(self, resolve):
+        """用 resolve(路径列表) 的结果替换各步骤的截图，去掉被去重或清理、并不存在的文件"""
+        for step in self:
+            kept = resolve(step.attachments)
+            step.dropped_attachments = [path for path in step.attachments if path not in kept]
+            step.attachments = kept
+
+    def to_run(self, metadata: dict = None) -> RunResult:
+        return RunResult(
+            suite=self.suite,
+            run_id=f"{self.suite}-{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}",
+            started_at=self.run_started,
+            ended_at=time.time(),
+            steps=list(self),
+            metadata=metadata or {},
+        )
+
+
+def write_json(run: RunResult, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(run.to_dict(), indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    return path
+
+
+def write_junit(run: RunResult, path: Path):
+    """导出 JUnit XML，PARTIAL 记为通过并附 system-out 说明"""
+    suite = ET.Element(
+        "testsuite",
+        name=run.suite,
+        tests=str(len(run.steps)),
+        failures=str(run.count("FAILED")),
+        skipped=str(run.count("SKIPPED")),
+        time=f"{run.duration_ms / 1000:.3f}",
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(run.started_at)),
+    )
+    for step in run.steps:
+        case = ET.SubElement(suite, "testcase", classname=run.suite, name=step.name,
+                             time=f"{step.duration_ms / 1000:.3f}")
+        if step.status == "FAILED":
+            ET.SubElement(case, "failure", message=step.message[:200]).text = step.message
+        elif step.status == "SKIPPED":
+            ET.SubElement(case, "skipped", message=step.message)
+        elif step.status == "PARTIAL":
+            ET.SubElement(case, "system-out").text = f"PARTIAL: {step.message}"
+        for attachment in step.attachments:
+            ET.SubElement(case, "system-out").text = f"[[ATTACHMENT|{attachment}]]"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+    return path
+
+
+class HistoryStore:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        suite TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        ended_at REAL NOT NULL,
+        metadata TEXT
+    );
+    CREATE TABLE IF NOT EXISTS steps (
+        run_id TEXT NOT NULL REFERENCES runs(run_id),
+        suite TEXT NOT NULL,
+        name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        message TEXT,
+        started_at REAL NOT NULL,
+        duration_ms REAL NOT NULL,
+        phases TEXT,
+        attachments TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_steps_suite_name ON steps(suite, name, started_at);
+    """
+
+    def __init__(self, path: Path = HISTORY_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_run(self, run: RunResult):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                (run.run_id, run.suite, run.started_at, run.ended_at,
+                 json.dumps(run.metadata, ensure_ascii=False, default=str)),
+            )
+            self.conn.executemany(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run.run_id, run.suite, s.name, s.status, s.message, s.started_at, s.duration_ms,
+                     json.dumps(s.phases), json.dumps(s.attachments))
+                    for s in run.steps
+                ],
+            )
+
+    def step_history(self, suite: str = None, limit_runs: int = 20):
+        """返回 {(suite, name): [(status, duration_ms), ...]}，按时间从新到旧，每个步骤最多 limit_runs 条"""
+        query = "SELECT suite, name, status, duration_ms FROM steps"
+        params = ()
+        if suite:
+            query += " WHERE suite = ?"
+            params = (suite,)
+        query += " ORDER BY started_at DESC"
+
+        history = {}
+        for step_suite, name, status, duration in self.conn.execute(query, params):
+            entries = history.setdefault((step_suite, name), [])
+            if len(entries) < limit_runs:
+                entries.append((status, duration))
+        return history
+
+    def trend(self, suite: str = None, window: int = 10, threshold: float = 1.5, min_delta_ms: float = 200):
+        """找出最近一次耗时明显超过滚动基线（之前 window 次通过运行的中位数）的步骤"""
+        regressions = []
+        for (step_suite, name), entries in self.step_history(suite, limit_runs=window + 1).items():
+            latest_status, latest = entries[0]
+            baseline_samples = [d for status, d in entries[1:] if status == "PASSED"]
+            if latest_status != "PASSED" or len(baseline_samples) < 3:
+                continue
+            baseline = statistics.median(baseline_samples)
+            if latest > baseline * threshold and latest - baseline >= min_delta_ms:
+                regressions.append({
+                    "suite": step_suite,
+                    "name": name,
+                    "latest_ms": latest,
+                    "baseline_ms": round(baseline, 1),
+                    "ratio": round(latest / baseline, 2) if baseline else None,
+                    "samples": len(baseline_samples),
+                })
+        return sorted(regressions, key=lambda r: r["ratio"] or 0, reverse=True)
+
+
+def prune_run_files(output_dir: Path, keep: int = RUN_FILES_KEEP):
+    """按修改时间只保留最近 keep 次运行的 run_*.json 与同名 junit_*.xml，返回删除的运行数"""
+    runs = sorted(output_dir.glob("run_*.json"), key=lambda f: f.stat().st_mtime)
+    stale = runs[:-keep] if keep > 0 else runs
+    for run_file in stale:
+        run_id = run_file.stem[len("run_"):]
+        run_file.unlink(missing_ok=True)
+        (output_dir / f"junit_{run_id}.xml").unlink(missing_ok=True)
+    return len(stale)
+
+
+def persist_run(recorder: StepRecorder, output_dir: Path, metadata: dict = None, log=print):
+    """运行结束时写入历史库并导出 JUnit XML / JSON，返回 RunResult"""
+    run = recorder.to_run(metadata)
+    try:
+        store = HistoryStore()
+        try:
+            store.save_run(run)
+        finally:
+            store.close()
+        junit = write_junit(run, output_dir / f"junit_{run.run_id}.xml")
+        write_json(run, output_dir / f"run_{run.run_id}.json")
+        log(f"🗂️ 运行记录已写入 {HISTORY_DB}，JUnit: {junit}")
+        pruned = prune_run_files(output_dir)
+        if pruned:
+            log(f"🧹 已清理 {pruned} 次较早运行的 JUnit / JSON 导出", "DEBUG")
+    except Exception as e:
+        log(f"⚠️ 运行记录保存失败: {str(e)}", "WARN")
+    return run
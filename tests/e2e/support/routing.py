@@ -0,0 +1,247 @@
+"""
+基于 Playwright 请求拦截的路由层
+- 默认关闭，设置 E2E_ROUTING=1 启用
+- 静态资源：优先从本地 admin/dist 构建产物返回（构建时的 base 需与 ADMIN_URL 的路径一致）；
+  没有可用的构建产物时，对带内容哈希的资源（assets/*-<hash>.js 等）建立本地缓存，首次下载后直接从磁盘返回
+- /api/v1 请求按 E2E_API_MODE 处理：
+  live      不拦截，直接访问 ADMIN_URL 对应的后端（默认）
+  backend   转发到本地后端（E2E_API_BACKEND，默认 http://localhost:3000）
+  record    访问真实后端并把响应录制为 fixture
+  fixtures  只从录制的 fixture 返回，完全离线、无副作用
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from .network import normalize_route
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+ADMIN_DIST = Path(os.getenv("E2E_ADMIN_DIST", REPO_ROOT / "admin" / "dist"))
+ASSET_CACHE_DIR = Path(os.getenv("E2E_ASSET_CACHE", "/tmp/e2e-screenshots/.cache/assets"))
+FIXTURE_DIR = Path(os.getenv("E2E_API_FIXTURES", "/tmp/e2e-screenshots/.cache/api-fixtures"))
+API_MODE = os.getenv("E2E_API_MODE", "live")
+API_BACKEND = os.getenv("E2E_API_BACKEND", "http://localhost:3000")
+API_PREFIX = "/api/v1"
+ROUTING_ENABLED = os.getenv("E2E_ROUTING", "0") == "1"
+
+# Vite 构建产物的文件名带内容哈希，内容不变则 URL 不变，可以永久缓存
+HASHED_ASSET = re.compile(r"/assets/.+[-.][A-Za-z0-9_-]{8,}\.\w+$")
+# index.html 中引用构建资源的路径，用于读出构建时的 base（如 /admin/assets/index-xxx.js → /admin/）
+DIST_ASSET_REF = re.compile(r"""(?:src|href)=["']([^"']*?/)assets/""")
+# fixture 中保留的响应头，其余（长度、编码、日期等）由 Playwright 重新生成
+KEPT_HEADERS = ("content-type", "cache-control")
+
+
+def dist_base(index_html: Path):
+    """从构建产物的 index.html 读出资源路径前缀，读不到时返回 None"""
+    match = DIST_ASSET_REF.search(index_html.read_text(encoding="utf-8", errors="replace"))
+    return match.group(1) if match else None
+
+
+def fixture_key(method: str, url: str, body: str = None):
+    """请求的 fixture 键：方法 + 路径 + 排序后的查询参数 + 请求体摘要"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    key = f"{method} {parts.path}" + (f"?{query}" if query else "")
+    if body:
+        key += " #" + hashlib.sha256(body.encode()).hexdigest()[:12]
+    return key
+
+
+def fixture_filename(key: str):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", key.split(" #")[0].split("?")[0]).strip("_")
+    return f"{slug[:80]}_{hashlib.sha256(key.encode()).hexdigest()[:12]}.json"
+
+
+class RequestRouter:
+    def __init__(
+        self,
+        admin_url: str,
+        dist_dir: Path = ADMIN_DIST,
+        cache_dir: Path = ASSET_CACHE_DIR,
+        api_mode: str = API_MODE,
+        backend_url: str = API_BACKEND,
+        fixture_dir: Path = FIXTURE_DIR,
+        log=print,
+    ):
+        parts = urlsplit(admin_url)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.base_path = parts.path.rstrip("/") + "/"
+        self.cache_dir = Path(cache_dir)
+        self.api_mode = api_mode
+        self.backend_url = backend_url.rstrip("/")
+        self.fixture_dir = Path(fixture_dir)
+        self.log = log
+        self.dist_dir = self._usable_dist(dist_dir)
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._missing = set()
+        self._route_index = None
+
+    def _usable_dist(self, dist_dir):
+        """构建产物存在且 base 与 ADMIN_URL 的路径一致时才使用，否则资源请求会落到错误的路径上"""
+        if not dist_dir or not (Path(dist_dir) / "index.html").exists():
+            return None
+        base = dist_base(Path(dist_dir) / "index.html")
+        if base != self.base_path:
+            self.log(f"⚠️ 构建产物 {dist_dir} 的 base 为 {base}，与 ADMIN_URL 的路径 {self.base_path} 不一致，"
+                     f"不使用本地构建", "WARN")
+            return None
+        return Path(dist_dir)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def install(self, context):
+        """在 context 上注册路由，需在首次导航之前调用"""
+        context.route(self._is_static, self._handle_static)
+        if self.api_mode != "live":
+            context.route(self._is_api, self._handle_api)
+        source = f"本地构建 {self.dist_dir}" if self.dist_dir else f"哈希资源缓存 {self.cache_dir}"
+        self.log(f"🧭 请求路由已启用: 静态资源 → {source}，API → {self.api_mode}", "DEBUG")
+        return self
+
+    # ---------- 静态资源 ----------
+
+    def _is_static(self, url: str):
+        if not url.startswith(self.origin):
+            return False
+        path = urlsplit(url).path
+        return (path + "/").startswith(self.base_path) and not path.startswith(API_PREFIX)
+
+    def _handle_static(self, route):
+        request = route.request
+        if request.method != "GET":
+            route.continue_()
+            return
+        path = urlsplit(request.url).path
+        if self.dist_dir:
+            self._serve_dist(route, path)
+        elif HASHED_ASSET.search(path):
+            self._serve_cached(route)
+        else:
+            # index.html 等入口文件不缓存，保证总能拿到最新的资源哈希
+            route.continue_()
+
+    def _serve_dist(self, route, path: str):
+        relative = path[len(self.base_path):] if path.startswith(self.base_path) else ""
+        target = (self.dist_dir / relative).resolve()
+        if relative and target.is_file() and self.dist_dir.resolve() in target.parents:
+            self._count("static_dist")
+            route.fulfill(path=str(target))
+        elif route.request.resource_type == "document":
+            # 前端路由（/enrollments 等）统一返回入口页
+            self._count("static_dist")
+            route.fulfill(path=str(self.dist_dir / "index.html"))
+        else:
+            self._count("static_passthrough")
+            route.continue_()
+
+    def _serve_cached(self, route):
+        url = route.request.url
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        body_path = self.cache_dir / f"{digest}.body"
+        meta_path = self.cache_dir / f"{digest}.json"
+        if body_path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            self._count("static_cache_hit")
+            route.fulfill(status=200, headers=meta["headers"], body=body_path.read_bytes())
+            return
+
+        response = route.fetch()
+        if response.status == 200:
+            body = response.body()
+            headers = {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS}
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 先写内容再写元数据，元数据存在即代表缓存完整
+            body_path.write_bytes(body)
+            meta_path.write_text(json.dumps({"url": url, "headers": headers}), encoding="utf-8")
+        self._count("static_cache_miss")
+        route.fulfill(response=response)
+
+    # ---------- API ----------
+
+    def _is_api(self, url: str):
+        return urlsplit(url).path.startswith(API_PREFIX)
+
+    def _handle_api(self, route):
+        if self.api_mode == "backend":
+            self._forward(route)
+        elif self.api_mode == "record":
+            self._record(route)
+        else:
+            self._replay(route)
+
+    def _forward(self, route):
+        parts = urlsplit(route.request.url)
+        target = self.backend_url + parts.path + (f"?{parts.query}" if parts.query else "")
+        try:
+            route.fulfill(response=route.fetch(url=target))
+            self._count("api_backend")
+        except Exception as e:
+            self._count("api_error")
+            self.log(f"⚠️ 转发到本地后端失败 {parts.path}: {str(e)}", "WARN")
+            route.abort()
+
+    def _fixture_path(self, request):
+        key = fixture_key(request.method, request.url, request.post_data)
+        return key, self.fixture_dir / fixture_filename(key)
+
+    def _record(self, route):
+        request = route.request
+        response = route.fetch()
+        key, path = self._fixture_path(request)
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "key": key,
+            "route": f"{request.method} {normalize_route(request.url)}",
+            "status": response.status,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            "body": response.text(),
+        }, ensure_ascii=False), encoding="utf-8")
+        self._count("api_recorded")
+        route.fulfill(response=response)
+
+    def _replay(self, route):
+        request = route.request
+        key, path = self._fixture_path(request)
+        if not path.exists():
+            path = self._fallback_fixture(request)
+        if path is None:
+            self._count("api_missing")
+            if key not in self._missing:
+                self._missing.add(key)
+                self.log(f"⚠️ 没有录制的 fixture: {key}", "WARN")
+            route.fulfill(status=404, content_type="application/json",
+                          body=json.dumps({"code": 404, "message": f"no fixture for {key}"}))
+            return
+        fixture = json.loads(path.read_text(encoding="utf-8"))
+        self._count("api_fixture")
+        route.fulfill(status=fixture["status"], headers=fixture["headers"], body=fixture["body"])
+
+    def _fallback_fixture(self, request):
+        """精确匹配失败时，按 方法 + 归一化路由 找一个录制过的响应（例如只有分页参数不同）"""
+        with self._lock:
+            if self._route_index is None:
+                self._route_index = {}
+                for path in sorted(self.fixture_dir.glob("*.json")) if self.fixture_dir.exists() else []:
+                    try:
+                        route_key = json.loads(path.read_text(encoding="utf-8")).get("route")
+                    except ValueError:
+                        continue
+                    self._route_index.setdefault(route_key, path)
+        return self._route_index.get(f"{request.method} {normalize_route(request.url)}")
+
+    def merge(self, stats: dict):
+        """合并并行 worker 中的计数"""
+        for key, count in stats.items():
+            self.stats[key] = self.stats.get(key, 0) + count
+
+    def summary(self):
+        return {"api_mode": self.api_mode, "dist": str(self.dist_dir) if self.dist_dir else None, **self.stats}
@@ -0,0 +1,137 @@
+"""
+基于历史记录的测试步骤调度
+- 排序：依赖拓扑序内，历史失败率高的、被依赖多的（依赖根）优先；并行模式下耗时长的优先启动
+- 前置步骤失败时直接跳过其依赖步骤，不再白白等待超时
+- 只对历史上时好时坏（flaky）的步骤做有限次重试
+"""
+
+from .results import HistoryStore
+
+# 作为依赖时视为满足条件的状态（测试自身返回的 SKIPPED 例如"已登录"也算满足）
+SATISFIED = ("PASSED", "PARTIAL", "SKIPPED")
+
+
+class Step:
+    def __init__(self, name: str, fn, depends_on=(), tags=()):
+        """name 与测试写入结果时使用的名称一致，便于关联历史记录；tags 供统一运行器按标签筛选"""
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.tags = tuple(tags)
+
+
+class StepStats:
+    __slots__ = ("runs", "fail_rate", "avg_ms", "flaky")
+
+    def __init__(self, entries):
+        self.runs = len(entries)
+        failures = sum(1 for status, _ in entries if status == "FAILED")
+        self.fail_rate = failures / self.runs if self.runs else 0.0
+        durations = [d for _, d in entries]
+        self.avg_ms = sum(durations) / len(durations) if durations else 0.0
+        # 既有失败又有通过、且状态发生过翻转的步骤视为 flaky；一直失败的不重试
+        statuses = [status for status, _ in entries]
+        flips = sum(1 for a, b in zip(statuses, statuses[1:]) if (a == "FAILED") != (b == "FAILED"))
+        self.flaky = self.runs >= 3 and 0 < self.fail_rate < 0.5 and flips >= 2
+
+
+class Scheduler:
+    def __init__(self, suite: str, max_retries: int = 1, history_runs: int = 20, log=print):
+        self.suite = suite
+        self.max_retries = max_retries
+        self.log = log
+        self.stats = {}
+        try:
+            store = HistoryStore()
+            try:
+                history = store.step_history(suite, limit_runs=history_runs)
+            finally:
+                store.close()
+            self.stats = {name: StepStats(entries) for (_, name), entries in history.items()}
+        except Exception as e:
+            self.log(f"⚠️ 读取运行历史失败，按默认顺序执行: {str(e)}", "WARN")
+
+    def _stat(self, name: str):
+        return self.stats.get(name) or StepStats([])
+
+    def order(self, steps, parallel: bool = False):
+        """在满足依赖的前提下给出执行顺序"""
+        dependents = {step.name: 0 for step in steps}
+        for step in steps:
+            for dep in step.depends_on:
+                if dep in dependents:
+                    dependents[dep] += 1
+
+        def priority(item):
+            index, step = item
+            stat = self._stat(step.name)
+            return (
+                -stat.fail_rate,
+                -dependents[step.name],
+                -stat.avg_ms if parallel else 0,
+                index,
+            )
+
+        known = {step.name for step in steps}
+        remaining = list(enumerate(steps))
+        done = set()
+        ordered = []
+        while remaining:
+            ready = [
+                item for item in remaining
+                if all(dep in done or dep not in known for dep in item[1].depends_on)
+            ]
+            if not ready:  # 存在循环依赖时按原顺序兜底
+                ready = remaining
+            best = min(ready, key=priority)
+            remaining.remove(best)
+            done.add(best[1].name)
+            ordered.append(best[1])
+        return ordered
+
+    def run(self, steps, recorder, on_start=None):
+        """按调度顺序执行步骤，结果写入 recorder（StepRecorder）；返回 {步骤名: 状态}"""
+        ordered = self.order(steps)
+        self.log("🗓️ 执行顺序: " + " → ".join(step.name for step in ordered))
+        statuses = {}
+        blocked = set()
+
+        for step in ordered:
+            failed_deps = [
+                dep for dep in step.depends_on
+                if dep in blocked or (dep in statuses and statuses[dep] not in SATISFIED)
+            ]
+            if failed_deps:
+                self.log(f"⏭️ 跳过 {step.name}: 前置步骤 {', '.join(failed_deps)} 未通过", "WARN")
+                recorder.append((step.name, "SKIPPED", f"Blocked by {', '.join(failed_deps)}"))
+                statuses[step.name] = "SKIPPED"
+                blocked.add(step.name)
+                continue
+
+            attempts = 1 + (self.max_retries if self._stat(step.name).flaky else 0)
+            for attempt in range(1, attempts + 1):
+                if on_start:
+                    on_start(step)
+                recorder.begin(step.name)
+                before = len(recorder)
+                try:
+                    returned = step.fn()
+                    error = None
+                except Exception as e:
+                    returned, error = False, e
+
+                if len(recorder) > before:
+                    status = recorder[-1].status
+                else:
+                    # 不写结果的准备步骤（如 setup_*）按返回值判定，失败时补一条结果
+                    status = "FAILED" if returned is False else "PASSED"
+                    if status == "FAILED":
+                        recorder.append((step.name, "FAILED", str(error) if error else "Step returned False"))
+
+                if status != "FAILED" or attempt == attempts:
+                    break
+                self.log(f"🔁 {step.name} 历史上不稳定，重试 ({attempt}/{attempts - 1})", "WARN")
+                del recorder[before:]
+
+            statuses[step.name] = status
+        return statuses
@@ -0,0 +1,186 @@
+"""
+低开销截图流水线
+- 截图策略：failure（仅失败）/ always（每个步骤）/ sampled（按比例抽样），失败截图始终保留
+- 测试线程只负责从浏览器取回 PNG 字节，WebP 编码与写盘在后台线程完成
+- 感知哈希 (16×16 dHash) 去重，跳过与同一步骤上一张几乎相同的画面（不同步骤之间不去重）
+- 步骤结果中的截图路径在运行结束时按实际保存的文件核对，被去重或清理的截图不会出现在报告中
+- 按文件数与总大小做保留上限，自动清理最旧的截图
+
+Pillow 为可选依赖：未安装时直接保存 PNG，并退化为按内容完全相同去重
+"""
+
+import hashlib
+import io
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 未安装时退化为保存原始 PNG
+    Image = None
+
+POLICIES = ("failure", "always", "sampled")
+IMAGE_SUFFIXES = (".webp", ".png")
+
+
+def dhash(image, size: int = 16) -> int:
+    """计算差值哈希：缩放为 (size+1)×size 灰度图，比较相邻像素亮度"""
+    gray = image.convert("L").resize((size + 1, size))
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ScreenshotPipeline:
+    def __init__(self, directory: Path, policy: str = None, sample_rate: float = None,
+                 max_files: int = None, max_mb: float = None, dedup_distance: int = None,
+                 full_page: bool = None, log=print):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.policy = policy or os.getenv("E2E_SCREENSHOT_POLICY", "always")
+        if self.policy not in POLICIES:
+            raise ValueError(f"未知截图策略: {self.policy}，可选 {', '.join(POLICIES)}")
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("E2E_SCREENSHOT_SAMPLE", "0.25"))
+        self.max_files = max_files if max_files is not None else int(os.getenv("E2E_SCREENSHOT_MAX_FILES", "200"))
+        self.max_bytes = (max_mb if max_mb is not None else float(os.getenv("E2E_SCREENSHOT_MAX_MB", "200"))) * 1048576
+        self.dedup_distance = dedup_distance if dedup_distance is not None else int(os.getenv("E2E_SCREENSHOT_DEDUP", "4"))
+        # 成功路径默认只截视口，失败截图始终截整页
+        self.full_page = full_page if full_page is not None else os.getenv("E2E_SCREENSHOT_FULL_PAGE", "") == "1"
+        self.log = log
+
+        self.stats = {"captured": 0, "saved": 0, "deduped": 0, "skipped": 0, "pruned": 0}
+        self.saved = []
+        self._counter = 0
+        # 每个步骤上一张截图的哈希；未指定步骤时按截图名区分
+        self._last_hashes = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="screenshot-encoder", daemon=True)
+        self._worker.start()
+
+    def should_capture(self, failure: bool) -> bool:
+        if failure or self.policy == "always":
+            return True
+        if self.policy == "failure":
+            return False
+        # sampled：按计数确定性抽样，保证同样的运行得到同样的截图集合
+        self._counter += 1
+        interval = max(1, round(1 / self.sample_rate)) if self.sample_rate > 0 else 0
+        return interval > 0 and self._counter % interval == 0
+
+    def capture(self, page, name: str, failure: bool = None, step: str = None):
+        """截图并交给后台线程编码保存，返回目标路径；按策略跳过时返回 None
+        返回时文件尚未写入，之后还可能被去重或清理，需要确认是否存在时用 resolve()"""
+        if failure is None:
+            failure = "error" in name
+        if not self.should_capture(failure):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return None
+
+        png = page.screenshot(type="png", full_page=failure or self.full_page)
+        return self._enqueue(name, png, failure, step)
+
+    async def capture_async(self, page, name: str, failure: bool = None, step: str = None):
+        """capture 的 async Playwright 版本"""
+        if failure is None:
+            failure = "error" in name
+        if not self.should_capture(failure):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return None
+
+        png = await page.screenshot(type="png", full_page=failure or self.full_page)
+        return self._enqueue(name, png, failure, step)
+
+    def _enqueue(self, name: str, png: bytes, failure: bool, step: str = None):
+        suffix = ".webp" if Image is not None else ".png"
+        path = self.directory / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}{suffix}"
+        with self._lock:
+            self.stats["captured"] += 1
+        self._queue.put((path, png, failure, step or name))
+        return path
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._process(*job)
+            except Exception as e:
+                self.log(f"⚠️ 截图保存失败: {str(e)}", "WARN")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, path: Path, png: bytes, failure: bool, step: str):
+        last_hash = self._last_hashes.get(step)
+        if Image is not None:
+            image = Image.open(io.BytesIO(png))
+            fingerprint = dhash(image)
+            duplicate = last_hash is not None and hamming(fingerprint, last_hash) <= self.dedup_distance
+        else:
+            image = None
+            fingerprint = hashlib.sha1(png).hexdigest()
+            duplicate = fingerprint == last_hash
+
+        if duplicate and not failure:
+            with self._lock:
+                self.stats["deduped"] += 1
+            return
+        self._last_hashes[step] = fingerprint
+
+        if image is not None:
+            image.save(path, format="WEBP", quality=80, method=4)
+        else:
+            path.write_bytes(png)
+        with self._lock:
+            self.stats["saved"] += 1
+            self.saved.append(path)
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """超出文件数或总大小上限时删除最旧的截图"""
+        files = [f for f in self.directory.iterdir() if f.is_file() and f.suffix in IMAGE_SUFFIXES]
+        files.sort(key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        while files and (len(files) > self.max_files or total > self.max_bytes):
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+            with self._lock:
+                self.stats["pruned"] += 1
+                if oldest in self.saved:
+                    self.saved.remove(oldest)
+
+    def resolve(self, paths):
+        """等待后台线程处理完成，只保留实际写入且未被清理的截图路径"""
+        self.flush()
+        with self._lock:
+            saved = {str(path) for path in self.saved}
+        return [path for path in paths if str(path) in saved]
+
+    def flush(self):
+        """等待后台线程处理完所有截图"""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def summary(self):
+        self.flush()
+        return {"policy": self.policy, "directory": str(self.directory), **self.stats}
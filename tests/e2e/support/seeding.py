@@ -0,0 +1,167 @@
+"""
+通过后端 API 直接准备 E2E 测试数据
+- 用开发环境的模拟微信登录创建测试用户，再依次创建报名、模拟支付并确认、提交打卡
+- 互不依赖的请求（登录与期次查询、报名与课程查询）并发执行
+- 只依赖标准库（urllib），与 scripts/ 下的运维脚本一致
+
+模拟支付（mock-confirm）只在非生产环境开放，默认连接本地后端；
+DataSeeder 拒绝对生产域名造数，除非显式设置 E2E_SEED_ALLOW_PRODUCTION=1
+"""
+
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+SEED_API_URL = os.getenv("E2E_API_URL", "http://localhost:3000/api/v1")
+SEED_WX_APPID = os.getenv("E2E_WX_APPID", "")
+SEED_PERIOD_ID = os.getenv("E2E_SEED_PERIOD_ID", "")
+SEED_TIMEOUT = float(os.getenv("E2E_SEED_TIMEOUT", "10"))
+SEED_ALLOW_PRODUCTION = os.getenv("E2E_SEED_ALLOW_PRODUCTION", "0") == "1"
+PRODUCTION_HOSTS = {"wx.shubai01.com"}
+
+
+class SeedError(Exception):
+    """API 返回非 0 业务码或 HTTP 错误"""
+
+
+class ApiClient:
+    def __init__(self, base_url: str = SEED_API_URL, wx_app_id: str = SEED_WX_APPID, timeout: float = SEED_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.wx_app_id = wx_app_id
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, data=None, token: str = None):
+        """发送请求并返回响应中的 data 字段"""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if self.wx_app_id:
+            headers["X-Wx-AppId"] = self.wx_app_id
+        body = json.dumps(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                payload = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            try:
+                payload = json.loads(e.read())
+            except ValueError:
+                raise SeedError(f"{method} {path} → HTTP {e.code}") from e
+
+        if payload.get("code") != 0:
+            raise SeedError(f"{method} {path} → {payload.get('message') or payload}")
+        return payload.get("data")
+
+
+class DataSeeder:
+    def __init__(self, user_key: str, api: ApiClient = None, period_id: str = SEED_PERIOD_ID, log=print,
+                 allow_production: bool = SEED_ALLOW_PRODUCTION):
+        """user_key 决定模拟登录的 code，相同的 user_key 对应同一个测试用户"""
+        self.user_key = user_key
+        self.api = api or ApiClient()
+        host = urlparse(self.api.base_url).hostname
+        if host in PRODUCTION_HOSTS and not allow_production:
+            raise SeedError(f"拒绝对生产环境 {host} 造数（会创建测试用户、报名与支付），"
+                            f"请改用本地后端，或设置 E2E_SEED_ALLOW_PRODUCTION=1")
+        self.period_id = period_id
+        self.log = log
+        self.token = None
+        self.timings = {}
+
+    def _timed(self, name: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def login(self):
+        data = self.api.request("POST", "/auth/wechat/login", {
+            "code": f"e2e-{self.user_key}",
+            "nickname": self.user_key.split("@")[0],
+            "wxAppId": self.api.wx_app_id or None,
+        })
+        self.token = data["accessToken"]
+        return data["user"]
+
+    def find_period(self):
+        """优先使用 E2E_SEED_PERIOD_ID，否则取第一个开放报名的期次"""
+        if self.period_id:
+            return self.api.request("GET", f"/periods/{self.period_id}")
+        periods = self.api.request("GET", "/periods?limit=50") or []
+        for period in periods:
+            if period.get("enrollmentOpen") is not False and period.get("status") != "completed":
+                return period
+        raise SeedError("没有开放报名的期次，可通过 E2E_SEED_PERIOD_ID 指定")
+
+    def find_section(self, period_id: str):
+        sections = self.api.request("GET", f"/periods/{period_id}/sections") or []
+        if not sections:
+            raise SeedError(f"期次 {period_id} 下没有课程，无法打卡")
+        return min(sections, key=lambda s: s.get("day", 0))
+
+    def enroll(self, period_id: str):
+        return self.api.request("POST", "/enrollments/simple", {"periodId": period_id}, token=self.token)
+
+    def pay(self, enrollment_id: str):
+        payment = self.api.request("POST", "/payments", {
+            "enrollmentId": enrollment_id,
+            "paymentMethod": "mock",
+        }, token=self.token)
+        self.api.request("POST", f"/payments/{payment['paymentId']}/mock-confirm", token=self.token)
+        return payment
+
+    def checkin(self, period_id: str, section: dict):
+        return self.api.request("POST", "/checkins", {
+            "periodId": period_id,
+            "sectionId": section["_id"],
+            "day": section.get("day", 0),
+            "note": f"E2E 自动化打卡 {self.user_key}",
+            "isPublic": True,
+        }, token=self.token)
+
+    def seed(self, on_event=None):
+        """创建 用户 → 报名 → 已支付 → 打卡 的完整数据，返回各记录 ID 与耗时
+
+        on_event(name, data) 在报名、支付、打卡各自完成时回调，便于下游验证尽早开始
+        """
+        notify = on_event or (lambda name, data: None)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # 登录与期次查询互不依赖
+            user_future = pool.submit(self._timed, "login", self.login)
+            period_future = pool.submit(self._timed, "period", self.find_period)
+            user, period = user_future.result(), period_future.result()
+            period_id = period["_id"]
+
+            # 报名与课程查询互不依赖
+            section_future = pool.submit(self._timed, "section", self.find_section, period_id)
+            enrollment = self._timed("enrollment", self.enroll, period_id)
+            notify("enrollment", enrollment)
+            section = section_future.result()
+
+        # 打卡要求报名已支付，这两步只能串行
+        payment = self._timed("payment", self.pay, enrollment["_id"])
+        notify("payment", payment)
+        checkin = self._timed("checkin", self.checkin, period_id, section)
+        notify("checkin", checkin)
+
+        result = {
+            "user_id": user["_id"],
+            "nickname": user.get("nickname"),
+            "period_id": period_id,
+            "period_title": period.get("title") or period.get("name"),
+            "enrollment_id": enrollment["_id"],
+            "payment_id": payment["paymentId"],
+            "checkin_id": checkin.get("_id") if isinstance(checkin, dict) else None,
+            "timings": dict(self.timings),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        self.log(f"🌱 测试数据已通过 API 创建: 报名 {result['enrollment_id']} / "
+                 f"支付 {result['payment_id']} / 打卡 {result['checkin_id']} ({result['elapsed_ms']:.0f}ms)")
+        return result
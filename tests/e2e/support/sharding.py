@@ -0,0 +1,131 @@
+"""
+统一运行器的步骤筛选、分片与分片结果合并
+- 步骤以 "套件::步骤名" 作为全局 ID，套件名同时是隐含标签
+- 分片按历史耗时做贪心装箱（最长的先放进当前总耗时最小的分片），
+  步骤依赖的前置步骤也会在同一分片内执行，其耗时计入该分片；每个步骤只归属一个分片
+- 只依赖步骤清单与耗时表，所有机器拿到同一份耗时表时得到完全相同的分片方案
+"""
+
+import fnmatch
+import hashlib
+import json
+import statistics
+from pathlib import Path
+
+from .results import HistoryStore
+
+# 没有历史记录的步骤按此耗时估算
+DEFAULT_STEP_MS = 5000.0
+
+# 合并多个分片中同名的套件收尾结果（如 perf_budgets、console_logs）时，取最差的状态
+STATUS_RANK = {"FAILED": 3, "PARTIAL": 2, "PASSED": 1, "SKIPPED": 0}
+
+
+def step_id(suite: str, name: str) -> str:
+    return f"{suite}::{name}"
+
+
+def matches(entry: dict, keywords=(), tags=()) -> bool:
+    """keywords 按通配符或子串匹配步骤 ID，tags 匹配步骤标签或套件名
+
+    同一类条件中满足任意一个即可，同时给出两类条件时需要都满足
+    """
+    sid = entry["id"]
+    if keywords and not any(fnmatch.fnmatch(sid, k) or k in sid for k in keywords):
+        return False
+    if tags and not set(tags) & ({entry["suite"]} | set(entry["tags"])):
+        return False
+    return True
+
+
+def closure(catalog: dict, sid: str) -> set:
+    """步骤自身及其全部（传递）前置步骤"""
+    seen = set()
+    pending = [sid]
+    while pending:
+        current = pending.pop()
+        if current in seen or current not in catalog:
+            continue
+        seen.add(current)
+        pending.extend(catalog[current]["depends_on"])
+    return seen
+
+
+def load_durations(path: Path = None, history_runs: int = 10):
+    """读取步骤耗时表 {步骤 ID: ms}：优先使用导出的 JSON，否则取本地历史中通过运行的中位数"""
+    if path:
+        return {k: float(v) for k, v in json.loads(Path(path).read_text(encoding="utf-8")).items()}
+    store = HistoryStore()
+    try:
+        history = store.step_history(limit_runs=history_runs)
+    finally:
+        store.close()
+    durations = {}
+    for (suite, name), entries in history.items():
+        samples = [d for status, d in entries if status in ("PASSED", "PARTIAL")]
+        if samples:
+            durations[step_id(suite, name)] = round(statistics.median(samples), 1)
+    return durations
+
+
+def plan_shards(catalog: dict, selected, total: int, durations: dict):
+    """把选中的步骤分到 total 个分片，返回 [{"owned": [...], "runs": [...], "estimated_ms": ...}]
+
+    owned 为归属该分片、计入合并报告的步骤；runs 为该分片实际执行的步骤（owned 加上前置步骤）
+    """
+    cost = {sid: durations.get(sid, DEFAULT_STEP_MS) for sid in catalog}
+    shards = [{"owned": [], "runs": set(), "estimated_ms": 0.0} for _ in range(total)]
+
+    # 以步骤连同前置步骤的总耗时从大到小装箱，耗时相同时按 ID 排序保证确定性
+    order = sorted(selected, key=lambda sid: (-sum(cost[d] for d in closure(catalog, sid)), sid))
+    for sid in order:
+        needed = closure(catalog, sid)
+
+        def load_after(index):
+            shard = shards[index]
+            return shard["estimated_ms"] + sum(cost[d] for d in needed - shard["runs"])
+
+        best = min(range(total), key=lambda index: (load_after(index), index))
+        shard = shards[best]
+        shard["estimated_ms"] = load_after(best)
+        shard["runs"] |= needed
+        shard["owned"].append(sid)
+
+    for shard in shards:
+        shard["owned"].sort()
+        shard["runs"] = sorted(shard["runs"])
+        shard["estimated_ms"] = round(shard["estimated_ms"], 1)
+    return shards
+
+
+def plan_digest(shards) -> str:
+    """分片方案的摘要，合并时用于确认所有分片使用了同一方案"""
+    payload = json.dumps([shard["owned"] for shard in shards], ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def merge_shards(documents, catalog_order=None):
+    """合并各分片的输出：每个步骤取其归属分片的结果，套件收尾结果取最差状态"""
+    steps = {}
+    extras = {}
+    owned = set()
+    for doc in documents:
+        owned |= set(doc["owned"])
+        for step in doc["steps"]:
+            sid = step["id"]
+            if sid in doc["owned"]:
+                steps[sid] = {**step, "shard": doc["shard"]}
+            elif not step.get("catalog"):
+                # 不在步骤清单里的结果（套件收尾检查）每个分片都会产生一条
+                previous = extras.get(sid)
+                if previous is None or STATUS_RANK.get(step["status"], 0) > STATUS_RANK.get(previous["status"], 0):
+                    extras[sid] = {**step, "shard": doc["shard"]}
+
+    for sid in owned - set(steps):
+        suite, name = sid.split("::", 1)
+        steps[sid] = {"id": sid, "suite": suite, "name": name, "status": "FAILED",
+                      "message": "Not executed by its shard", "duration_ms": 0, "shard": None}
+
+    order = {sid: index for index, sid in enumerate(catalog_order or [])}
+    merged = sorted(steps.values(), key=lambda s: (order.get(s["id"], len(order)), s["id"]))
+    return merged + sorted(extras.values(), key=lambda s: s["id"])
@@ -0,0 +1,231 @@
+"""
+管理后台 E2E 用的本地替身后端
+在内存中按指定数量生成用户、报名、打卡数据，按真实后端的响应格式提供列表、分页、筛选与搜索接口，
+用于大数据量下的管理后台性能测试；只依赖标准库
+
+配合 support/routing.py 的 backend 模式使用：浏览器中的 /api/v1 请求被转发到这里
+"""
+
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+API_PREFIX = "/api/v1"
+PROVINCES = ["北京", "上海", "广东", "浙江", "江苏", "四川", "湖北", "山东"]
+PAYMENT_STATUSES = ["paid", "pending", "free", "refunded"]
+
+
+def object_id(kind: int, index: int) -> str:
+    """可复现的 24 位十六进制 ID，便于按 ID 反查"""
+    return f"{kind:04x}{index:020x}"
+
+
+def iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+class Dataset:
+    def __init__(self, volume: int, periods: int = 5, sections_per_period: int = 21, seed: int = 42):
+        """volume 同时作为用户、报名、打卡的记录数"""
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.volume = volume
+
+        self.periods = [
+            {"_id": object_id(1, i), "name": f"第{i + 1}期晨读营", "title": f"第{i + 1}期晨读营",
+             "status": "ongoing" if i == periods - 1 else "completed", "enrollmentOpen": True}
+            for i in range(periods)
+        ]
+        self.sections = [
+            {"_id": object_id(2, p * sections_per_period + d), "periodId": period["_id"], "day": d + 1,
+             "title": f"第{d + 1}天"}
+            for p, period in enumerate(self.periods) for d in range(sections_per_period)
+        ]
+
+        self.users = []
+        for i in range(volume):
+            self.users.append({
+                "_id": object_id(3, i),
+                "nickname": f"晨读用户{i:06d}",
+                "openid": f"mock_openid_{i:06d}",
+                "phone": f"138{i:08d}"[:11],
+                "signature": "",
+                "role": "user",
+                "isActive": rng.random() > 0.02,
+                "createdAt": iso(now - timedelta(minutes=i)),
+            })
+
+        self.enrollments = []
+        for i in range(volume):
+            user = self.users[i]
+            period = self.periods[i % periods]
+            status = PAYMENT_STATUSES[rng.randrange(len(PAYMENT_STATUSES))]
+            self.enrollments.append({
+                "_id": object_id(4, i),
+                "userId": {"_id": user["_id"], "nickname": user["nickname"]},
+                "periodId": {"_id": period["_id"], "name": period["name"]},
+                "name": user["nickname"],
+                "province": PROVINCES[i % len(PROVINCES)],
+                "age": 20 + i % 40,
+                "paymentStatus": status,
+                "status": "active",
+                "enrolledAt": iso(now - timedelta(minutes=i)),
+            })
+
+        self.checkins = []
+        for i in range(volume):
+            user = self.users[rng.randrange(volume)] if volume else None
+            section = self.sections[i % len(self.sections)]
+            period = self.periods[(i % len(self.sections)) // sections_per_period]
+            self.checkins.append({
+                "_id": object_id(5, i),
+                "userId": {"_id": user["_id"], "nickname": user["nickname"]},
+                "periodId": {"_id": period["_id"], "name": period["name"]},
+                "sectionId": {"_id": section["_id"], "day": section["day"], "title": section["title"]},
+                "note": f"今天的晨读收获 #{i}",
+                "readingTime": 10 + i % 50,
+                "points": 10,
+                "checkinDate": iso(now - timedelta(minutes=i * 3)),
+            })
+
+
+def _page(items, query, unpaged: bool):
+    page = max(1, int(query.get("page", 1)))
+    limit = max(1, int(query.get("limit", query.get("pageSize", 20))))
+    if unpaged:
+        # 模拟没有服务端分页：一次返回全部结果，用来评估前端是否需要虚拟滚动
+        return items, 1, max(1, len(items))
+    start = (page - 1) * limit
+    return items[start:start + limit], page, limit
+
+
+def _matches(record, search: str, *fields):
+    if not search:
+        return True
+    for field in fields:
+        value = record
+        for part in field.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value and search in str(value):
+            return True
+    return False
+
+
+class StandInBackend:
+    def __init__(self, dataset: Dataset, latency_ms: float = 0, unpaged: bool = False, log=print):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.unpaged = unpaged
+        self.log = log
+        self.server = None
+        self.thread = None
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                backend.handle(self, "GET")
+
+            def do_POST(self):
+                backend.handle(self, "POST")
+
+            def do_PUT(self):
+                backend.handle(self, "PUT")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.log(f"🧪 替身后端已启动: {self.url}（{self.dataset.volume} 条记录）")
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def handle(self, handler, method: str):
+        self.requests += 1
+        parts = urlsplit(handler.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path[len(API_PREFIX):] if parts.path.startswith(API_PREFIX) else parts.path
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        started = time.perf_counter()
+        body = json.dumps(self.route(method, path, query), ensure_ascii=False).encode()
+        elapsed_ms = (time.perf_counter() - started) * 1000 + self.latency_ms
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        # 替身后端自身的处理耗时，便于从界面耗时中区分出前端渲染成本
+        handler.send_header("X-Standin-Ms", f"{elapsed_ms:.1f}")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def route(self, method: str, path: str, query: dict):
+        data = self.dataset
+        if method == "POST" and path == "/auth/admin/login":
+            return _success({"token": "standin-admin-token", "admin": {"name": "E2E", "role": "superadmin"}})
+
+        if method == "GET" and path == "/periods":
+            response = _success(data.periods)
+            response["pagination"] = {"page": 1, "limit": len(data.periods), "total": len(data.periods),
+                                      "totalPages": 1}
+            return response
+
+        if method == "GET" and path == "/enrollments":
+            search = query.get("search", "")
+            items = [
+                e for e in data.enrollments
+                if _matches(e, search, "name", "userId.nickname")
+                and (not query.get("periodId") or e["periodId"]["_id"] == query["periodId"])
+                and (not query.get("paymentStatus") or e["paymentStatus"] == query["paymentStatus"])
+            ]
+            rows, page, limit = _page(items, query, self.unpaged)
+            return _success({"list": rows, "total": len(items), "page": page, "limit": limit,
+                             "totalPages": -(-len(items) // limit)})
+
+        if method == "GET" and path == "/users":
+            search = query.get("search", "")
+            items = [u for u in data.users if _matches(u, search, "nickname", "phone")]
+            rows, page, limit = _page(items, query, self.unpaged)
+            return _success({"list": rows, "pagination": {"page": page, "limit": limit, "total": len(items),
+                                                          "pages": -(-len(items) // limit)}})
+
+        if method == "GET" and path == "/admin/checkins":
+            search = query.get("search", "")
+            items = [
+                c for c in data.checkins
+                if _matches(c, search, "userId.nickname", "note")
+                and (not query.get("periodId") or c["periodId"]["_id"] == query["periodId"])
+            ]
+            rows, page, limit = _page(items, query, self.unpaged)
+            return _success({
+                "list": rows,
+                "pagination": {"page": page, "limit": limit, "total": len(items), "pages": -(-len(items) // limit)},
+                "stats": {"totalCount": len(items), "todayCount": 0,
+                          "uniqueUserCount": len({c["userId"]["_id"] for c in items}),
+                          "totalPoints": sum(c["points"] for c in items)},
+            })
+
+        # 其余接口返回空数据，保证页面能正常渲染
+        return _success([])
+
+
+def _success(data, message: str = "success"):
+    return {"code": 0, "message": message, "data": data, "timestamp": int(time.time() * 1000)}
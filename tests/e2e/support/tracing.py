@@ -0,0 +1,179 @@
+"""
+基于 CDP 的页面性能剖析
+在每个页面测试前后开启 Chrome Tracing 与 Performance 域，保存 trace 文件（可直接拖入 DevTools 性能面板），
+并从 trace 中按自耗时（self time）汇总脚本执行、样式与布局、绘制耗时，列出最长的任务和内存峰值
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+PROFILE_ENABLED = os.getenv("E2E_PROFILE", "0") == "1"
+
+TRACE_CATEGORIES = [
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame",
+    "v8.execute",
+    "blink.user_timing",
+    "loading",
+    "latencyInfo",
+]
+
+# trace 事件名 → 汇总分类，与 DevTools 性能面板的 Summary 口径一致
+EVENT_CATEGORIES = {
+    "scripting": (
+        "EvaluateScript", "FunctionCall", "TimerFire", "EventDispatch", "FireAnimationFrame",
+        "FireIdleCallback", "RunMicrotasks", "v8.compile", "v8.compileModule", "v8.evaluateModule",
+        "V8.Execute", "v8.run", "XHRReadyStateChange", "XHRLoad", "GCEvent", "MajorGC", "MinorGC",
+        "V8.GCScavenger", "V8.GCFinalizeMC", "ParseHTML", "ParseAuthorStyleSheet",
+    ),
+    "layout": ("Layout", "UpdateLayoutTree", "RecalculateStyles", "UpdateLayerTree", "HitTest", "PrePaint"),
+    "paint": ("Paint", "PaintImage", "CompositeLayers", "Layerize", "RasterTask", "Decode Image",
+              "ImageDecodeTask", "Commit"),
+}
+CATEGORY_OF = {name: category for category, names in EVENT_CATEGORIES.items() for name in names}
+
+# Performance.getMetrics 中保留的指标
+KEPT_METRICS = ("ScriptDuration", "LayoutDuration", "RecalcStyleDuration", "TaskDuration",
+                "JSHeapUsedSize", "JSHeapTotalSize", "Nodes", "LayoutCount", "RecalcStyleCount")
+
+
+def renderer_main_threads(events):
+    """找出所有渲染进程主线程 (pid, tid)"""
+    return {
+        (e["pid"], e["tid"]) for e in events
+        if e.get("ph") == "M" and e.get("name") == "thread_name"
+        and e.get("args", {}).get("name") == "CrRendererMain"
+    }
+
+
+def summarize_trace(trace: dict, top: int = 5):
+    """按自耗时汇总 trace；小程序的视图层与逻辑层分属不同渲染线程，一并统计"""
+    events = trace["traceEvents"] if isinstance(trace, dict) else trace
+    threads = renderer_main_threads(events)
+    totals = {"scripting": 0.0, "layout": 0.0, "paint": 0.0, "other": 0.0}
+    tasks = []
+    heap_peak = 0
+
+    by_thread = {}
+    for e in events:
+        key = (e.get("pid"), e.get("tid"))
+        if key not in threads:
+            continue
+        if e.get("name") == "UpdateCounters":
+            heap_peak = max(heap_peak, e.get("args", {}).get("data", {}).get("jsHeapSizeUsed", 0))
+        if e.get("ph") == "X" and "dur" in e:
+            by_thread.setdefault(key, []).append(e)
+
+    for thread_events in by_thread.values():
+        # 按开始时间排序、父事件在前，用栈求每个事件扣除子事件后的自耗时
+        thread_events.sort(key=lambda e: (e["ts"], -e["dur"]))
+        stack = []
+        for e in thread_events:
+            end = e["ts"] + e["dur"]
+            while stack and stack[-1]["end"] <= e["ts"]:
+                _close(stack.pop(), totals)
+            if stack:
+                stack[-1]["children"] += e["dur"]
+            stack.append({"name": e["name"], "dur": e["dur"], "end": end, "children": 0})
+            if e["name"] == "RunTask":
+                tasks.append({"ts": e["ts"], "duration_ms": round(e["dur"] / 1000, 1)})
+        while stack:
+            _close(stack.pop(), totals)
+
+    if tasks:
+        start = min(t["ts"] for t in tasks)
+        for t in tasks:
+            t["start_ms"] = round((t.pop("ts") - start) / 1000, 1)
+    longest = sorted(tasks, key=lambda t: t["duration_ms"], reverse=True)[:top]
+    return {
+        **{f"{k}_ms": round(v / 1000, 1) for k, v in totals.items()},
+        "tasks": len(tasks),
+        "long_tasks": sum(1 for t in tasks if t["duration_ms"] > 50),
+        "largest_tasks": longest,
+        "js_heap_peak_mb": round(heap_peak / 1048576, 2) if heap_peak else None,
+    }
+
+
+def _close(frame, totals):
+    self_time = max(0, frame["dur"] - frame["children"])
+    category = CATEGORY_OF.get(frame["name"])
+    if category:
+        totals[category] += self_time
+    elif frame["name"] != "RunTask":
+        totals["other"] += self_time
+
+
+class PageProfiler:
+    def __init__(self, browser, page, directory: Path, log=print):
+        self.browser = browser
+        self.page = page
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.log = log
+        self.profiles = {}
+        self._session = None
+        self._before = None
+        self._name = None
+
+    def _metrics(self):
+        metrics = self._session.send("Performance.getMetrics")["metrics"]
+        return {m["name"]: m["value"] for m in metrics if m["name"] in KEPT_METRICS}
+
+    def start(self, name: str):
+        self._name = name
+        self._session = self.page.context.new_cdp_session(self.page)
+        self._session.send("Performance.enable", {"timeDomain": "timeTicks"})
+        try:
+            self._before = self._metrics()
+            self.browser.start_tracing(page=self.page, categories=TRACE_CATEGORIES)
+        except Exception:
+            self._session.detach()
+            raise
+
+    def stop(self):
+        if self._name is None:
+            return None
+        name, self._name = self._name, None
+        try:
+            raw = self.browser.stop_tracing()
+            after = self._metrics()
+        finally:
+            self._session.detach()
+
+        path = self.directory / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.trace.json"
+        path.write_bytes(raw)
+        profile = summarize_trace(json.loads(raw))
+        # Performance 域的累计耗时取差值，堆与节点数取结束时的值
+        for key, value in after.items():
+            if key.endswith("Duration"):
+                profile[f"cdp_{key}_ms"] = round((value - self._before.get(key, 0)) * 1000, 1)
+        profile["js_heap_used_mb"] = round(after.get("JSHeapUsedSize", 0) / 1048576, 2)
+        profile["dom_nodes"] = int(after.get("Nodes", 0))
+        profile["trace"] = str(path)
+        self.profiles[name] = profile
+        self.log(
+            f"🔬 {name}: 脚本 {profile['scripting_ms']:.0f}ms | 布局 {profile['layout_ms']:.0f}ms | "
+            f"绘制 {profile['paint_ms']:.0f}ms | 长任务 {profile['long_tasks']} | 堆 {profile['js_heap_used_mb']}MB"
+        )
+        return profile
+
+    def wrap(self, name: str, fn):
+        """包装测试函数：执行期间开启剖析，剖析失败不影响测试本身"""
+        def profiled():
+            try:
+                self.start(name)
+            except Exception as e:
+                self.log(f"⚠️ {name} 无法开启性能剖析: {str(e)}", "WARN")
+                self._name = None
+                return fn()
+            try:
+                return fn()
+            finally:
+                try:
+                    self.stop()
+                except Exception as e:
+                    self.log(f"⚠️ {name} 性能剖析结果保存失败: {str(e)}", "WARN")
+        return profiled
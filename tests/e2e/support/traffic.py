@@ -0,0 +1,448 @@
+"""
+真实流量录制与回放
+从 E2E 运行（浏览器中的 XHR / fetch）或 nginx 访问日志中提取脱敏后的请求序列，保存为紧凑的 JSONL：
+
+    第 1 行   {"format": "traffic/v1", "source": "e2e:admin", "recorded_at": ..., "events": N}
+    之后每行 {"t": 相对首个请求的毫秒, "u": 用户代号, "a": "admin"/"user", "m": 方法,
+              "p": 路径（query 已脱敏）, "r": 规范化路由, "b": 请求体结构, "h": 租户请求头,
+              "s": 录制时的状态码, "d": 录制时的耗时}
+
+脱敏规则：不保存 token、Cookie 与请求体的值，只保存请求体的结构（字段名与类型）；
+query 中不在白名单内的参数值替换为 *；用户以录制中首次出现的顺序编号（u1、u2…，管理员为 a1…）
+
+回放用 asyncio 按录制时的时间间隔（可压缩 1–50 倍）发出请求，同一用户的请求严格按录制顺序串行，
+每个用户一条 keep-alive 连接；结果按路由汇总 p50/p95/p99，可用于对比两次后端改动
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import ssl
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+from .network import normalize_route, percentile
+
+TRAFFIC_ENABLED = os.getenv("E2E_TRAFFIC", "0") == "1"
+TRAFFIC_DIR = Path(os.getenv("E2E_TRAFFIC_DIR", "/tmp/e2e-screenshots/traffic"))
+FORMAT = "traffic/v1"
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@morningreading.com")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123456")
+
+# 这些 query 参数的值不含用户输入，原样保留；其余（search、keyword 等）替换为 *
+SAFE_QUERY_KEYS = {
+    "page", "limit", "sort", "status", "type", "timeRange", "periodId", "sectionId", "userId", "day",
+    "isPublished", "dateFrom", "dateTo", "mediaType", "table", "afterId", "beforeId",
+}
+TENANT_HEADERS = ("x-tenant-slug", "x-wx-appid")
+
+# nginx 日志中看不到 token，按路由推断是否为管理端请求
+ADMIN_ROUTE = re.compile(r"^/api/v1/(?:admin|backup|monitoring|audit-logs|mobile-admin|stats/(?:dashboard|enrollments|payments))"
+                         r"|/admin(?:/|$)")
+
+# nginx 默认 combined 格式，末尾可选 $request_time
+NGINX_LINE = re.compile(
+    r'^(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<url>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "[^"]*" "(?P<ua>[^"]*)")?(?: (?P<rt>[\d.]+))?'
+)
+
+
+# ---------------------------------------------------------------------------
+# 脱敏
+# ---------------------------------------------------------------------------
+
+def body_shape(value):
+    """只保留字段名与类型"""
+    if isinstance(value, dict):
+        return {key: body_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [body_shape(value[0])] if value else []
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "num"
+    if value is None:
+        return "null"
+    return "str"
+
+
+def sample_body(shape):
+    """按结构生成回放用的占位请求体"""
+    if isinstance(shape, dict):
+        return {key: sample_body(item) for key, item in shape.items()}
+    if isinstance(shape, list):
+        return [sample_body(item) for item in shape]
+    return {"bool": False, "num": 0, "null": None}.get(shape, "replay")
+
+
+def sanitize_path(url: str) -> str:
+    parsed = urlparse(url)
+    if not parsed.query:
+        return parsed.path
+    query = [(key, value if key in SAFE_QUERY_KEYS else "*") for key, value in parse_qsl(parsed.query, True)]
+    return f"{parsed.path}?{urlencode(query, safe='*')}"
+
+
+def token_identity(authorization: str):
+    """从 Bearer token 的 payload 中取出 (身份, 类型)，不校验签名；payload 只用于生成代号，不写入录制"""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None, None
+    try:
+        payload = authorization.split()[1].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None, None
+    if claims.get("userId"):
+        return f"user:{claims['userId']}", "user"
+    if claims.get("id"):
+        return f"admin:{claims['id']}", "admin"
+    return None, None
+
+
+class Pseudonyms:
+    """把真实身份映射为 u1 / a1 这样的代号，同一身份在一次录制中代号不变"""
+
+    def __init__(self):
+        self.names = {}
+        self.counts = {"user": 0, "admin": 0}
+
+    def get(self, identity: str, kind: str):
+        if identity not in self.names:
+            self.counts[kind] += 1
+            self.names[identity] = f"{kind[0]}{self.counts[kind]}"
+        return self.names[identity]
+
+
+# ---------------------------------------------------------------------------
+# 录制
+# ---------------------------------------------------------------------------
+
+def capture_event(request, status, duration_ms):
+    """从 Playwright 请求中提取一条原始事件（身份在写文件时才替换为代号）"""
+    headers = request.headers
+    timing = request.timing or {}
+    body = None
+    try:
+        data = request.post_data_json
+        body = body_shape(data) if data is not None else None
+    except Exception:
+        body = "non-json" if request.post_data else None
+    identity, kind = token_identity(headers.get("authorization"))
+    return {
+        "start": timing.get("startTime") or time.time() * 1000,
+        "identity": identity,
+        "a": kind,
+        "m": request.method,
+        "p": sanitize_path(request.url),
+        "r": normalize_route(request.url),
+        "b": body,
+        "h": {name: headers[name] for name in TENANT_HEADERS if headers.get(name)} or None,
+        "s": status,
+        "d": round(duration_ms, 1) if duration_ms is not None else None,
+    }
+
+
+def finalize(raw_events):
+    """按开始时间排序，替换身份为代号，时间改为相对首个请求的毫秒数，去掉空字段"""
+    raw_events = sorted(raw_events, key=lambda e: e["start"])
+    if not raw_events:
+        return []
+    origin = raw_events[0]["start"]
+    names = Pseudonyms()
+    events = []
+    for raw in raw_events:
+        event = {"t": round(raw["start"] - origin, 1)}
+        if raw["identity"]:
+            event["u"] = names.get(raw["identity"], raw["a"])
+        for key in ("a", "m", "p", "r", "b", "h", "s", "d"):
+            if raw.get(key) is not None:
+                event[key] = raw[key]
+        events.append(event)
+    return events
+
+
+def write_recording(raw_events, path: Path, source: str):
+    events = finalize(raw_events)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        header = {"format": FORMAT, "source": source, "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                  "events": len(events)}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return len(events)
+
+
+def read_recording(path: Path):
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{path} 不是 {FORMAT} 格式的录制文件")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+def parse_nginx(lines, api_prefix: str = "/api/v1"):
+    """把 nginx access log 转换为原始事件；非 API 请求与健康检查被跳过"""
+    for line in lines:
+        match = NGINX_LINE.match(line)
+        if not match or not match["url"].startswith(api_prefix):
+            continue
+        path = urlparse(match["url"]).path
+        if path.rstrip("/").endswith(("/health", "/live", "/ready")):
+            continue
+        started = datetime.strptime(match["time"], "%d/%b/%Y:%H:%M:%S %z").timestamp() * 1000
+        kind = "admin" if ADMIN_ROUTE.search(path) else "user"
+        client = hashlib.sha1(f"{match['ip']}|{match['ua'] or ''}".encode()).hexdigest()
+        yield {
+            "start": started,
+            "identity": f"{kind}:{client}",
+            "a": kind,
+            "m": match["method"],
+            "p": sanitize_path(match["url"]),
+            "r": normalize_route(match["url"]),
+            "b": None,
+            "h": None,
+            "s": int(match["status"]),
+            "d": float(match["rt"]) * 1000 if match["rt"] else None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# 回放
+# ---------------------------------------------------------------------------
+
+def _post_json(url: str, payload: dict, headers: dict):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                 headers={"Content-Type": "application/json", **headers})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())["data"]
+
+
+def login_tokens(events, target: str, log=print):
+    """为录制中的每个代号换取 token：管理员统一用 ADMIN_EMAIL 登录，用户走开发环境的模拟微信登录
+    （code 为 replay-<代号>，同一代号每次回放都对应同一个测试用户）"""
+    api_url = target.rstrip("/") + "/api/v1"
+    users = {}
+    for event in events:
+        if event.get("u") and event["u"] not in users:
+            users[event["u"]] = (event.get("a"), event.get("h") or {})
+
+    tokens = {}
+    admin_token = None
+    for name, (kind, headers) in users.items():
+        try:
+            if kind == "admin":
+                if admin_token is None:
+                    admin_token = _post_json(api_url + "/auth/admin/login",
+                                             {"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}, {})["token"]
+                tokens[name] = admin_token
+            else:
+                tokens[name] = _post_json(api_url + "/auth/wechat/login", {
+                    "code": f"replay-{name}",
+                    "nickname": f"replay-{name}",
+                    "wxAppId": headers.get("x-wx-appid"),
+                }, headers)["accessToken"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log(f"⚠️ {name} 登录失败，将以未登录身份回放: {str(e)}")
+    return tokens
+
+
+class Connection:
+    """最小的 HTTP/1.1 keep-alive 客户端，只用于回放
+    支持 Content-Length、chunked 与读到连接关闭为止的响应；HEAD、204、304 响应不读消息体"""
+
+    def __init__(self, base_url: str):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parsed.scheme == "https" else None
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = None, timeout: float = 30):
+        for attempt in (1, 2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            try:
+                return await asyncio.wait_for(self._exchange(method, path, headers, body), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # 服务端关闭了空闲连接时重连一次
+                self.close()
+                if attempt == 2:
+                    raise
+            except asyncio.TimeoutError:
+                self.close()
+                raise
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        await self.writer.drain()
+
+        status, response_headers = await self._read_head()
+        # 1xx 是临时响应，真正的响应紧随其后
+        while 100 <= status < 200 and status != 101:
+            status, response_headers = await self._read_head()
+
+        keep_alive = response_headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (101, 204, 304):
+            # 这些响应没有消息体，即使带了 Content-Length 也不能读取
+            size = 0
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                chunk = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if chunk == 0:
+                    # 跳过可能存在的 trailer，直到空行
+                    while await self.reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                await self.reader.readexactly(chunk + 2)
+                size += chunk
+        elif "content-length" in response_headers:
+            size = int(response_headers["content-length"])
+            await self.reader.readexactly(size)
+        else:
+            # 既没有长度也不是 chunked：消息体一直到连接关闭为止
+            size = len(await self.reader.read())
+            keep_alive = False
+        if not keep_alive:
+            self.close()
+        return status, size
+
+    async def _read_head(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Replayer:
+    def __init__(self, events, target: str, speed: float = 1.0, tokens: dict = None, writes: bool = False,
+                 timeout: float = 30, log=print):
+        self.events = events
+        self.target = target.rstrip("/")
+        self.speed = speed
+        self.tokens = tokens or {}
+        self.writes = writes
+        self.timeout = timeout
+        self.log = log
+        self.results = []
+        self.skipped = 0
+
+    def by_user(self):
+        """按用户分组；没有身份的请求各自独立，互不等待"""
+        groups = {}
+        for index, event in enumerate(self.events):
+            if event["m"] not in ("GET", "HEAD") and not self.writes:
+                self.skipped += 1
+                continue
+            groups.setdefault(event.get("u") or f"anon-{index}", []).append(event)
+        return groups
+
+    async def run_user(self, user: str, events, started: float):
+        connection = Connection(self.target)
+        token = self.tokens.get(user)
+        try:
+            for event in events:
+                due = started + event["t"] / 1000 / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                headers = dict(event.get("h") or {})
+                if token:
+                    headers["Authorization"] = f"Bearer {token}"
+                body = json.dumps(sample_body(event["b"])).encode() if isinstance(event.get("b"), (dict, list)) else None
+
+                sent = time.perf_counter()
+                try:
+                    status, size = await connection.request(event["m"], event["p"], headers, body, self.timeout)
+                    error = None
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    status, size, error = None, 0, type(e).__name__
+                self.results.append({
+                    "route": f"{event['m']} {event['r']}",
+                    "user": user,
+                    "status": status,
+                    "error": error,
+                    "bytes": size,
+                    "latency_ms": (time.perf_counter() - sent) * 1000,
+                    # 同一用户的上一个请求还没返回时，本请求会晚于录制节奏发出
+                    "lag_ms": max(0.0, (sent - due) * 1000),
+                    "recorded_ms": event.get("d"),
+                })
+        finally:
+            connection.close()
+
+    async def run(self):
+        groups = self.by_user()
+        started = time.perf_counter() + 0.2
+        self.log(f"▶️ 回放 {sum(len(g) for g in groups.values())} 个请求（{len(groups)} 个用户），"
+                 f"{self.speed:g} 倍速，跳过写请求 {self.skipped} 个")
+        await asyncio.gather(*(self.run_user(user, events, started) for user, events in groups.items()))
+        return time.perf_counter() - started
+
+    def report(self, elapsed_s: float):
+        grouped = {}
+        for result in self.results:
+            grouped.setdefault(result["route"], []).append(result)
+        routes = {}
+        for route, items in grouped.items():
+            latencies = [r["latency_ms"] for r in items if r["error"] is None]
+            recorded = [r["recorded_ms"] for r in items if r["recorded_ms"] is not None]
+            routes[route] = {
+                "count": len(items),
+                "errors": sum(1 for r in items if r["error"] or (r["status"] or 0) >= 400),
+                "p50_ms": _round(percentile(latencies, 50)),
+                "p95_ms": _round(percentile(latencies, 95)),
+                "p99_ms": _round(percentile(latencies, 99)),
+                "max_ms": _round(max(latencies) if latencies else None),
+                "recorded_p50_ms": _round(percentile(recorded, 50)),
+            }
+        lags = [r["lag_ms"] for r in self.results]
+        return {
+            "target": self.target,
+            "speed": self.speed,
+            "requests": len(self.results),
+            "skipped_writes": self.skipped,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "elapsed_s": round(elapsed_s, 2),
+            "throughput_rps": round(len(self.results) / elapsed_s, 1) if elapsed_s else None,
+            "lag_p95_ms": _round(percentile(lags, 95)),
+            "routes": routes,
+        }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def compare_reports(before: dict, after: dict):
+    """按路由对比两次回放的 p50 / p95，返回 [(路由, 前 p50, 后 p50, 前 p95, 后 p95, p95 变化比例)]"""
+    rows = []
+    for route in sorted(set(before["routes"]) | set(after["routes"])):
+        old, new = before["routes"].get(route, {}), after["routes"].get(route, {})
+        old_p95, new_p95 = old.get("p95_ms"), new.get("p95_ms")
+        change = (new_p95 - old_p95) / old_p95 if old_p95 and new_p95 is not None else None
+        rows.append((route, old.get("p50_ms"), new.get("p50_ms"), old_p95, new_p95, change))
+    return rows
@@ -0,0 +1,203 @@
+"""
+视觉回归比对引擎
+按步骤名（如 admin-05-checkins、06-insights-page）保存基线图，只比对运行记录（run_*.json）中本次保存的截图，
+用 NumPy 向量化完成逐像素与分块比对，支持忽略区域遮罩与容差阈值，输出差异热力图和每个步骤的通过/失败结果
+
+依赖 numpy 与 Pillow
+"""
+
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# 截图流水线生成的文件名：<步骤名>_<YYYYmmdd>_<HHMMSS>[_毫秒].<ext>
+CAPTURE_NAME = re.compile(r"^(?P<step>.+)_\d{8}_\d{6}(?:_\d{3})?$")
+CAPTURE_SUFFIXES = (".webp", ".png")
+
+DEFAULT_OPTIONS = {
+    # 单像素各通道最大差值不超过该值视为相同（吸收 WebP 有损压缩噪声）
+    "pixel_tolerance": 24,
+    # 分块大小（像素）与单块变化像素占比阈值，超过即判定该块有变化
+    "block_size": 16,
+    "block_threshold": 0.2,
+    # 允许的变化块数量与整体变化像素占比
+    "max_changed_blocks": 0,
+    "max_diff_ratio": 0.002,
+    # 忽略区域 [[x, y, w, h], ...]，用于时间、统计数字等动态内容
+    "ignore": [],
+}
+
+
+def step_name(path: Path):
+    """从截图文件名解析步骤名，无法解析时返回 None"""
+    match = CAPTURE_NAME.match(path.stem)
+    return match.group("step") if match else None
+
+
+def latest_runs(directory: Path):
+    """递归查找每个套件最新的一份 run_*.json，作为"本次运行"的截图来源"""
+    latest = {}
+    for path in Path(directory).rglob("run_*.json"):
+        try:
+            suite = json.loads(path.read_text(encoding="utf-8")).get("suite", path.stem)
+        except (OSError, ValueError):
+            continue
+        if suite not in latest or path.stat().st_mtime > latest[suite].stat().st_mtime:
+            latest[suite] = path
+    return sorted(latest.values())
+
+
+def run_captures(run_files):
+    """从运行记录中收集本次保存的截图：返回 ({步骤名: 截图}, 缺少截图的步骤名集合)
+
+    只使用各步骤 attachments 中仍然存在的文件，不回退到更早运行的截图；
+    截图被去重、清理或已删除的步骤记为缺失。失败截图（*-error）不参与比对
+    """
+    captures, expected = {}, set()
+    for run_file in run_files:
+        run = json.loads(Path(run_file).read_text(encoding="utf-8"))
+        for step in run.get("steps", []):
+            for attachment in step.get("attachments", []) + step.get("dropped_attachments", []):
+                path = Path(attachment)
+                name = step_name(path)
+                if path.suffix not in CAPTURE_SUFFIXES or not name or name.endswith("-error"):
+                    continue
+                expected.add(name)
+                # 同一步骤多次截图时文件名按时间排序，取最后一张
+                if attachment in step.get("attachments", []) and path.exists():
+                    if name not in captures or path.name > captures[name].name:
+                        captures[name] = path
+    return captures, expected - set(captures)
+
+
+def load_options(config_path: Path, step: str):
+    """合并默认参数、配置文件中的 "*" 和该步骤的专属配置"""
+    options = dict(DEFAULT_OPTIONS)
+    if config_path and Path(config_path).exists():
+        config = json.loads(Path(config_path).read_text(encoding="utf-8"))
+        options.update(config.get("*", {}))
+        options.update(config.get(step, {}))
+    return options
+
+
+def load_rgb(path: Path) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def compare(baseline: np.ndarray, current: np.ndarray, options: dict):
+    """比对两张 RGB 图，返回 (结果字典, 每像素差值图, 变化分块布尔矩阵)"""
+    size_changed = baseline.shape != current.shape
+    height = min(baseline.shape[0], current.shape[0])
+    width = min(baseline.shape[1], current.shape[1])
+    a = baseline[:height, :width].astype(np.int16)
+    b = current[:height, :width].astype(np.int16)
+
+    # 逐像素取三个通道中的最大差值
+    diff = np.abs(a - b).max(axis=2).astype(np.uint8)
+
+    valid = np.ones((height, width), dtype=bool)
+    for x, y, w, h in options["ignore"]:
+        valid[y:y + h, x:x + w] = False
+    diff[~valid] = 0
+
+    changed = diff > options["pixel_tolerance"]
+    valid_count = int(valid.sum())
+    diff_ratio = float(changed.sum()) / valid_count if valid_count else 0.0
+
+    # 分块统计：补齐到块大小的整数倍后 reshape 成 (行块, 块高, 列块, 块宽) 一次求均值
+    block = options["block_size"]
+    pad_h = (-height) % block
+    pad_w = (-width) % block
+    padded = np.pad(changed, ((0, pad_h), (0, pad_w)))
+    rows, cols = padded.shape[0] // block, padded.shape[1] // block
+    block_ratio = padded.reshape(rows, block, cols, block).mean(axis=(1, 3))
+    changed_blocks = block_ratio > options["block_threshold"]
+
+    passed = (
+        not size_changed
+        and int(changed_blocks.sum()) <= options["max_changed_blocks"]
+        and diff_ratio <= options["max_diff_ratio"]
+    )
+    result = {
+        "passed": passed,
+        "size_changed": size_changed,
+        "baseline_size": [int(baseline.shape[1]), int(baseline.shape[0])],
+        "current_size": [int(current.shape[1]), int(current.shape[0])],
+        "diff_ratio": round(diff_ratio, 6),
+        "changed_blocks": int(changed_blocks.sum()),
+        "max_pixel_diff": int(diff.max()) if diff.size else 0,
+    }
+    return result, diff, changed_blocks
+
+
+def heatmap(baseline: np.ndarray, diff: np.ndarray, changed_blocks: np.ndarray, block: int) -> Image.Image:
+    """在灰度化的基线图上叠加红色差异热力，并用黄色标出超阈值的分块"""
+    height, width = diff.shape
+    gray = baseline[:height, :width].mean(axis=2, dtype=np.float32) * 0.4
+    out = np.repeat(gray[:, :, None], 3, axis=2)
+    heat = diff.astype(np.float32) / max(1, int(diff.max())) * 255
+    out[:, :, 0] = np.maximum(out[:, :, 0], heat)
+
+    block_mask = np.repeat(np.repeat(changed_blocks, block, axis=0), block, axis=1)[:height, :width]
+    out[block_mask, 1] = np.maximum(out[block_mask, 1], 120)
+    return Image.fromarray(out.clip(0, 255).astype(np.uint8))
+
+
+class VisualRegression:
+    def __init__(self, baseline_dir: Path, diff_dir: Path, config_path: Path = None, log=print):
+        self.baseline_dir = Path(baseline_dir)
+        self.diff_dir = Path(diff_dir)
+        self.config_path = config_path or self.baseline_dir / "visual-config.json"
+        self.log = log
+
+    def baseline_path(self, step: str) -> Path:
+        return self.baseline_dir / f"{step}.png"
+
+    def check(self, step: str, capture: Path):
+        """比对单个步骤，没有基线时返回 NEW 状态"""
+        started = time.perf_counter()
+        baseline_path = self.baseline_path(step)
+        if not baseline_path.exists():
+            return {"step": step, "status": "NEW", "capture": str(capture)}
+
+        options = load_options(self.config_path, step)
+        baseline = load_rgb(baseline_path)
+        result, diff, changed_blocks = compare(baseline, load_rgb(capture), options)
+        result.update({"step": step, "status": "PASSED" if result["passed"] else "FAILED",
+                       "capture": str(capture)})
+
+        if not result["passed"]:
+            self.diff_dir.mkdir(parents=True, exist_ok=True)
+            diff_path = self.diff_dir / f"{step}.diff.png"
+            # 热力图只用于人工查看，用最低压缩级别换取编码速度
+            heatmap(baseline, diff, changed_blocks, options["block_size"]).save(diff_path, compress_level=1)
+            result["diff"] = str(diff_path)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def accept(self, step: str, capture: Path):
+        """把当前截图保存为新的基线（无损 PNG）"""
+        self.baseline_dir.mkdir(parents=True, exist_ok=True)
+        with Image.open(capture) as image:
+            image.convert("RGB").save(self.baseline_path(step))
+
+    def run(self, run_files, update: bool = False, only=None):
+        """比对运行记录中保存的截图；本次应有截图但没有的步骤记为 MISSING"""
+        captures, missing = run_captures(run_files)
+        results = []
+        for step in sorted(set(captures) | missing):
+            if only and not any(pattern in step for pattern in only):
+                continue
+            if step in missing:
+                results.append({"step": step, "status": "MISSING"})
+            elif update:
+                self.accept(step, captures[step])
+                results.append({"step": step, "status": "UPDATED", "capture": str(captures[step])})
+            else:
+                results.append(self.check(step, captures[step]))
+        return results
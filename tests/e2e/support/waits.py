@@ -0,0 +1,129 @@
+"""
+E2E 事件驱动等待层
+用具体信号（API 响应、元素状态、网络请求静默）代替固定的 wait_for_timeout，
+并记录每次等待的实际耗时与预算，便于发现慢步骤和过紧的预算
+"""
+
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+
+class WaitEngine:
+    def __init__(self, page, log=print, on_record=None):
+        self.page = page
+        self.log = log
+        # 每记录一次等待都会回调，用于把等待耗时计入当前步骤的分阶段耗时
+        self.on_record = on_record
+        self.timings = []
+
+    def _record(self, name: str, kind: str, started: float, budget_ms: int, ok: bool):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        timing = {
+            "name": name,
+            "kind": kind,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "budget_ms": budget_ms,
+            "ok": ok,
+        }
+        self.timings.append(timing)
+        if self.on_record:
+            self.on_record(timing)
+        if not ok:
+            self.log(f"⚠️ 等待超时 [{name}] {kind}: {elapsed_ms:.0f}ms / 预算 {budget_ms}ms", "WARN")
+        return ok
+
+    def for_response(self, name: str, action, url_part: str, method: str = None, budget_ms: int = 5000):
+        """执行 action 并等待匹配的 API 响应完成，响应等待超时返回 None；action 自身的异常（如点击超时）照常抛出"""
+        def matches(response):
+            if url_part not in response.url:
+                return False
+            return method is None or response.request.method == method.upper()
+
+        kind = f"response {method.upper()} {url_part}" if method else f"response {url_part}"
+        started = time.monotonic()
+        action_done = False
+        try:
+            with self.page.expect_response(matches, timeout=budget_ms) as info:
+                action()
+                action_done = True
+            response = info.value
+            self._record(name, kind, started, budget_ms, True)
+            return response
+        except PlaywrightTimeoutError:
+            if not action_done:
+                raise
+            self._record(name, kind, started, budget_ms, False)
+            return None
+
+    def for_selector(self, name: str, selector: str, state: str = "visible", budget_ms: int = 5000):
+        """等待元素达到指定状态 (attached / detached / visible / hidden)"""
+        started = time.monotonic()
+        try:
+            self.page.locator(selector).first.wait_for(state=state, timeout=budget_ms)
+            return self._record(name, f"selector {state}", started, budget_ms, True)
+        except PlaywrightTimeoutError:
+            return self._record(name, f"selector {state}", started, budget_ms, False)
+
+    def for_settled(self, name: str, action=None, url_part: str = "", quiet_ms: int = 300,
+                    budget_ms: int = 5000):
+        """执行 action（可选）后等待网络静默：匹配的请求全部结束且持续 quiet_ms 没有新请求
+
+        比 networkidle 更灵活，可以只关注某一类请求（例如 /api/v1）
+        """
+        in_flight = set()
+        last_activity = [time.monotonic()]
+
+        def on_request(request):
+            if url_part in request.url:
+                in_flight.add(request)
+                last_activity[0] = time.monotonic()
+
+        def on_done(request):
+            if request in in_flight:
+                in_flight.discard(request)
+                last_activity[0] = time.monotonic()
+
+        self.page.on("request", on_request)
+        self.page.on("requestfinished", on_done)
+        self.page.on("requestfailed", on_done)
+
+        started = time.monotonic()
+        deadline = started + budget_ms / 1000
+        ok = False
+        try:
+            if action is not None:
+                action()
+                last_activity[0] = time.monotonic()
+            while time.monotonic() < deadline:
+                # 短轮询让 Playwright 派发事件
+                self.page.wait_for_timeout(50)
+                if not in_flight and (time.monotonic() - last_activity[0]) * 1000 >= quiet_ms:
+                    ok = True
+                    break
+        finally:
+            self.page.remove_listener("request", on_request)
+            self.page.remove_listener("requestfinished", on_done)
+            self.page.remove_listener("requestfailed", on_done)
+
+        return self._record(name, f"settled {url_part or '*'}", started, budget_ms, ok)
+
+    def summary(self):
+        """返回等待统计：总等待时间、超时次数与明细"""
+        return {
+            "total_wait_ms": round(sum(t["elapsed_ms"] for t in self.timings), 1),
+            "timeouts": sum(1 for t in self.timings if not t["ok"]),
+            "waits": list(self.timings),
+        }
+
+    def log_summary(self):
+        """打印每次等待的实际耗时 / 预算"""
+        if not self.timings:
+            return
+        self.log("\n⏱️ 等待耗时明细:")
+        for t in self.timings:
+            symbol = "✓" if t["ok"] else "✗"
+            usage = t["elapsed_ms"] / t["budget_ms"] * 100 if t["budget_ms"] else 0
+            self.log(f"  {symbol} {t['name']} [{t['kind']}] {t['elapsed_ms']:.0f}ms / {t['budget_ms']}ms ({usage:.0f}%)")
+        summary = self.summary()
+        self.log(f"  合计等待: {summary['total_wait_ms']:.0f}ms | 超时: {summary['timeouts']} 次")
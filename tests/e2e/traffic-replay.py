@@ -0,0 +1,132 @@
+"""
+晨读营真实流量回放
+把 E2E 运行或 nginx 访问日志中录制的请求序列按原有节奏（可加速）回放到任意后端，按路由输出耗时，
+用于对比后端改动前后在真实调用模式下的表现
+
+    E2E_TRAFFIC=1 python tests/e2e/admin-ui.py                                   # 录制 E2E 运行
+    python tests/e2e/traffic-replay.py import-nginx /var/log/nginx/access.log      # 从 nginx 日志导入
+    python tests/e2e/traffic-replay.py info /tmp/e2e-screenshots/traffic/admin-ui.jsonl
+    python tests/e2e/traffic-replay.py replay /tmp/e2e-screenshots/traffic/admin-ui.jsonl --speed 10 --out before.json
+    python tests/e2e/traffic-replay.py compare before.json after.json
+
+回放默认只发送 GET / HEAD 请求，加 --writes 才会按请求体结构发送占位的写请求，只应对测试环境使用
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from support.traffic import (
+    TRAFFIC_DIR, parse_nginx, write_recording, read_recording, login_tokens, Replayer, compare_reports,
+)
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}")
+
+
+def import_nginx(args):
+    out = Path(args.out) if args.out else TRAFFIC_DIR / f"nginx_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    with open(args.log, encoding="utf-8", errors="replace") as f:
+        count = write_recording(parse_nginx(f, args.prefix), out, source=f"nginx:{Path(args.log).name}")
+    print(f"💾 已导入 {count} 个请求: {out}")
+    return 0 if count else 1
+
+
+def info(args):
+    header, events = read_recording(Path(args.recording))
+    users = {event.get("u") for event in events if event.get("u")}
+    writes = sum(1 for event in events if event["m"] not in ("GET", "HEAD"))
+    duration_s = events[-1]["t"] / 1000 if events else 0
+    print(f"🎞️ {args.recording}: 来源 {header['source']}，录制于 {header['recorded_at']}")
+    print(f"   {len(events)} 个请求（写请求 {writes} 个），{len(users)} 个用户，时长 {duration_s:.1f}s")
+    routes = Counter(f"{event['m']} {event['r']}" for event in events)
+    for route, count in routes.most_common(args.top):
+        print(f"   {count:>6}  {route}")
+    return 0
+
+
+def replay(args):
+    header, events = read_recording(Path(args.recording))
+    if not 1 <= args.speed <= 50:
+        print("❌ --speed 需要在 1 到 50 之间")
+        return 1
+    tokens = {} if args.anonymous else login_tokens(events, args.target, log=lambda m: log(m, "WARN"))
+    replayer = Replayer(events, args.target, speed=args.speed, tokens=tokens, writes=args.writes,
+                        timeout=args.timeout, log=log)
+    elapsed = asyncio.run(replayer.run())
+    report = replayer.report(elapsed)
+    report["recording"] = {"path": args.recording, **header}
+
+    print(f"\n📊 {report['requests']} 个请求，耗时 {report['elapsed_s']}s，{report['throughput_rps']} req/s，"
+          f"错误 {report['errors']}，节奏滞后 p95 {report['lag_p95_ms']}ms")
+    ranked = sorted(report["routes"].items(), key=lambda kv: kv[1]["p95_ms"] or 0, reverse=True)
+    for route, stats in ranked[:args.top]:
+        print(f"  {route}: {stats['count']} 次 | p50 {stats['p50_ms']}ms | p95 {stats['p95_ms']}ms | "
+              f"p99 {stats['p99_ms']}ms | 录制时 p50 {stats['recorded_p50_ms']}ms | 错误 {stats['errors']}")
+
+    out = Path(args.out) if args.out else TRAFFIC_DIR / f"replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n💾 回放报告已保存: {out}")
+    return 0
+
+
+def compare(args):
+    before = json.loads(Path(args.before).read_text(encoding="utf-8"))
+    after = json.loads(Path(args.after).read_text(encoding="utf-8"))
+    if before.get("speed") != after.get("speed"):
+        print(f"⚠️ 两次回放倍速不同（{before.get('speed')} / {after.get('speed')}），结果仅供参考")
+    rows = compare_reports(before, after)
+    regressions = 0
+    print(f"{'路由':<56} {'p50 前→后':>18} {'p95 前→后':>18} {'p95 变化':>9}")
+    for route, old_p50, new_p50, old_p95, new_p95, change in sorted(rows, key=lambda r: -(r[5] or 0)):
+        regressed = change is not None and change > args.threshold
+        regressions += regressed
+        symbol = "❌" if regressed else ("✅" if change is not None and change < -args.threshold else "  ")
+        delta = f"{change:+.0%}" if change is not None else "-"
+        print(f"{symbol}{route:<54} {f'{old_p50}→{new_p50}':>18} {f'{old_p95}→{new_p95}':>18} {delta:>9}")
+    print(f"\n吞吐 {before.get('throughput_rps')} → {after.get('throughput_rps')} req/s，"
+          f"错误 {before.get('errors')} → {after.get('errors')}")
+    if regressions:
+        print(f"❌ {regressions} 个路由的 p95 变慢超过 {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="晨读营真实流量回放")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-nginx", help="把 nginx 访问日志转换为录制文件")
+    import_parser.add_argument("log", help="nginx access log（combined 格式，末尾可带 $request_time）")
+    import_parser.add_argument("--prefix", default="/api/v1", help="只导入该前缀下的请求")
+    import_parser.add_argument("--out", help=f"输出文件，默认 {TRAFFIC_DIR}/nginx_<时间>.jsonl")
+
+    info_parser = commands.add_parser("info", help="查看录制文件概况")
+    info_parser.add_argument("recording", help="录制文件")
+    info_parser.add_argument("--top", type=int, default=15, help="列出请求最多的路由数")
+
+    replay_parser = commands.add_parser("replay", help="回放录制文件")
+    replay_parser.add_argument("recording", help="录制文件")
+    replay_parser.add_argument("--target", default="http://localhost:3000", help="被回放的后端（不含 /api/v1）")
+    replay_parser.add_argument("--speed", type=float, default=1, help="回放倍速，1 到 50")
+    replay_parser.add_argument("--writes", action="store_true", help="同时回放写请求（使用占位请求体）")
+    replay_parser.add_argument("--anonymous", action="store_true", help="不登录，所有请求都不带 token")
+    replay_parser.add_argument("--timeout", type=float, default=30, help="单个请求超时（秒）")
+    replay_parser.add_argument("--top", type=int, default=15, help="列出 p95 最高的路由数")
+    replay_parser.add_argument("--out", help=f"回放报告，默认 {TRAFFIC_DIR}/replay_<时间>.json")
+
+    compare_parser = commands.add_parser("compare", help="按路由对比两次回放")
+    compare_parser.add_argument("before", help="改动前的回放报告")
+    compare_parser.add_argument("after", help="改动后的回放报告")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="p95 变慢超过该比例视为退化")
+
+    args = parser.parse_args()
+    sys.exit({"import-nginx": import_nginx, "info": info, "replay": replay, "compare": compare}[args.command](args))
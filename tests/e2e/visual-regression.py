@@ -0,0 +1,85 @@
+"""
+晨读营 E2E 视觉回归检查
+把最近一次运行（各套件最新的 run_*.json）保存的截图与基线比对，输出差异热力图与每个步骤的通过/失败
+依赖：pip install numpy pillow
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from support.visual import VisualRegression, latest_runs
+
+CAPTURE_DIR = Path(os.getenv("E2E_SCREENSHOT_DIR", "/tmp/e2e-screenshots"))
+BASELINE_DIR = Path(os.getenv("E2E_BASELINE_DIR", Path(__file__).parent / "baselines"))
+
+
+def log(message: str, level: str = "INFO"):
+    """日志输出"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="晨读营 E2E 视觉回归检查")
+    parser.add_argument("--captures", type=Path, default=CAPTURE_DIR, help="截图目录（递归查找 run_*.json）")
+    parser.add_argument("--run", type=Path, action="append", help="指定要检查的运行记录 run_*.json，可重复")
+    parser.add_argument("--baselines", type=Path, default=BASELINE_DIR, help="基线图目录")
+    parser.add_argument("--diffs", type=Path, help="差异热力图输出目录（默认 <截图目录>/visual-diffs）")
+    parser.add_argument("--update", action="store_true", help="把当前截图接受为新的基线")
+    parser.add_argument("--step", action="append", help="只处理名称包含该字符串的步骤，可重复")
+    args = parser.parse_args()
+
+    run_files = args.run or latest_runs(args.captures)
+    if not run_files:
+        log(f"❌ {args.captures} 下没有运行记录 run_*.json，请先运行 E2E 测试", "ERROR")
+        return 1
+    for run_file in run_files:
+        log(f"📄 运行记录: {run_file}")
+
+    engine = VisualRegression(args.baselines, args.diffs or args.captures / "visual-diffs", log=log)
+    started = time.perf_counter()
+    results = engine.run(run_files, update=args.update, only=args.step)
+    elapsed = time.perf_counter() - started
+
+    log("=" * 60)
+    log("🖼️ 视觉回归检查结果")
+    log("=" * 60)
+    symbols = {"PASSED": "✅", "FAILED": "❌", "NEW": "🆕", "UPDATED": "🔄", "MISSING": "⚠️"}
+    for result in results:
+        detail = ""
+        if "diff_ratio" in result:
+            detail = (f" - 差异像素 {result['diff_ratio'] * 100:.3f}% | 变化块 {result['changed_blocks']}"
+                      f" | {result['elapsed_ms']:.0f}ms")
+            if result["size_changed"]:
+                detail += f" | 尺寸 {result['baseline_size']} → {result['current_size']}"
+        if result["status"] == "MISSING":
+            detail = " - 本次运行没有保存该步骤的截图（被去重、清理或已删除），未做比对"
+        log(f"{symbols[result['status']]} {result['step']}: {result['status']}{detail}")
+        if result.get("diff"):
+            log(f"   热力图: {result['diff']}", "DEBUG")
+
+    failed = sum(1 for r in results if r["status"] == "FAILED")
+    new = sum(1 for r in results if r["status"] == "NEW")
+    missing = sum(1 for r in results if r["status"] == "MISSING")
+    log("=" * 60)
+    log(f"总计: {len(results)} 个步骤 | 失败: {failed} | 无基线: {new} | 缺少截图: {missing} | 耗时 {elapsed:.2f}s")
+    if new:
+        log("💡 使用 --update 把当前截图保存为基线")
+
+    report_file = args.captures / f"visual_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as f:
+        report = {"elapsed_s": round(elapsed, 3), "runs": [str(path) for path in run_files], "results": results}
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    log(f"💾 报告已保存: {report_file}")
+
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())